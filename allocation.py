@@ -0,0 +1,279 @@
+import heapq
+import random
+import time
+from collections import deque
+import numpy as np
+
+
+class Adjacency:
+    """Which seats sit next to each other.
+
+    Seats are numbered 0..n-1 across all blocks in order. ``table`` is an
+    (n, k) array of neighbouring seats per seat, padded with -1, so
+    neighbour lookups and clash checks are O(1) per seat.
+    """
+
+    def __init__(self, table):
+        self.table = table
+        self.total = len(table)
+
+    def neighbors(self, seat):
+        """Seats adjacent to ``seat``"""
+        return [n for n in self.table[seat].tolist() if n >= 0]
+
+    def pairs(self):
+        """All adjacent seat pairs (each once) as two index arrays"""
+        seats = np.repeat(np.arange(self.total), self.table.shape[1])
+        others = self.table.ravel()
+        keep = others > seats
+        return seats[keep], others[keep]
+
+
+class LinearAdjacency(Adjacency):
+    """Desks in a block are in a line: desk i sits next to desks i-1 and i+1.
+    Seats in different blocks are never adjacent."""
+
+    def __init__(self, sizes):
+        sizes = np.asarray(sizes, dtype=np.int64)
+        total = int(sizes.sum())
+        block_of = np.repeat(np.arange(len(sizes)), sizes)
+        seats = np.arange(total)
+        table = np.full((total, 2), -1, dtype=np.int64)
+        if total:
+            same = block_of[:-1] == block_of[1:]
+            table[1:, 0] = np.where(same, seats[:-1], -1)
+            table[:-1, 1] = np.where(same, seats[1:], -1)
+        super().__init__(table)
+
+
+class GridAdjacency(Adjacency):
+    """Desks on each room's (row, col) grid: a desk sits next to the desks in
+    front, behind and on either side of it. ``block_of``/``rows``/``cols``
+    give every seat's room and 1-based grid position, in seat order."""
+
+    def __init__(self, block_of, rows, cols):
+        block_of = np.asarray(block_of, dtype=np.int64)
+        rows = np.asarray(rows, dtype=np.int64)
+        cols = np.asarray(cols, dtype=np.int64)
+        total = len(block_of)
+        table = np.full((total, 4), -1, dtype=np.int64)
+        if total:
+            # Seats are in room order, then row-major, so one integer key per
+            # grid cell is increasing and neighbours are found by searchsorted
+            width = int(cols.max()) + 2
+            height = int(rows.max()) + 2
+            keys = (block_of * height + rows) * width + cols
+            for k, step in enumerate((-width, width, -1, 1)):
+                target = keys + step
+                pos = np.minimum(np.searchsorted(keys, target), total - 1)
+                table[:, k] = np.where(keys[pos] == target, pos, -1)
+        super().__init__(table)
+
+
+def count_violations(seat_groups, adjacency):
+    """Number of adjacent seat pairs whose students share a group"""
+    a, b = adjacency.pairs()
+    return int(np.count_nonzero(seat_groups[a] == seat_groups[b]))
+
+
+class Allocation:
+    """Result of an allocator: seating ``order`` (indices into the sorted
+    students, or None to keep the sorted order), block ``sizes``, and the
+    remaining constraint ``violations``"""
+
+    __slots__ = ('order', 'sizes', 'violations', 'rooms')
+
+    def __init__(self, order, sizes, violations=0, rooms=None):
+        self.order = order
+        self.sizes = sizes
+        self.violations = violations
+        # Room per block when seating into a RoomInventory
+        self.rooms = rooms
+
+
+class SequentialAllocator:
+    """Default strategy: keep the sorted order and cut it into consecutive blocks.
+
+    With ``rooms`` (a RoomInventory) the blocks are the rooms chosen by
+    ``RoomInventory.pack`` and adjacency follows each room's desk grid.
+    """
+
+    def __init__(self, capacities=None, rooms=None):
+        self.capacities = list(capacities) if capacities else []
+        self.rooms = rooms
+
+    def block_sizes(self, total, default_size):
+        """Fill the configured capacities in order, then blocks of ``default_size``"""
+        sizes = []
+        remaining = total
+        for capacity in self.capacities:
+            if remaining <= 0:
+                break
+            take = min(capacity, remaining)
+            sizes.append(take)
+            remaining -= take
+        while remaining > 0:
+            take = min(default_size, remaining)
+            sizes.append(take)
+            remaining -= take
+        return sizes
+
+    def plan(self, total, default_size):
+        """Block sizes and the room per block (None without a room inventory)"""
+        if self.rooms is None:
+            return self.block_sizes(total, default_size), None
+        packed = self.rooms.pack(total)
+        return [count for _, count in packed], [room for room, _ in packed]
+
+    def adjacency(self, sizes, rooms=None):
+        """Seat adjacency for blocks of the given sizes (and rooms)"""
+        if rooms is None:
+            return LinearAdjacency(sizes)
+        block_of = np.repeat(np.arange(len(sizes)), sizes)
+        rows = np.concatenate([room.seat_rows[:n] for room, n in zip(rooms, sizes)] or [[]])
+        cols = np.concatenate([room.seat_cols[:n] for room, n in zip(rooms, sizes)] or [[]])
+        return GridAdjacency(block_of, rows, cols)
+
+    def allocate(self, groups, default_size):
+        """Seat students (already sorted) given their group ids"""
+        groups = np.asarray(groups)
+        sizes, rooms = self.plan(len(groups), default_size)
+        return Allocation(None, sizes, count_violations(groups, self.adjacency(sizes, rooms)), rooms)
+
+
+class InterleavedAllocator(SequentialAllocator):
+    """Spread groups out so no two adjacent desks share a branch/subject.
+
+    1. Greedy round-robin: each seat takes the group with the most students
+       left that none of its already-seated neighbours belong to (students
+       within a group keep their sorted PRN order).
+    2. Repair: each remaining clash is swapped with a seat within
+       REPAIR_WINDOW where the swap clears it without creating a new one.
+    3. Optional local search (``optimize_seconds`` > 0): random swaps that
+       never increase the clash count, until none remain or time runs out.
+    """
+
+    # Seats on either side of a clash that repair will consider as swap partners
+    REPAIR_WINDOW = 1000
+    # Consecutive failed repairs after which a group is treated as unfixable
+    # (e.g. one branch holds more than half of the seats)
+    REPAIR_GIVE_UP = 50
+
+    def __init__(self, capacities=None, repair=True, optimize_seconds=0.0, seed=0, rooms=None):
+        super().__init__(capacities, rooms)
+        self.repair = repair
+        self.optimize_seconds = optimize_seconds
+        self.seed = seed
+
+    def allocate(self, groups, default_size):
+        codes = _group_ids(np.asarray(groups))
+        sizes, rooms = self.plan(len(codes), default_size)
+        adjacency = self.adjacency(sizes, rooms)
+
+        order = self._greedy(codes, adjacency)
+        # Seat groups with a trailing -1 so that table entries of -1 read as "no group"
+        seat_codes = np.append(codes[order], -1)
+        if self.repair:
+            self._repair(order, seat_codes, adjacency)
+        if self.optimize_seconds > 0:
+            self._local_search(order, seat_codes, adjacency)
+        return Allocation(order, sizes, count_violations(seat_codes[:-1], adjacency), rooms)
+
+    @staticmethod
+    def _greedy(codes, adjacency):
+        queues = [deque() for _ in range(int(codes.max()) + 1 if len(codes) else 0)]
+        for idx, code in enumerate(codes.tolist()):
+            queues[code].append(idx)
+        heap = [(-len(q), code) for code, q in enumerate(queues) if q]
+        heapq.heapify(heap)
+
+        order = np.empty(len(codes), dtype=np.int64)
+        seat_code = [-1] * len(codes)
+        for seat, row in enumerate(adjacency.table.tolist()):
+            forbidden = {seat_code[n] for n in row if 0 <= n < seat}
+            skipped = []
+            entry = heapq.heappop(heap)
+            while entry[1] in forbidden and heap:
+                skipped.append(entry)
+                entry = heapq.heappop(heap)
+            if entry[1] in forbidden:
+                # Only forbidden groups are left; take the largest one
+                skipped.append(entry)
+                skipped.sort()
+                entry = skipped.pop(0)
+            count, code = entry
+            order[seat] = queues[code].popleft()
+            seat_code[seat] = code
+            if count + 1 < 0:
+                heapq.heappush(heap, (count + 1, code))
+            for item in skipped:
+                heapq.heappush(heap, item)
+        return order
+
+    @staticmethod
+    def _swap(order, seat_codes, i, j):
+        order[i], order[j] = order[j], order[i]
+        seat_codes[i], seat_codes[j] = seat_codes[j], seat_codes[i]
+
+    def _repair(self, order, seat_codes, adjacency):
+        table = adjacency.table
+        total = adjacency.total
+        a, b = adjacency.pairs()
+        clash = seat_codes[a] == seat_codes[b]
+        failures = {}
+        for seat in np.unique(np.concatenate([a[clash], b[clash]])).tolist():
+            group = seat_codes[seat]
+            if failures.get(group, 0) >= self.REPAIR_GIVE_UP:
+                continue
+            around = table[seat]
+            if not (seat_codes[around] == group).any():
+                continue
+            cand = np.r_[seat + 1:min(total, seat + 1 + self.REPAIR_WINDOW),
+                         max(0, seat - self.REPAIR_WINDOW):seat]
+            cand_codes = seat_codes[cand]
+            # Partner must be another group, not already next to `group`, not a
+            # group that `seat`'s neighbours hold, and not a neighbour itself
+            ok = ((cand_codes != group) &
+                  ~(seat_codes[table[cand]] == group).any(axis=1) &
+                  ~np.isin(cand_codes, seat_codes[around]) &
+                  ~np.isin(cand, around))
+            hits = np.flatnonzero(ok)
+            if len(hits):
+                self._swap(order, seat_codes, seat, int(cand[hits[0]]))
+                failures[group] = 0
+            else:
+                failures[group] = failures.get(group, 0) + 1
+
+    @staticmethod
+    def _swap_delta(i, j, seat_codes, table):
+        """Change in clash count if seats i and j swap students"""
+        gi, gj = seat_codes[i], seat_codes[j]
+        if gi == gj:
+            return 0
+        ni = [n for n in table[i].tolist() if n >= 0 and n != j]
+        nj = [n for n in table[j].tolist() if n >= 0 and n != i]
+        before = sum(seat_codes[n] == gi for n in ni) + sum(seat_codes[n] == gj for n in nj)
+        after = sum(seat_codes[n] == gj for n in ni) + sum(seat_codes[n] == gi for n in nj)
+        return after - before
+
+    def _local_search(self, order, seat_codes, adjacency):
+        rng = random.Random(self.seed)
+        deadline = time.perf_counter() + self.optimize_seconds
+        total = adjacency.total
+        while total > 1 and time.perf_counter() < deadline:
+            a, b = adjacency.pairs()
+            clashing = b[seat_codes[a] == seat_codes[b]].tolist()
+            if not clashing:
+                return
+            for _ in range(1000):
+                i = rng.choice(clashing)
+                j = rng.randrange(total)
+                if i != j and self._swap_delta(i, j, seat_codes, adjacency.table) <= 0:
+                    self._swap(order, seat_codes, i, j)
+
+
+def _group_ids(groups):
+    """Integer id per distinct group, in first-seen order"""
+    uniques = {}
+    return np.fromiter((uniques.setdefault(g, len(uniques)) for g in groups.tolist()),
+                       dtype=np.int64, count=len(groups))
@@ -1,15 +1,43 @@
-from flask import Flask, render_template, request, send_file, jsonify
+from flask import Flask, render_template, request, send_file, jsonify, url_for
+from flask.json.provider import DefaultJSONProvider
 from werkzeug.utils import secure_filename
 import os
+import json
+import shutil
 import pandas as pd
 from datetime import datetime
-from seating_processor import SeatingProcessor
-from export_manager import ExportManager
+from seating_processor import SeatingProcessor, date_key
+from export_manager import ExportManager, get_backend
+from export_cache import export_cache
+from ingest import read_roll_list
+from block_builder import BlockStudents
+from seating_result import SeatingResult
+from result_cache import ResultCache
+from arrangement_store import ArrangementStore
+from jobs import JobQueue, QueueFull
+from instrumentation import metrics
+import compact_response
+from settings import get_settings
 import io
 
+
+class SeatingJSONProvider(DefaultJSONProvider):
+    """JSON provider that materializes lazy seating results"""
+
+    @staticmethod
+    def default(o):
+        if isinstance(o, SeatingResult):
+            return o.to_dict()
+        if isinstance(o, BlockStudents):
+            return o.to_list()
+        return DefaultJSONProvider.default(o)
+
+
 app = Flask(__name__)
+app.json = SeatingJSONProvider(app)
 UPLOAD_FOLDER = 'uploads'
-ALLOWED_EXTENSIONS = {'csv'}
+CACHE_FOLDER = os.path.join(UPLOAD_FOLDER, '.cache')
+ALLOWED_EXTENSIONS = {'csv', 'xls', 'xlsx'}
 
 if not os.path.exists(UPLOAD_FOLDER):
     os.makedirs(UPLOAD_FOLDER)
@@ -17,18 +45,126 @@ if not os.path.exists(UPLOAD_FOLDER):
 app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
 app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file size
 
-BRANCH_CODES = {
-    '11995': 'AI & DS',
-    '11191': 'Civil',
-    '11242': 'CSE',
-    '11293': 'Elect',
-    '11372': 'ENTC',
-    '11612': 'Mech'
-}
+# Processed results keyed by file content + branch map + block size
+result_cache = ResultCache(cache_dir=CACHE_FOLDER)
+
+# Every processed arrangement, for seat lookups that survive restarts
+arrangement_store = ArrangementStore(os.path.join(UPLOAD_FOLDER, 'arrangements.db'))
+
+# Recently seated results by arrangement id, so compact pages need no re-parsing
+recent_results = ResultCache(max_entries=8)
+
+# Background uploads/exports; files they produce live under uploads/jobs/<id>/
+job_queue = JobQueue(os.path.join(UPLOAD_FOLDER, 'jobs'), max_workers=4, max_pending=64)
 
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
+def upload_body(data_json, filename, cached, arrangement_id=None):
+    """Wrap an already-serialized result without decoding it again"""
+    return '{"success": true, "cached": %s, "arrangementId": %s, "data": %s, "filename": %s}' % (
+        'true' if cached else 'false', json.dumps(arrangement_id), data_json, json.dumps(filename))
+
+def upload_response(data_json, filename, cached, arrangement_id=None):
+    body = upload_body(data_json, filename, cached, arrangement_id)
+    return app.response_class(body, status=200, mimetype='application/json')
+
+def process_upload(filename, content, job=None, profile=False):
+    """Cache lookup, seating and storage for an uploaded roll list.
+
+    Returns (data_json, cached, arrangement_id). The roll list is seated
+    from ``content`` itself, never from a shared path another upload could
+    overwrite. With a ``job`` a copy of the file is kept in the job's own
+    folder and progress is reported on it. With
+    ``profile`` the cache is neither read nor written and the result's
+    diagnostics carry a cProfile summary and per-stage peak memory.
+    """
+    progress = job.update if job else (lambda *args: None)
+    # Branch map, block size etc. come from the current settings (reloaded when their file changes)
+    settings = get_settings()
+    cache_key = ResultCache.make_key(content, settings.BRANCH_CODES,
+                                     SeatingProcessor.STUDENTS_PER_BLOCK or settings.STUDENTS_PER_BLOCK,
+                                     os.path.splitext(filename)[1], settings.fingerprint, date_key())
+    cached = None if profile else result_cache.get(cache_key)
+    metrics.inc('seating_uploads_total', cached='true' if cached is not None else 'false')
+    if cached is not None:
+        arrangement_id = arrangement_store.arrangement_for_key(cache_key)
+        if arrangement_id is None:
+            data = compact_response.loads(cached)
+            arrangement_id = arrangement_store.save(data, filename, cache_key)
+            recent_results.put(arrangement_id, data)
+        return cached, True, arrangement_id
+
+    if job:
+        with open(job.artifact_path(filename), 'wb') as f:
+            f.write(content)
+
+    # Process the roll list (CSV or Excel)
+    progress(0.1, 'Seating students')
+    processor = SeatingProcessor(None, frame=read_roll_list(content, filename),
+                                 profile=profile or None, trace_memory=profile or None)
+    seating_data = processor.process()
+    progress(0.6, 'Serializing result')
+    data_json = seating_data.to_json()
+    # A profiled payload carries its cProfile/tracemalloc report; later plain uploads must not get it
+    if not profile:
+        result_cache.put(cache_key, data_json)
+    progress(0.8, 'Storing arrangement')
+    arrangement_id = arrangement_store.save(seating_data, filename, cache_key)
+    recent_results.put(arrangement_id, seating_data)
+    return data_json, False, arrangement_id
+
+def recent_result(arrangement_id, data_json=None):
+    """A stored arrangement's result (SeatingResult or dict) for paging, or None once it is gone"""
+    data = recent_results.get(arrangement_id)
+    if data is None:
+        if data_json is None:
+            key = arrangement_store.cache_key(arrangement_id)
+            data_json = result_cache.get(key) if key else None
+        if data_json is None:
+            return None
+        data = compact_response.loads(data_json)
+        recent_results.put(arrangement_id, data)
+    return data
+
+def compact_upload_response(data, arrangement_id, filename=None, cached=False):
+    """Compact payload for ?blocks=a-b, as JSON or MessagePack (Accept), brotli/gzip (Accept-Encoding)"""
+    total_blocks = len(data.blocks) if isinstance(data, SeatingResult) else len(data.get('blocks', []))
+    first, last = compact_response.parse_block_range(request.args.get('blocks'), total_blocks)
+    payload = {'success': True, 'cached': cached, 'arrangementId': arrangement_id, 'filename': filename,
+               'data': compact_response.compact_payload(data, first, last)}
+    if last < total_blocks:
+        size = last - first + 1
+        payload['next'] = url_for('compact_blocks', arrangement_id=arrangement_id,
+                                  blocks=f'{last + 1}-{last + size}')
+    encoding = 'json'
+    if (compact_response.msgpack_available() and request.accept_mimetypes.best_match(
+            ['application/json', 'application/msgpack']) == 'application/msgpack'):
+        encoding = 'msgpack'
+    body, content_encoding = compact_response.compress(compact_response.encode(payload, encoding),
+                                                       request.accept_encodings)
+    response = app.response_class(body, status=200, mimetype=compact_response.MEDIA_TYPES[encoding])
+    if content_encoding:
+        response.headers['Content-Encoding'] = content_encoding
+    response.vary.update(('Accept', 'Accept-Encoding'))
+    return response
+
+def render_export(format_type, data, stream=False):
+    """(buffer, mimetype, download name) for a registered export format; None for an unknown one"""
+    backend = get_backend(format_type)
+    if backend is None:
+        return None
+    stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    if format_type == 'pdf':
+        buffer = export_cache.generate_pdf(data)
+    elif format_type == 'excel':
+        # Large workbooks are spooled to a temp file and streamed from there
+        # in chunks instead of being held in memory as one buffer
+        buffer = ExportManager.generate_excel_streaming(data) if stream else export_cache.generate_excel(data)
+    else:
+        buffer = backend(data)
+    return buffer, backend.mimetype, f'seating_arrangement_{stamp}{backend.extension}'
+
 @app.route('/')
 def index():
     return render_template('index.html')
@@ -43,54 +179,183 @@ def upload_file():
         return jsonify({'error': 'No selected file'}), 400
     
     if not allowed_file(file.filename):
-        return jsonify({'error': 'Only CSV files are allowed'}), 400
+        return jsonify({'error': 'Only CSV or Excel (.xls/.xlsx) files are allowed'}), 400
     
     try:
         filename = secure_filename(file.filename)
-        filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-        file.save(filepath)
-        
-        # Process the CSV file
-        processor = SeatingProcessor(filepath, BRANCH_CODES)
-        seating_data = processor.process()
-        
-        return jsonify({
-            'success': True,
-            'data': seating_data,
-            'filename': filename
-        }), 200
+        data_json, cached, arrangement_id = process_upload(filename, file.read(),
+                                                           profile=request.args.get('profile') == '1')
+        if request.args.get('format') == 'compact':
+            try:
+                return compact_upload_response(recent_result(arrangement_id, data_json), arrangement_id,
+                                               filename, cached)
+            except ValueError as e:
+                # A bad ?blocks= range, as on /arrangements/<id>/compact
+                return jsonify({'error': str(e)}), 400
+        return upload_response(data_json, filename, cached=cached, arrangement_id=arrangement_id)
     
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/reseat', methods=['POST'])
+def reseat():
+    """Apply late additions/removals/corrections to a previous /upload result"""
+    try:
+        payload = request.get_json()
+        processor = SeatingProcessor(None)
+        seating_data = processor.update(payload['data'], added=payload.get('added'),
+                                        removed=payload.get('removed', ()),
+                                        modified=payload.get('modified'))
+        body = '{"success": true, "changedBlocks": %s, "data": %s}' % (
+            json.dumps(processor.changed_blocks), seating_data.to_json())
+        return app.response_class(body, status=200, mimetype='application/json')
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/seat/<prn>')
+def find_seat(prn):
+    """Where a PRN sits: newest stored arrangement first (?arrangement=<id> to pick one)"""
+    seats = arrangement_store.find_prn(prn, arrangement_id=request.args.get('arrangement', type=int),
+                                       limit=request.args.get('limit', 10, type=int))
+    if not seats:
+        return jsonify({'error': f'PRN {prn} not found'}), 404
+    return jsonify({'prn': prn, 'seats': seats})
+
+@app.route('/arrangements')
+def list_arrangements():
+    return jsonify({'arrangements': arrangement_store.arrangements(request.args.get('limit', 50, type=int))})
+
+@app.route('/arrangements/<int:arrangement_id>/blocks/<int:block_number>')
+def stored_block(arrangement_id, block_number):
+    block = arrangement_store.block(arrangement_id, block_number)
+    if block is None:
+        return jsonify({'error': 'Block not found'}), 404
+    return jsonify(block)
+
+@app.route('/arrangements/<int:arrangement_id>/compact')
+def compact_blocks(arrangement_id):
+    """Further pages of a compact /upload response (?blocks=51-100)"""
+    data = recent_result(arrangement_id)
+    if data is None:
+        return jsonify({'error': 'Arrangement is no longer available; upload the file again'}), 404
+    try:
+        return compact_upload_response(data, arrangement_id)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+@app.route('/cache/stats')
+def cache_stats():
+    return jsonify(result_cache.stats())
+
+@app.route('/metrics')
+def prometheus_metrics():
+    """Stage timings/row counts plus cache and job queue gauges, Prometheus text format"""
+    gauges = {f'seating_result_cache_{k}': v for k, v in result_cache.stats().items()}
+    gauges.update({f'seating_jobs_{status}': n for status, n in job_queue.stats().items()})
+    return app.response_class(metrics.render(gauges), status=200,
+                              mimetype='text/plain; version=0.0.4')
+
 @app.route('/export/<format_type>', methods=['POST'])
 def export_seating(format_type):
     try:
         data = request.get_json()
-        
-        if format_type == 'pdf':
-            pdf_buffer = ExportManager.generate_pdf(data)
-            return send_file(
-                pdf_buffer,
-                mimetype='application/pdf',
-                as_attachment=True,
-                download_name=f'seating_arrangement_{datetime.now().strftime("%Y%m%d_%H%M%S")}.pdf'
-            )
-        
-        elif format_type == 'excel':
-            excel_buffer = ExportManager.generate_excel(data)
-            return send_file(
-                excel_buffer,
-                mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
-                as_attachment=True,
-                download_name=f'seating_arrangement_{datetime.now().strftime("%Y%m%d_%H%M%S")}.xlsx'
-            )
-        
-        else:
+        export = render_export(format_type, data, stream=request.args.get('stream') == '1')
+        if export is None:
             return jsonify({'error': 'Invalid format type'}), 400
+        buffer, mimetype, download_name = export
+        return send_file(buffer, mimetype=mimetype, as_attachment=True, download_name=download_name)
     
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+# ----------------------------------------------------------------------
+# Background jobs: submit, then poll /jobs/<id> or stream /jobs/<id>/events
+# ----------------------------------------------------------------------
+
+def upload_job(job, filename, content):
+    data_json, cached, arrangement_id = process_upload(filename, content, job)
+    with open(job.artifact_path('result.json'), 'w', encoding='utf-8') as f:
+        f.write(upload_body(data_json, filename, cached, arrangement_id))
+    job.add_artifact('result.json', 'application/json')
+    return {'filename': filename, 'cached': cached, 'arrangementId': arrangement_id}
+
+def export_job(job, format_type, data, stream):
+    job.update(0.1, f'Rendering {format_type}')
+    buffer, mimetype, download_name = render_export(format_type, data, stream)
+    name = 'report' + os.path.splitext(download_name)[1]
+    with open(job.artifact_path(name), 'wb') as f:
+        shutil.copyfileobj(buffer, f)
+    job.add_artifact(name, mimetype, download_name)
+    return {'artifact': name}
+
+def job_accepted(job):
+    return jsonify({
+        'jobId': job.id,
+        'statusUrl': url_for('job_status', job_id=job.id),
+        'eventsUrl': url_for('job_events', job_id=job.id)
+    }), 202
+
+@app.route('/jobs/upload', methods=['POST'])
+def submit_upload_job():
+    file = request.files.get('file')
+    if file is None or file.filename == '':
+        return jsonify({'error': 'No selected file'}), 400
+    if not allowed_file(file.filename):
+        return jsonify({'error': 'Only CSV or Excel (.xls/.xlsx) files are allowed'}), 400
+    try:
+        job = job_queue.submit('upload', upload_job, secure_filename(file.filename), file.read())
+    except QueueFull as e:
+        return jsonify({'error': str(e)}), 503
+    return job_accepted(job)
+
+@app.route('/jobs/export/<format_type>', methods=['POST'])
+def submit_export_job(format_type):
+    if get_backend(format_type) is None:
+        return jsonify({'error': 'Invalid format type'}), 400
+    try:
+        job = job_queue.submit('export', export_job, format_type, request.get_json(),
+                               request.args.get('stream') == '1')
+    except QueueFull as e:
+        return jsonify({'error': str(e)}), 503
+    return job_accepted(job)
+
+@app.route('/jobs/<job_id>')
+def job_status(job_id):
+    job = job_queue.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    return jsonify(job.to_dict())
+
+@app.route('/jobs/<job_id>/events')
+def job_events(job_id):
+    """Server-sent events: one status message per change until the job finishes"""
+    job = job_queue.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+
+    def events():
+        sent = None
+        while True:
+            version = job.wait(sent, timeout=15)
+            if version == sent:
+                yield ': keep-alive\n\n'
+                continue
+            sent = version
+            yield f'data: {json.dumps(job.to_dict())}\n\n'
+            if job.done:
+                return
+
+    return app.response_class(events(), mimetype='text/event-stream',
+                              headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+@app.route('/jobs/<job_id>/artifacts/<name>')
+def job_artifact(job_id, name):
+    job = job_queue.get(job_id)
+    if job is None or name not in job.artifacts:
+        return jsonify({'error': 'Artifact not found'}), 404
+    info = job.artifacts[name]
+    return send_file(os.path.abspath(job.artifact_path(name)), mimetype=info['mimetype'],
+                     as_attachment=True, download_name=info['downloadName'])
+
 if __name__ == '__main__':
     app.run(debug=True, port=5000)
@@ -0,0 +1,183 @@
+import os
+import sqlite3
+import threading
+from datetime import datetime
+from seating_result import SeatingResult, blocks_of
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS arrangements (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    created TEXT NOT NULL,
+    filename TEXT,
+    cache_key TEXT,
+    exam_type TEXT,
+    total_students INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS blocks (
+    arrangement_id INTEGER NOT NULL REFERENCES arrangements(id) ON DELETE CASCADE,
+    block_number INTEGER NOT NULL,
+    block_name TEXT NOT NULL,
+    room TEXT,
+    date TEXT,
+    slot TEXT,
+    branch TEXT,
+    year INTEGER,
+    total_students INTEGER NOT NULL,
+    PRIMARY KEY (arrangement_id, block_number)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS seats (
+    arrangement_id INTEGER NOT NULL,
+    block_number INTEGER NOT NULL,
+    desk_no INTEGER NOT NULL,
+    prn TEXT NOT NULL,
+    name TEXT,
+    branch TEXT,
+    year INTEGER,
+    paper TEXT,
+    row INTEGER,
+    col INTEGER
+);
+CREATE INDEX IF NOT EXISTS seats_prn ON seats (prn, arrangement_id);
+CREATE INDEX IF NOT EXISTS seats_block ON seats (arrangement_id, block_number, desk_no);
+CREATE INDEX IF NOT EXISTS seats_branch ON seats (branch, arrangement_id);
+CREATE INDEX IF NOT EXISTS arrangements_key ON arrangements (cache_key);
+"""
+
+SEAT_COLUMNS = ('blockNumber', 'blockName', 'room', 'date', 'slot', 'deskNo', 'prn', 'name',
+                'branch', 'year', 'paper', 'row', 'col')
+
+
+class ArrangementStore:
+    """Processed arrangements kept in a local SQLite database.
+
+    The database runs in WAL mode so lookups are not blocked while an
+    upload is being written; each thread gets its own connection. Seats
+    are inserted with one ``executemany`` per arrangement and indexed by
+    PRN, block and branch, so "where does PRN X sit?" is a single index
+    probe however many past arrangements are stored.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        self._local = threading.local()
+        conn = self._connect()
+        conn.executescript(SCHEMA)
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.row_factory = sqlite3.Row
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute('PRAGMA foreign_keys=ON')
+            self._local.conn = conn
+        return conn
+
+    def save(self, data, filename='', cache_key=None):
+        """Store a SeatingResult (or its JSON dict); returns the arrangement id"""
+        blocks = blocks_of(data)
+        exam_type = blocks[0].get('examType', '') if len(blocks) else ''
+        total = data.total_students if isinstance(data, SeatingResult) else data.get('totalStudents', 0)
+        conn = self._connect()
+        with conn:
+            cur = conn.execute(
+                'INSERT INTO arrangements (created, filename, cache_key, exam_type, total_students) '
+                'VALUES (?, ?, ?, ?, ?)',
+                (datetime.now().isoformat(), filename, cache_key, exam_type, total))
+            arrangement_id = cur.lastrowid
+            conn.executemany('INSERT INTO blocks VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)', (
+                (arrangement_id, b['blockNumber'], b['blockName'], (b.get('layout') or {}).get('room'),
+                 b.get('date') or None, b.get('slot') or None, b.get('branch'), b.get('year'),
+                 b['totalStudents'])
+                for b in blocks))
+            conn.executemany('INSERT INTO seats VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                             self._seat_rows(arrangement_id, data, blocks))
+        return arrangement_id
+
+    @staticmethod
+    def _seat_rows(arrangement_id, data, blocks):
+        """Seat tuples, straight from the builder's arrays when available"""
+        if isinstance(data, SeatingResult):
+            b = data.builder
+            n = b.total
+            paper = b.paper.tolist() if b.paper is not None else [None] * n
+            row = b.seat_row.tolist() if b.rooms is not None else [None] * n
+            col = b.seat_col.tolist() if b.rooms is not None else [None] * n
+            return zip([arrangement_id] * n, (b.block_of + 1).tolist(), b.desk_no.tolist(),
+                       map(str, b.prn.tolist()), b.name.tolist(), b.branch.tolist(),
+                       b.student_year.tolist(), paper, row, col)
+        return ((arrangement_id, block['blockNumber'], s['deskNo'], str(s['prn']), s.get('name'),
+                 s.get('branch'), s.get('year'), s.get('paper'), s.get('row'), s.get('col'))
+                for block in blocks for s in block['students'])
+
+    def arrangement_for_key(self, cache_key):
+        """Most recent arrangement saved under ``cache_key``, or None"""
+        row = self._connect().execute(
+            'SELECT id FROM arrangements WHERE cache_key = ? ORDER BY id DESC LIMIT 1', (cache_key,)).fetchone()
+        return row['id'] if row else None
+
+    def cache_key(self, arrangement_id):
+        """The result cache key an arrangement was saved under, or None"""
+        row = self._connect().execute(
+            'SELECT cache_key FROM arrangements WHERE id = ?', (arrangement_id,)).fetchone()
+        return row['cache_key'] if row else None
+
+    def arrangements(self, limit=50):
+        """Newest arrangements first"""
+        rows = self._connect().execute(
+            'SELECT id, created, filename, exam_type, total_students FROM arrangements '
+            'ORDER BY id DESC LIMIT ?', (limit,)).fetchall()
+        return [{'id': r['id'], 'created': r['created'], 'filename': r['filename'],
+                 'examType': r['exam_type'], 'totalStudents': r['total_students']} for r in rows]
+
+    def find_prn(self, prn, arrangement_id=None, limit=10):
+        """Seats held by ``prn``, newest arrangement first (or only in ``arrangement_id``)"""
+        query = ('SELECT s.arrangement_id, s.block_number, b.block_name, b.room, b.date, b.slot, '
+                 's.desk_no, s.prn, s.name, s.branch, s.year, s.paper, s.row, s.col '
+                 'FROM seats s JOIN blocks b ON b.arrangement_id = s.arrangement_id '
+                 'AND b.block_number = s.block_number WHERE s.prn = ?')
+        params = [str(prn).strip()]
+        if arrangement_id is not None:
+            query += ' AND s.arrangement_id = ?'
+            params.append(arrangement_id)
+        query += ' ORDER BY s.arrangement_id DESC LIMIT ?'
+        params.append(limit)
+        return [dict(zip(('arrangementId',) + SEAT_COLUMNS, row))
+                for row in self._connect().execute(query, params).fetchall()]
+
+    def block(self, arrangement_id, block_number):
+        """One stored block with its students in desk order, or None"""
+        conn = self._connect()
+        meta = conn.execute('SELECT * FROM blocks WHERE arrangement_id = ? AND block_number = ?',
+                            (arrangement_id, block_number)).fetchone()
+        if meta is None:
+            return None
+        students = conn.execute(
+            'SELECT desk_no, prn, name, branch, year, paper, row, col FROM seats '
+            'WHERE arrangement_id = ? AND block_number = ? ORDER BY desk_no',
+            (arrangement_id, block_number)).fetchall()
+        return {
+            'arrangementId': arrangement_id,
+            'blockNumber': meta['block_number'],
+            'blockName': meta['block_name'],
+            'room': meta['room'],
+            'date': meta['date'] or '',
+            'slot': meta['slot'] or '',
+            'branch': meta['branch'],
+            'year': meta['year'],
+            'totalStudents': meta['total_students'],
+            'students': [{k: v for k, v in zip(('deskNo', 'prn', 'name', 'branch', 'year', 'paper', 'row', 'col'), s)
+                          if v is not None or k in ('name', 'year')} for s in students]
+        }
+
+    def delete(self, arrangement_id):
+        """Remove an arrangement with its blocks and seats"""
+        conn = self._connect()
+        with conn:
+            conn.execute('DELETE FROM seats WHERE arrangement_id = ?', (arrangement_id,))
+            conn.execute('DELETE FROM arrangements WHERE id = ?', (arrangement_id,))
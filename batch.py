@@ -0,0 +1,237 @@
+"""
+Batch mode: seat many roll lists from the command line, no web UI needed
+
+Each input file (CSV/XLS/XLSX; directories and glob patterns are expanded)
+is seated in a worker process and written to <output>/<file name>/ as
+seating.json, seating.pdf and seating.xlsx. <output>/manifest.json records
+every file's content hash, status, outputs and timings and is rewritten
+after each file, so an interrupted run picks up where it stopped: files
+already done with unchanged content are skipped unless --force is given.
+
+    python batch.py rolls/ "more/*.xls" [--output batch_output]
+        [--formats json,pdf,excel] [--workers 4] [--rooms halls.json]
+        [--interleave] [--force]
+
+Formats are the backends registered in export_manager. Only the standard
+library and that (light) registry are imported up front; pandas, reportlab
+and openpyxl load in the workers. Flask and Streamlit are never imported.
+"""
+import argparse
+import glob
+import hashlib
+import json
+import os
+import shutil
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+
+from export_manager import backend_names, get_backend
+from settings import get_settings
+
+FORMATS = ('json', 'pdf', 'excel')
+MANIFEST = 'manifest.json'
+
+
+def find_inputs(patterns):
+    """Roll list paths from files, directories and glob patterns, sorted and de-duplicated"""
+    allowed = tuple('.' + ext for ext in get_settings().ALLOWED_EXTENSIONS)
+    found = set()
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            candidates = [os.path.join(pattern, name) for name in os.listdir(pattern)]
+        else:
+            candidates = glob.glob(pattern) or [pattern]
+        for path in candidates:
+            if os.path.isfile(path) and path.lower().endswith(allowed):
+                found.add(os.path.abspath(path))
+    return sorted(found)
+
+
+def file_hash(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def output_names(paths):
+    """Output folder name per input: the file name, with the parent folder added on clashes"""
+    stems = {}
+    for path in paths:
+        stems.setdefault(os.path.splitext(os.path.basename(path))[0], []).append(path)
+    names = {}
+    for stem, group in stems.items():
+        for path in group:
+            names[path] = stem if len(group) == 1 else f"{os.path.basename(os.path.dirname(path))}_{stem}"
+    return names
+
+
+def load_manifest(output):
+    path = os.path.join(output, MANIFEST)
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding='utf-8') as f:
+        return {entry['source']: entry for entry in json.load(f)['files']}
+
+
+def write_manifest(output, entries, started, section='files', key='source', header=None):
+    """Rewrite the manifest atomically, so an interruption never leaves it half written
+
+    Entries are listed under ``section``, sorted by their ``key`` field;
+    ``header`` adds fields ahead of the rest (centers.py records its source).
+    """
+    files = sorted(entries.values(), key=lambda e: e[key])
+    summary = {section: len(files)}
+    for entry in files:
+        summary[entry['status']] = summary.get(entry['status'], 0) + 1
+    summary['students'] = sum(e.get('students', 0) for e in files if e['status'] == 'done')
+    path = os.path.join(output, MANIFEST)
+    with open(path + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump(dict(header or {}, started=started, updated=datetime.now().isoformat(),
+                       summary=summary, **{section: files}), f, indent=2)
+    os.replace(path + '.tmp', path)
+
+
+def record_entry(output, entries, entry, started, log=print, key='source', section='files', header=None,
+                 width=6):
+    """Add a finished entry to ``entries``, rewrite the manifest and log one line for it"""
+    # Outputs are stored relative to the output folder so it can be moved
+    entry['outputs'] = {fmt: os.path.relpath(path, output) for fmt, path in entry['outputs'].items()}
+    entries[entry[key]] = entry
+    write_manifest(output, entries, started, section, key, header)
+    detail = f"{entry['students']} students, {entry['blocks']} blocks" if entry['status'] == 'done' \
+        else entry['error']
+    log(f"{entry['status']:<{width}} {entry[key]} ({detail}, {entry['seconds']}s)")
+
+
+def is_current(entry, digest, output, formats):
+    """True when a manifest entry already covers this content and every wanted output exists"""
+    return (entry is not None and entry['status'] == 'done' and entry['sha256'] == digest and
+            all(fmt in entry['outputs'] and os.path.exists(os.path.join(output, entry['outputs'][fmt]))
+                for fmt in formats))
+
+
+def seat_file(source, target_dir, formats, rooms_file=None, interleave=False):
+    """Worker: seat one roll list and write its outputs; returns (students, blocks, outputs, diagnostics)"""
+    from allocation import InterleavedAllocator
+    from rooms import RoomInventory
+    from seating_processor import SeatingProcessor
+
+    rooms = RoomInventory.load(rooms_file) if rooms_file else None
+    allocator = InterleavedAllocator(rooms=rooms) if interleave else None
+    # Each worker compiles the configured branch registry once and reuses it for every file
+    processor = SeatingProcessor(source, allocator=allocator, rooms=rooms)
+    result = processor.process()
+    outputs = write_outputs(result, target_dir, formats)
+    return result.total_students, len(result.blocks), outputs, result.diagnostics.to_dict()
+
+
+def write_outputs(result, target_dir, formats):
+    """Write seating.<ext> per format under ``target_dir``; returns {format: path}"""
+    os.makedirs(target_dir, exist_ok=True)
+    outputs = {}
+    for fmt in formats:
+        backend = get_backend(fmt)
+        path = os.path.join(target_dir, 'seating' + backend.extension)
+        # Written under a temporary name first: a file that exists is complete
+        partial = path + '.part'
+        with open(partial, 'wb') as f:
+            shutil.copyfileobj(backend(result, result.diagnostics), f)
+        os.replace(partial, path)
+        outputs[fmt] = path
+    return outputs
+
+
+def run_one(source, digest, target_dir, formats, rooms_file, interleave):
+    """Process-pool task: a manifest entry for ``source``, 'failed' with the error if it raised"""
+    start = time.perf_counter()
+    entry = {'source': source, 'sha256': digest, 'outputs': {}}
+    try:
+        students, blocks, outputs, diagnostics = seat_file(source, target_dir, formats, rooms_file, interleave)
+        entry.update({'status': 'done', 'students': students, 'blocks': blocks, 'outputs': outputs,
+                      'stages': diagnostics['stages']})
+    except Exception as e:
+        entry.update({'status': 'failed', 'error': f"{type(e).__name__}: {e}"})
+    entry['seconds'] = round(time.perf_counter() - start, 3)
+    entry['finished'] = datetime.now().isoformat()
+    return entry
+
+
+def run_batch(inputs, output, formats=FORMATS, workers=None, rooms_file=None, interleave=False,
+              force=False, log=print):
+    """Seat every input not already done; returns the manifest entries by source path"""
+    os.makedirs(output, exist_ok=True)
+    entries = load_manifest(output)
+    started = datetime.now().isoformat()
+    names = output_names(inputs)
+
+    pending = []
+    for source in inputs:
+        digest = file_hash(source)
+        if not force and is_current(entries.get(source), digest, output, formats):
+            log(f"skip   {source} (already done)")
+            continue
+        pending.append((source, digest))
+    log(f"{len(inputs)} file(s), {len(inputs) - len(pending)} already done, {len(pending)} to process")
+    if not pending:
+        write_manifest(output, entries, started)
+        return entries
+
+    def record(entry):
+        record_entry(output, entries, entry, started, log)
+
+    if workers == 1 or len(pending) == 1:
+        for source, digest in pending:
+            record(run_one(source, digest, os.path.join(output, names[source]), formats,
+                             rooms_file, interleave))
+        return entries
+
+    pool = ProcessPoolExecutor(max_workers=workers)
+    try:
+        futures = [pool.submit(run_one, source, digest, os.path.join(output, names[source]), formats,
+                               rooms_file, interleave) for source, digest in pending]
+        for future in as_completed(futures):
+            record(future.result())
+    except KeyboardInterrupt:
+        # Finished files are already in the manifest; drop the queue and let a rerun resume
+        pool.shutdown(wait=False, cancel_futures=True)
+        raise
+    pool.shutdown()
+    return entries
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Seat many roll lists in parallel (headless).')
+    parser.add_argument('inputs', nargs='+', help='CSV/XLS/XLSX files, directories or glob patterns')
+    parser.add_argument('--output', default='batch_output', help='output folder (default: batch_output)')
+    parser.add_argument('--formats', default=','.join(FORMATS),
+                        help=f"comma-separated, from: {','.join(backend_names())}")
+    parser.add_argument('--workers', type=int, default=None, help='worker processes (default: all cores)')
+    parser.add_argument('--rooms', default=get_settings().ROOMS_FILE, help='room inventory JSON/CSV')
+    parser.add_argument('--interleave', action='store_true', help='keep same-branch students apart')
+    parser.add_argument('--force', action='store_true', help='reprocess files already done')
+    args = parser.parse_args(argv)
+
+    formats = [f for f in args.formats.split(',') if f]
+    unknown = set(formats) - set(backend_names())
+    if unknown:
+        parser.error(f"unknown format(s): {', '.join(sorted(unknown))}")
+    inputs = find_inputs(args.inputs)
+    if not inputs:
+        parser.error('no CSV/XLS/XLSX files matched')
+
+    try:
+        entries = run_batch(inputs, args.output, formats, args.workers, args.rooms, args.interleave, args.force)
+    except KeyboardInterrupt:
+        print('Interrupted; rerun the same command to resume', file=sys.stderr)
+        return 130
+    failed = [e for e in entries.values() if e['status'] == 'failed']
+    print(f"Manifest: {os.path.join(args.output, MANIFEST)}")
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,71 @@
+"""
+Benchmark: cold import time of the project's entry modules
+
+Each module is imported in a fresh interpreter with ``-X importtime``,
+``--repeat`` times; the median total and the heavy dependencies it pulled
+in are reported. The export libraries themselves are listed too, as the
+cost export_manager now defers to the first PDF/Excel render.
+
+Run from the project root:
+    python benchmarks/bench_import.py [--repeat 5]
+        [--modules export_manager,seating_processor,batch,app]
+"""
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MODULES = ['instrumentation', 'export_manager', 'export_cache', 'seating_processor', 'batch', 'app',
+           'reportlab.platypus', 'openpyxl', 'pandas']
+HEAVY = ['reportlab', 'openpyxl', 'pandas', 'numpy', 'pyarrow', 'flask', 'streamlit']
+
+IMPORTTIME = re.compile(r'import time:\s+\d+ \|\s+(\d+) \| (\S+)')
+
+
+def top_level_imports(code):
+    """(cumulative microseconds per top-level import, stdout) for ``python -c code``"""
+    # Bytecode is written on the warm-up run so every timed run loads .pyc files
+    env = dict(os.environ)
+    env.pop('PYTHONDONTWRITEBYTECODE', None)
+    proc = subprocess.run([sys.executable, '-X', 'importtime', '-c', code], cwd=ROOT, env=env,
+                          capture_output=True, text=True, check=True)
+    # Nested imports are indented, so only top-level ones match
+    times = {m.group(2): int(m.group(1)) for m in map(IMPORTTIME.match, proc.stderr.splitlines()) if m}
+    return times, proc.stdout.strip()
+
+
+def import_once(module, startup):
+    """(total microseconds, heavy modules loaded) for one cold import of ``module``"""
+    times, heavy = top_level_imports(f"import sys; import {module}; "
+                                     f"print(','.join(m for m in {HEAVY!r} if m in sys.modules))")
+    total = sum(t for name, t in times.items() if name not in startup)
+    return total, heavy.split(',') if heavy else []
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--modules', default=','.join(MODULES))
+    args = parser.parse_args()
+
+    # Whatever the interpreter imports on its own (site, encodings, ...) is not counted
+    startup = set(top_level_imports('import sys')[0])
+    print(f"{'module':<20} {'median ms':>10} {'min ms':>8}  heavy dependencies loaded")
+    for module in [m for m in args.modules.split(',') if m]:
+        try:
+            import_once(module, startup)
+        except subprocess.CalledProcessError as e:
+            print(f"{module:<20} {'failed':>10}  {e.stderr.strip().splitlines()[-1]}")
+            continue
+        runs = [import_once(module, startup) for _ in range(args.repeat)]
+        times = [t / 1000 for t, _ in runs]
+        print(f"{module:<20} {statistics.median(times):>10.1f} {min(times):>8.1f}  "
+              f"{', '.join(runs[-1][1]) or '-'}")
+
+
+if __name__ == '__main__':
+    main()
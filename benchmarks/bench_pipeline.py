@@ -0,0 +1,186 @@
+"""
+Benchmark: each pipeline stage on synthetic roll lists of growing size
+
+Stages: load (read + branch extraction + sort), create_blocks, to_json,
+pdf, excel and excel_streaming. Each stage is timed once, then (unless
+--no-memory) run again under tracemalloc for its peak allocation. Results
+are printed and written as JSON so runs can be compared with --compare.
+
+Run from the project root:
+    python benchmarks/bench_pipeline.py [--sizes 1000,10000,100000,1000000]
+        [--stages load,create_blocks,to_json,pdf,excel,excel_streaming]
+        [--max-export 20000] [--output results.json] [--compare old.json]
+        [--no-memory]
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import BRANCH_CODES
+from export_manager import ExportManager
+from seating_processor import SeatingProcessor
+from seating_result import SeatingResult
+from synthetic import write_roll_list
+
+STAGES = ['load', 'create_blocks', 'to_json', 'pdf', 'excel', 'excel_streaming']
+# Rendering every page of a 1M-student report takes far too long for a routine run
+EXPORT_STAGES = {'pdf', 'excel', 'excel_streaming'}
+DEFAULT_SIZES = [1000, 10000, 100000, 1000000]
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results')
+
+
+def stage_load(ctx):
+    processor = SeatingProcessor(ctx['csv'], BRANCH_CODES)
+    processor._load()
+    ctx['processor'] = processor
+
+
+def stage_create_blocks(ctx):
+    processor = ctx['processor']
+    processor.create_blocks()
+    ctx['result'] = SeatingResult(processor.block_builder, processor.blocks.exam_type)
+
+
+def stage_to_json(ctx):
+    ctx['result'].to_json()
+
+
+def stage_pdf(ctx):
+    ExportManager.generate_pdf(ctx['result'])
+
+
+def stage_excel(ctx):
+    ExportManager.generate_excel(ctx['result'])
+
+
+def stage_excel_streaming(ctx):
+    ExportManager.generate_excel_streaming(ctx['result']).close()
+
+
+RUNNERS = {
+    'load': stage_load,
+    'create_blocks': stage_create_blocks,
+    'to_json': stage_to_json,
+    'pdf': stage_pdf,
+    'excel': stage_excel,
+    'excel_streaming': stage_excel_streaming,
+}
+
+
+def measure(fn, ctx, memory):
+    """(seconds, peak MB or None) for ``fn(ctx)``; memory is measured on a second run"""
+    start = time.perf_counter()
+    fn(ctx)
+    seconds = time.perf_counter() - start
+    peak = None
+    if memory:
+        tracemalloc.start()
+        try:
+            fn(ctx)
+            peak = tracemalloc.get_traced_memory()[1] / (1024 * 1024)
+        finally:
+            tracemalloc.stop()
+    return seconds, peak
+
+
+def bench_size(n, stages, max_export, memory, workdir):
+    csv_path = write_roll_list(os.path.join(workdir, f'roll_{n}.csv'), n)
+    ctx = {'csv': csv_path}
+    records = []
+    for stage in STAGES:
+        wanted = stage in stages
+        if stage in EXPORT_STAGES and (not wanted or n > max_export):
+            if wanted:
+                records.append({'students': n, 'stage': stage, 'skipped': True})
+            continue
+        if not wanted:
+            # Loading and seating feed every later stage, so they run untimed
+            if stage in ('load', 'create_blocks'):
+                RUNNERS[stage](ctx)
+            continue
+        seconds, peak = measure(RUNNERS[stage], ctx, memory)
+        records.append({
+            'students': n,
+            'stage': stage,
+            'seconds': round(seconds, 4),
+            'studentsPerSecond': round(n / seconds) if seconds else None,
+            'peakMB': round(peak, 1) if peak is not None else None,
+        })
+    return records
+
+
+def print_records(records, baseline=None):
+    print(f"{'students':>9} {'stage':<16} {'seconds':>9} {'students/s':>12} {'peak MB':>8} {'vs base':>8}")
+    for r in records:
+        if r.get('skipped'):
+            print(f"{r['students']:>9} {r['stage']:<16} {'skipped':>9}")
+            continue
+        ratio = ''
+        old = (baseline or {}).get((r['students'], r['stage']))
+        if old and old.get('seconds'):
+            ratio = f"{r['seconds'] / old['seconds']:.2f}x"
+        peak = '' if r['peakMB'] is None else f"{r['peakMB']:.1f}"
+        print(f"{r['students']:>9} {r['stage']:<16} {r['seconds']:>9.3f} {r['studentsPerSecond']:>12,} "
+              f"{peak:>8} {ratio:>8}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', default=','.join(map(str, DEFAULT_SIZES)))
+    parser.add_argument('--stages', default=','.join(STAGES))
+    parser.add_argument('--max-export', type=int, default=20000,
+                        help='skip PDF/Excel stages above this many students')
+    parser.add_argument('--output', help='JSON results file (default: benchmarks/results/pipeline_<time>.json)')
+    parser.add_argument('--compare', help='earlier results JSON to compare timings against')
+    parser.add_argument('--no-memory', action='store_true', help='skip the tracemalloc run')
+    args = parser.parse_args()
+
+    sizes = [int(s) for s in args.sizes.split(',') if s]
+    stages = [s for s in args.stages.split(',') if s]
+    unknown = set(stages) - set(STAGES)
+    if unknown:
+        parser.error(f"unknown stage(s): {', '.join(sorted(unknown))}")
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            baseline = {(r['students'], r['stage']): r for r in json.load(f)['results']}
+
+    records = []
+    with tempfile.TemporaryDirectory(prefix='seating_bench_') as workdir:
+        for n in sizes:
+            records.extend(bench_size(n, stages, args.max_export, not args.no_memory, workdir))
+    print_records(records, baseline)
+
+    output = args.output or os.path.join(RESULTS_DIR, f"pipeline_{datetime.now():%Y%m%d_%H%M%S}.json")
+    if os.path.dirname(output) and not os.path.exists(os.path.dirname(output)):
+        os.makedirs(os.path.dirname(output))
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump({
+            'meta': {
+                'timestamp': datetime.now().isoformat(),
+                'python': platform.python_version(),
+                'platform': platform.platform(),
+                'pandas': pd.__version__,
+                'numpy': np.__version__,
+                'cpus': os.cpu_count(),
+                'memoryMeasured': not args.no_memory,
+            },
+            'results': records,
+        }, f, indent=2)
+    print(f"Saved {output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,126 @@
+"""
+Deterministic synthetic roll lists for benchmarks
+
+PRNs follow the two formats seen in real uploads:
+    16-digit   2506321111242018   year(2) 0 center(4) level(1) branch(5) roll(3)
+    T-prefixed T2163211612501     T year(2) center(4) branch(last 4) roll(3)
+plus an optional share of messy values (padding, separators, lower-case 't')
+and unrecognized ones (unknown branch codes, stray text, too-short numbers).
+Roll numbers count up per branch and admission year and stay three digits:
+past 999 students the next ones move to another level digit, then to the
+next center code, so PRNs are unique and always keep the real layout
+(``generate_prns`` checks that each one decodes cleanly). The same
+arguments always produce the same list.
+"""
+import os
+import random
+import sys
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import BRANCH_CODES, CENTER_CODE, PRN_BRANCH_CODE_LENGTH, PRN_BRANCH_CODE_START, PRN_LENGTH
+from prn_schema import PRNDecoder
+
+FIRST_NAMES = ['AARTI', 'ABHISHEK', 'KOMAL', 'MAYURI', 'OMKAR', 'PRATIK', 'SAYALI', 'SHRUTI', 'VISHAL', 'YASH']
+LAST_NAMES = ['CHAVAN', 'DEVKAR', 'GHULE', 'JADHAV', 'KADAM', 'KULKARNI', 'MALI', 'PATIL', 'POGUL', 'SHINDE']
+ADMISSION_YEARS = [22, 23, 24, 25]
+# Level digits used in 16-digit PRNs before moving on to the next center
+LEVELS = 3
+MAX_ROLL = 999
+
+
+def sixteen_digit_prn(year, branch, roll, center=CENTER_CODE, level=1):
+    return f"{year % 100:02d}0{center}{level}{branch}{roll:03d}"
+
+
+def t_format_prn(year, branch, roll, center=CENTER_CODE):
+    return f"T{year % 100:02d}{center}{branch[1:]}{roll:03d}"
+
+
+def _messy(prn, rng):
+    """The same PRN the way it sometimes arrives in a spreadsheet"""
+    kind = rng.randrange(4)
+    if kind == 0:
+        return f"  {prn} "
+    if kind == 1:
+        return prn.lower()
+    if kind == 2:
+        return f"{prn[:6]}-{prn[6:]}"
+    return f"{prn[:4]} {prn[4:]}"
+
+
+def _unrecognized(rng):
+    kind = rng.randrange(3)
+    if kind == 0:
+        return sixteen_digit_prn(25, f"{rng.randrange(90000, 99999)}", rng.randrange(1, 1000))
+    if kind == 1:
+        return f"X{rng.randrange(10 ** 7)}"
+    return str(rng.randrange(100, 9999))
+
+
+def generate_prns(n, branch_mix=None, t_share=0.3, messy_share=0.05, unknown_share=0.05, seed=42):
+    """``n`` PRNs; ``branch_mix`` maps branch code -> weight (default: all codes equally)"""
+    rng = random.Random(seed)
+    mix = branch_mix or {code: 1 for code in BRANCH_CODES}
+    codes = list(mix)
+    weights = [mix[code] for code in codes]
+    counts = {}
+    prns = []
+    valid = []
+    for branch in rng.choices(codes, weights, k=n):
+        kind = rng.random()
+        if kind < unknown_share:
+            prns.append(_unrecognized(rng))
+            continue
+        year = rng.choice(ADMISSION_YEARS)
+        t_prefixed = kind < unknown_share + t_share
+        key = (t_prefixed, branch, year)
+        count = counts[key] = counts.get(key, 0) + 1
+        # Roll 1..999, then the next level (16-digit only) and center
+        batch, roll = divmod(count - 1, MAX_ROLL)
+        if t_prefixed:
+            prn = t_format_prn(year, branch, roll + 1, center=_center(batch))
+        else:
+            level, batch = batch % LEVELS + 1, batch // LEVELS
+            prn = sixteen_digit_prn(year, branch, roll + 1, center=_center(batch), level=level)
+        valid.append((prn, branch[1:] if t_prefixed else branch))
+        prns.append(_messy(prn, rng) if rng.random() < messy_share else prn)
+    _check_layout(valid)
+    return prns
+
+
+def _center(batch):
+    return f"{(int(CENTER_CODE) + batch) % 10000:04d}"
+
+
+def _check_layout(valid):
+    """Fail if a generated PRN does not decode to its own branch (the benchmark would time the wrong path)"""
+    if not valid:
+        return
+    expected = pd.Series([branch for _, branch in valid])
+    decoded = PRNDecoder(PRN_LENGTH, PRN_BRANCH_CODE_START, PRN_BRANCH_CODE_LENGTH).decode(
+        pd.Series([prn for prn, _ in valid]))
+    bad = decoded['Problem'].notna().to_numpy() | (decoded['BranchDigits'] != expected).to_numpy()
+    if bad.any():
+        raise ValueError(f"{int(bad.sum())} generated PRNs do not decode cleanly, "
+                         f"e.g. {valid[int(bad.nonzero()[0][0])][0]}")
+
+
+def generate_roll_list(n, seed=42, **kwargs):
+    """DataFrame shaped like an uploaded roll list (Sr No., PRN, Name, Year, College Code)"""
+    rng = random.Random(seed + 1)
+    return pd.DataFrame({
+        'Sr No.': range(1, n + 1),
+        'PRN': generate_prns(n, seed=seed, **kwargs),
+        'Name': [f"{rng.choice(LAST_NAMES)} {rng.choice(FIRST_NAMES)}" for _ in range(n)],
+        'Year ': [rng.choice([1, 2, 3, 4]) for _ in range(n)],
+        'College Code': f"{CENTER_CODE}-VVPIET",
+    })
+
+
+def write_roll_list(path, n, seed=42, **kwargs):
+    """Write a synthetic roll list CSV and return its path"""
+    generate_roll_list(n, seed=seed, **kwargs).to_csv(path, index=False)
+    return path
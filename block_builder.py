@@ -0,0 +1,199 @@
+import numpy as np
+import pandas as pd
+from collections.abc import Sequence
+
+
+def block_letters(n):
+    """Convert 1-based integer n to letters: 1->A, 26->Z, 27->AA"""
+    letters = ''
+    while n > 0:
+        n, rem = divmod(n - 1, 26)
+        letters = chr(65 + rem) + letters
+    return letters
+
+
+class BlockStudents(Sequence):
+    """Lazy view of the students seated in one block.
+
+    Records are built from the builder's arrays only when indexed or
+    iterated, so a block costs two integers until someone reads it.
+    """
+
+    __slots__ = ('_builder', '_start', '_stop')
+
+    def __init__(self, builder, start, stop):
+        self._builder = builder
+        self._start = start
+        self._stop = stop
+
+    def __len__(self):
+        return self._stop - self._start
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._builder.student(self._start + i) for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError('block student index out of range')
+        return self._builder.student(self._start + index)
+
+    def __iter__(self):
+        for pos in range(self._start, self._stop):
+            yield self._builder.student(pos)
+
+    def __repr__(self):
+        return f"BlockStudents({self._start}:{self._stop})"
+
+    def to_list(self):
+        """Materialize every student record in this block"""
+        return list(self)
+
+
+class BlockBuilder:
+    """Array-backed block builder for a sorted student DataFrame.
+
+    Columns are resolved once and PRN/name/branch/year are pulled into NumPy
+    arrays; block metadata is computed by slicing those arrays.
+
+    A student's year is the 'PRNClass' decoded from their PRN when there is
+    one, else the roll list's year column; a block's center code is its
+    first student's decoded 'PRNCenter', else ``center_code``.
+    """
+
+    DEFAULT_YEAR = 2
+
+    def __init__(self, df, students_per_block=30, block_sizes=None, rooms=None, date='', slot='',
+                 desk_numbers=None, center_code=''):
+        self.students_per_block = students_per_block
+        self.total = len(df)
+        self.date = date
+        self.slot = slot
+        self.center_code = center_code
+
+        # Determine year and name columns (handle different CSV column names)
+        year_col = next((c for c in df.columns if 'year' in c.lower()), None)
+        name_col = next((c for c in df.columns if c.strip().lower() in ('name', 'student name')), 'Name')
+
+        self.prn = df['PRN'].to_numpy(dtype=object)
+        self.branch = df['Branch'].to_numpy(dtype=object)
+        self.branch_code = (df['BranchCode'].to_numpy(dtype=object) if 'BranchCode' in df.columns
+                            else np.full(self.total, '', dtype=object))
+        self.name = (df[name_col].to_numpy(dtype=object) if name_col in df.columns
+                     else np.full(self.total, '', dtype=object))
+        # Paper code per student when seating a multi-paper exam session
+        self.paper = df['Paper'].to_numpy(dtype=object) if 'Paper' in df.columns else None
+
+        # Years as ints; -1 marks a missing/unparseable value
+        self.year = np.full(self.total, -1, dtype=np.int64)
+        for col in (year_col, 'PRNClass' if 'PRNClass' in df.columns else None):
+            if col is not None:
+                years = pd.to_numeric(df[col], errors='coerce').to_numpy(dtype=float)
+                valid = np.isfinite(years)
+                self.year = np.where(valid, np.trunc(np.where(valid, years, 0)), self.year).astype(np.int64)
+
+        # Exam center per student when decoded from the PRN ('' when unknown)
+        self.center = (df['PRNCenter'].fillna('').to_numpy(dtype=object) if 'PRNCenter' in df.columns
+                       else None)
+
+        # Block boundaries: block b covers [starts[b], stops[b]); fixed-size
+        # blocks unless an allocator supplied explicit (e.g. room) sizes.
+        # Explicit sizes may include empty blocks (e.g. after re-seating).
+        if block_sizes is None:
+            self.starts = np.arange(0, self.total, students_per_block, dtype=np.int64)
+            self.stops = np.minimum(self.starts + students_per_block, self.total)
+        else:
+            sizes = np.asarray(block_sizes, dtype=np.int64)
+            self.stops = np.cumsum(sizes)
+            self.starts = self.stops - sizes
+        self.block_of = np.repeat(np.arange(len(self.starts)), self.stops - self.starts)
+
+        # Desk number per student: consecutive within each block unless given
+        # (re-seating keeps desks, so blocks can have gaps)
+        if desk_numbers is None:
+            self.desk_no = np.arange(self.total, dtype=np.int64) - self.starts[self.block_of] + 1
+        else:
+            self.desk_no = np.asarray(desk_numbers, dtype=np.int64)
+
+        # Room per block and each seat's 1-based (row, col) in its room's grid
+        self.rooms = rooms
+        if rooms is not None:
+            self.seat_row = np.empty(self.total, dtype=np.int64)
+            self.seat_col = np.empty(self.total, dtype=np.int64)
+            for room, start, stop in zip(rooms, self.starts.tolist(), self.stops.tolist()):
+                seat = self.desk_no[start:stop] - 1
+                self.seat_row[start:stop] = room.seat_rows[seat]
+                self.seat_col[start:stop] = room.seat_cols[seat]
+
+        # Per-student fallback year is the year of the block's first student
+        empty = self.starts == self.stops
+        block_year = (self.year[np.minimum(self.starts, self.total - 1)] if self.total
+                      else np.full(len(self.starts), -1, dtype=np.int64))
+        self.block_year = np.where((block_year >= 0) & ~empty, block_year, self.DEFAULT_YEAR)
+        self.student_year = np.where(self.year >= 0, self.year, self.block_year[self.block_of] if self.total else self.year)
+
+        self.block_branches = self._branches_per_block(self.block_of)
+
+    def _branches_per_block(self, block_of):
+        """Sorted unique branch names per block, via one np.unique over (block, branch)"""
+        if not self.total:
+            return []
+        branch_ids, branch_names = pd.factorize(pd.Series(self.branch), sort=True)
+        present = branch_ids >= 0
+        pairs = np.unique(block_of[present] * (len(branch_names) + 1) + branch_ids[present])
+        blocks, ids = np.divmod(pairs, len(branch_names) + 1)
+        result = [[] for _ in range(len(self.starts))]
+        for b, i in zip(blocks.tolist(), ids.tolist()):
+            result[b].append(branch_names[i])
+        return result
+
+    def __len__(self):
+        return len(self.starts)
+
+    def student(self, pos):
+        """Build the student record at sorted position ``pos``"""
+        record = {
+            'deskNo': int(self.desk_no[pos]),
+            'prn': str(self.prn[pos]),
+            'name': self.name[pos],
+            'branch': self.branch[pos],
+            'year': int(self.student_year[pos])
+        }
+        if self.paper is not None:
+            record['paper'] = self.paper[pos]
+        if self.rooms is not None:
+            record['row'] = int(self.seat_row[pos])
+            record['col'] = int(self.seat_col[pos])
+        return record
+
+    def block(self, block_num, exam_type=''):
+        """Block metadata for 0-based ``block_num`` with a lazy student list"""
+        start = int(self.starts[block_num])
+        stop = int(self.stops[block_num])
+        unique_branches = self.block_branches[block_num]
+        branch_label = unique_branches[0] if len(unique_branches) == 1 else ', '.join(unique_branches)
+        block = {
+            'blockNumber': block_num + 1,
+            'blockName': f'Block-{block_letters(block_num + 1)}',
+            'totalStudents': stop - start,
+            'prnFrom': self.prn[start] if stop > start else '',
+            'prnTo': self.prn[stop - 1] if stop > start else '',
+            'year': int(self.block_year[block_num]),
+            'branch': branch_label,
+            'branches': unique_branches,
+            'branchCode': self.branch_code[start] if stop > start else '',
+            'centerCode': (self.center[start] if self.center is not None and stop > start else '') or
+                          self.center_code,
+            'examType': exam_type,
+            'date': self.date,
+            'students': BlockStudents(self, start, stop)
+        }
+        if self.slot:
+            block['slot'] = self.slot
+        if self.rooms is not None:
+            block['layout'] = self.rooms[block_num].layout()
+        return block
+
+    def build(self, exam_type=''):
+        """Return metadata dicts for every block"""
+        return [self.block(b, exam_type) for b in range(len(self))]
@@ -0,0 +1,181 @@
+import re
+from functools import lru_cache
+from types import MappingProxyType
+
+import numpy as np
+import pandas as pd
+
+# Rows matched per batch in the sliding-window lookup (bounds its temporary arrays)
+WINDOW_BATCH = 100000
+
+# Codes up to this many digits are looked up in a direct table (RADIX**n entries)
+LOOKUP_DIGITS = 6
+
+# Window values are base 11: digit 10 marks padding past the end of a PRN,
+# so a window running off the end can never equal a code
+RADIX = 11
+PAD = 10
+
+
+class BranchRegistry:
+    """Branch codes compiled once into an immutable PRN -> branch lookup.
+
+    ``extract`` applies, to a whole Series of PRNs:
+
+    1. a positional slice: when a PRN has exactly ``prn_length`` digits and
+       the ``length`` digits at ``position`` are a known code, that is the
+       branch (e.g. 25 0 6321 1 11242 018 -> 11242);
+    2. otherwise a multi-code substring search: the longest known code found
+       anywhere in the digits wins, ties keeping the configured order. Each
+       code length is matched with one sliding-window table lookup over the
+       remaining rows, the vectorized equivalent of a substring automaton;
+    3. otherwise the last 5 digits (or whatever digits exist), so the row is
+       kept; PRNs without digits map to None.
+
+    Registries are read-only; ``BranchRegistry.shared`` returns one instance
+    per distinct branch map and layout, so every processor in a process (and
+    every forked worker) reuses the same compiled tables.
+    """
+
+    __slots__ = ('branch_codes', 'codes', 'position', 'length', 'prn_length', '_priority', '_tables')
+
+    def __init__(self, branch_codes, position=None, length=5, prn_length=16):
+        names = MappingProxyType(dict(branch_codes))
+        # Longest codes first; sorted() is stable so equal lengths keep map order
+        codes = tuple(sorted(names.keys(), key=len, reverse=True))
+        tables = {}
+        for rank, code in enumerate(codes):
+            if code.isascii() and code.isdigit():
+                values, ranks = tables.setdefault(len(code), ([], []))
+                values.append(int(code, RADIX))
+                ranks.append(rank)
+        compiled = {}
+        for size, (values, ranks) in tables.items():
+            order = np.argsort(values, kind='stable')
+            values = np.asarray(values, dtype=np.int64)[order]
+            ranks = np.asarray(ranks, dtype=np.int64)[order]
+            # Short codes get a direct value -> rank table; longer ones a binary search
+            table = None
+            if size <= LOOKUP_DIGITS:
+                table = np.full(RADIX ** size, len(codes), dtype=np.int32)
+                table[values] = ranks
+                table.flags.writeable = False
+            values.flags.writeable = False
+            ranks.flags.writeable = False
+            compiled[size] = (values, ranks, table)
+        set_ = object.__setattr__
+        set_(self, 'branch_codes', names)
+        set_(self, 'codes', codes)
+        set_(self, 'position', position)
+        set_(self, 'length', length)
+        set_(self, 'prn_length', prn_length)
+        set_(self, '_priority', MappingProxyType({code: rank for rank, code in enumerate(codes)}))
+        set_(self, '_tables', MappingProxyType(compiled))
+
+    def __setattr__(self, name, value):
+        raise AttributeError('BranchRegistry is immutable')
+
+    def __reduce__(self):
+        # Rebuilt (and cached) on the other side of a process pool
+        return (BranchRegistry.shared, (tuple(self.branch_codes.items()), self.position, self.length,
+                                        self.prn_length))
+
+    @staticmethod
+    @lru_cache(maxsize=32)
+    def _shared(items, position, length, prn_length):
+        return BranchRegistry(dict(items), position, length, prn_length)
+
+    @staticmethod
+    def shared(branch_codes, position=None, length=5, prn_length=16):
+        """The process-wide registry for this branch map (a dict or its items)"""
+        if isinstance(branch_codes, BranchRegistry):
+            return branch_codes
+        items = tuple(branch_codes.items()) if hasattr(branch_codes, 'items') else tuple(branch_codes)
+        return BranchRegistry._shared(items, position, length, prn_length)
+
+    def code_of(self, prn):
+        """Branch code for a single PRN (same rules as ``extract``)"""
+        if prn is None:
+            return None
+        digits = re.sub(r"\D", "", str(prn))
+        if not digits:
+            return None
+        if self.position is not None and len(digits) == self.prn_length:
+            code = digits[self.position:self.position + self.length]
+            if code in self._priority:
+                return code
+        for code in self.codes:
+            if code in digits:
+                return code
+        return digits[-5:]
+
+    def extract(self, prns):
+        """Return a Series of branch codes aligned with ``prns``"""
+        digits = prns.astype(str).str.replace(r'\D', '', regex=True).fillna('')
+        codes = pd.Series(None, index=prns.index, dtype=object)
+        lengths = digits.str.len().to_numpy(dtype=np.int64)
+
+        ranks = np.full(len(digits), -1, dtype=np.int64)
+        for start in range(0, len(digits), WINDOW_BATCH):
+            stop = start + WINDOW_BATCH
+            ranks[start:stop] = self._ranks(digits.iloc[start:stop], lengths[start:stop])
+        found = ranks >= 0
+        codes.iloc[found.nonzero()[0]] = np.asarray(self.codes, dtype=object)[ranks[found]]
+
+        # Fallback: last 5 digits (or all of them when shorter) keeps the row
+        pending = ~found & (lengths > 0)
+        if pending.any():
+            codes.iloc[pending.nonzero()[0]] = digits[pending].str[-5:].to_numpy(dtype=object)
+        return codes
+
+    def _ranks(self, strings, lengths):
+        """Rank (index into self.codes) of each digit string's code, -1 for none"""
+        none = len(self.codes)
+        width = int(lengths.max(initial=0))
+        if not self._tables or width == 0:
+            return np.full(len(strings), -1, dtype=np.int64)
+        try:
+            raw = strings.to_numpy(dtype=f'S{width}')
+        except UnicodeEncodeError:
+            # Non-ASCII digits (\d matches every script): match row by row
+            return np.array([self._priority.get(self.code_of(s), -1) for s in strings], dtype=np.int64)
+        # One row of digit values per string, PAD past its end
+        digits = raw.view(np.uint8).reshape(len(strings), width).astype(np.int32)
+        digits -= ord('0')
+        digits[digits < 0] = PAD
+        rank = np.full(len(strings), none, dtype=np.int64)
+
+        # Full-length PRNs: the code at its fixed position, when that is a known code
+        size = self.length
+        if self.position is not None and size in self._tables and self.position + size <= width:
+            rows = (lengths == self.prn_length).nonzero()[0]
+            rank[rows] = self._lookup(size, digits[rows, self.position:self.position + size])[:, 0]
+
+        # Everything else: best code in any window, one pass per code length
+        rows = (rank == none).nonzero()[0]
+        if rows.size:
+            digits = digits[rows]
+            found = np.full(rows.size, none, dtype=np.int64)
+            for size in self._tables:
+                if size > width:
+                    continue
+                np.minimum(found, self._lookup(size, digits).min(axis=1), out=found)
+            rank[rows] = found
+        return np.where(rank < none, rank, -1)
+
+    def _lookup(self, size, digits):
+        """Code rank (or len(codes)) of every ``size``-digit window of each digit row"""
+        windows = digits.shape[1] - size + 1
+        value = digits[:, :windows].astype(np.int32 if size <= 8 else np.int64)
+        for offset in range(1, size):
+            value *= RADIX
+            value += digits[:, offset:offset + windows]
+        values, ranks, table = self._tables[size]
+        if table is not None:
+            return table[value]
+        pos = np.searchsorted(values, value).clip(max=len(values) - 1)
+        return np.where(values[pos] == value, ranks[pos], len(self.codes))
+
+    def names(self, codes):
+        """Map branch codes to names; unrecognized codes become 'Other'"""
+        return codes.map(self.branch_codes).fillna('Other').astype(object)
@@ -0,0 +1,207 @@
+"""
+Multi-center mode: seat one merged roll list as a separate arrangement per exam center
+
+The list is split by center: the center code decoded from each PRN, else
+the leading code of a 'College Code' column (6321-VVPIET -> 6321), else
+CENTER_CODE. Every center is seated independently in its own worker process
+(at most --workers at a time), with its own block lettering (Block-A,
+Block-B, ...), and written to <output>/<center>/ as seating.json,
+seating.pdf and seating.xlsx. <output>/manifest.json lists every center's
+status, counts, outputs and timings and is rewritten as each center
+finishes. A center still running --timeout seconds after its worker started
+it is recorded as timed out and its process terminated, and the next center
+takes its place, so one slow center never holds back the others.
+
+    python centers.py merged.csv [--output center_output]
+        [--formats json,pdf,excel] [--workers 4] [--timeout 600]
+        [--rooms halls.json] [--interleave]
+"""
+import argparse
+import multiprocessing
+import os
+import queue
+import re
+import sys
+import time
+from datetime import datetime
+
+from batch import FORMATS, MANIFEST, file_hash, record_entry, write_manifest, write_outputs
+from export_manager import backend_names
+from ingest import read_roll_list
+from settings import get_settings
+
+CENTER_COLUMN = 'college code'
+
+# Seconds a center may run in its worker before it is given up on
+TIMEOUT = 600
+
+# Seconds between checks for finished or overdue centers
+POLL_INTERVAL = 0.5
+
+
+def center_codes(frame, default=None):
+    """Center code per row: from the PRN, else the College Code column, else ``default``"""
+    settings = get_settings()
+    centers = settings.prn_decoder.decode(frame['PRN'].astype(str).str.strip())['Center']
+    column = next((c for c in frame.columns if str(c).strip().lower() == CENTER_COLUMN), None)
+    if column is not None:
+        declared = frame[column].astype(str).str.split('-').str[0].str.strip()
+        declared = declared.where(frame[column].notna() & (declared != ''))
+        centers = centers.fillna(declared)
+    return centers.fillna(default or settings.CENTER_CODE).astype(object)
+
+
+def split_centers(frame, default=None):
+    """[(center, rows), ...] sorted by center; each part keeps the input's columns and order"""
+    centers = center_codes(frame, default)
+    return [(str(center), part.reset_index(drop=True))
+            for center, part in frame.groupby(centers.to_numpy(), sort=True)]
+
+
+def folder_name(center):
+    """A center code made safe to use as a directory name"""
+    return re.sub(r'[^\w.-]', '_', center) or 'center'
+
+
+def run_center(center, frame, target_dir, formats, rooms_file=None, interleave=False):
+    """Seat one center's students; a manifest entry, 'failed' if it raised"""
+    start = time.perf_counter()
+    entry = {'center': center, 'rows': len(frame), 'outputs': {}}
+    try:
+        from allocation import InterleavedAllocator
+        from rooms import RoomInventory
+        from seating_processor import SeatingProcessor
+
+        rooms = RoomInventory.load(rooms_file) if rooms_file else None
+        allocator = InterleavedAllocator(rooms=rooms) if interleave else None
+        processor = SeatingProcessor(None, allocator=allocator, rooms=rooms, frame=frame, center_code=center)
+        result = processor.process()
+        outputs = write_outputs(result, target_dir, formats)
+        diagnostics = result.diagnostics.to_dict()
+        entry.update({'status': 'done', 'students': result.total_students, 'blocks': len(result.blocks),
+                      'outputs': outputs, 'malformedPrns': diagnostics['counts'].get('malformed_prns', 0),
+                      'stages': diagnostics['stages']})
+    except Exception as e:
+        entry.update({'status': 'failed', 'error': f"{type(e).__name__}: {e}"})
+    entry['seconds'] = round(time.perf_counter() - start, 3)
+    entry['finished'] = datetime.now().isoformat()
+    return entry
+
+
+def center_worker(messages, task):
+    """Worker process: report when the center starts, then its manifest entry"""
+    messages.put(('started', task[0], time.time()))
+    messages.put(('done', task[0], run_center(*task)))
+
+
+def _stopped_entry(center, rows, status, error, began):
+    return {'center': center, 'rows': len(rows), 'outputs': {}, 'status': status, 'error': error,
+            'seconds': round(time.time() - began, 3) if began else 0.0, 'finished': datetime.now().isoformat()}
+
+
+def run_centers(source, output, formats=FORMATS, workers=None, timeout=TIMEOUT, rooms_file=None,
+                interleave=False, log=print):
+    """Split ``source`` by center and seat every center; returns the manifest entries by center"""
+    os.makedirs(output, exist_ok=True)
+    started = datetime.now().isoformat()
+    digest = file_hash(source)
+    parts = split_centers(read_roll_list(source, cache_dir=get_settings().SPREADSHEET_CACHE_DIR))
+    log(f"{len(parts)} center(s): " + ', '.join(f"{center} ({len(rows)})" for center, rows in parts))
+
+    entries = {}
+    header = {'source': source, 'sha256': digest}
+
+    def record(entry):
+        record_entry(output, entries, entry, started, log, key='center', section='centers', header=header,
+                     width=9)
+
+    tasks = [(center, rows, os.path.join(output, folder_name(center)), formats, rooms_file, interleave)
+             for center, rows in parts]
+    if workers == 1 or len(tasks) < 2:
+        for task in tasks:
+            record(run_center(*task))
+        write_manifest(output, entries, started, section='centers', key='center', header=header)
+        return entries
+
+    # One process per center, so a hung one can be terminated and its slot reused
+    workers = workers or os.cpu_count() or 1
+    messages = multiprocessing.Queue()
+    waiting = list(tasks)
+    running = {}  # center -> [process, task, start time reported by the worker]
+    try:
+        while waiting or running:
+            while waiting and len(running) < workers:
+                task = waiting.pop(0)
+                process = multiprocessing.Process(target=center_worker, args=(messages, task), daemon=True)
+                process.start()
+                running[task[0]] = [process, task, None]
+
+            # A worker flushes its messages before it exits, so the ones read
+            # below include everything sent by the processes seen exited here
+            exited = [center for center, (process, _, _) in running.items() if not process.is_alive()]
+            try:
+                message = messages.get(timeout=POLL_INTERVAL)
+                while True:
+                    kind, center, value = message
+                    if kind == 'started':
+                        running[center][2] = value
+                    else:
+                        running.pop(center)[0].join()
+                        record(value)
+                    message = messages.get_nowait()
+            except queue.Empty:
+                pass
+
+            for center in exited:
+                if center in running:
+                    process, task, began = running.pop(center)
+                    record(_stopped_entry(center, task[1], 'failed',
+                                          f"worker exited with code {process.exitcode}", began))
+            now = time.time()
+            for center, (process, task, began) in list(running.items()):
+                # The clock starts when the worker reports it has begun, not at launch
+                if timeout and began is not None and now - began > timeout:
+                    process.terminate()
+                    process.join()
+                    del running[center]
+                    record(_stopped_entry(center, task[1], 'timed_out', f"still running after {timeout}s", began))
+    except KeyboardInterrupt:
+        # Finished centers are already in the manifest
+        for process, _, _ in running.values():
+            process.terminate()
+        raise
+    return entries
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Seat a merged roll list separately for each exam center.')
+    parser.add_argument('source', help='CSV/XLS/XLSX roll list covering several centers')
+    parser.add_argument('--output', default='center_output', help='output folder (default: center_output)')
+    parser.add_argument('--formats', default=','.join(FORMATS),
+                        help=f"comma-separated, from: {','.join(backend_names())}")
+    parser.add_argument('--workers', type=int, default=None, help='worker processes (default: all cores)')
+    parser.add_argument('--timeout', type=float, default=TIMEOUT,
+                        help=f'seconds before a running center is stopped (default: {TIMEOUT}; 0 = no limit)')
+    parser.add_argument('--rooms', default=get_settings().ROOMS_FILE, help='room inventory JSON/CSV')
+    parser.add_argument('--interleave', action='store_true', help='keep same-branch students apart')
+    args = parser.parse_args(argv)
+
+    formats = [f for f in args.formats.split(',') if f]
+    unknown = set(formats) - set(backend_names())
+    if unknown:
+        parser.error(f"unknown format(s): {', '.join(sorted(unknown))}")
+    if not os.path.isfile(args.source):
+        parser.error(f"no such file: {args.source}")
+
+    try:
+        entries = run_centers(args.source, args.output, formats, args.workers, args.timeout, args.rooms,
+                              args.interleave)
+    except KeyboardInterrupt:
+        print('Interrupted', file=sys.stderr)
+        return 130
+    print(f"Manifest: {os.path.join(args.output, MANIFEST)}")
+    return 0 if all(e['status'] == 'done' for e in entries.values()) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
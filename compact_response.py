@@ -0,0 +1,171 @@
+"""
+Compact seating payload: per-block columns, strings stored once, fast encoders
+
+    {"format": "compact", "version": 1, "totalStudents": 95, "totalBlocks": 4,
+     "blockRange": [1, 4], "timestamp": "...",
+     "strings": {"name": ["CHAVAN MAYURI", ...], "branch": ["CSE", ...]},
+     "blocks": [{"blockNumber": 1, "blockName": "Block-A", ..., "students": {
+         "deskNo": [1, 2, ...], "prn": ["2506321111242018", ...],
+         "name": [0, 1, ...], "branch": [0, 0, ...], "year": [1, 1, ...]}}, ...],
+     "diagnostics": {...}}
+
+Each block's students are parallel arrays; 'name' and 'branch' hold indexes
+into the page's ``strings`` tables. A block leaves out 'branch' and 'year'
+when every student in it has the block's own branch / year. ``blockRange``
+(1-based, inclusive) pages through large arrangements: the string tables
+cover only the blocks on the page, and diagnostics come with page one only.
+
+``encode`` writes JSON with orjson when it is installed (else the standard
+library) or MessagePack; ``compress`` applies brotli or gzip.
+"""
+import gzip
+import json
+
+import numpy as np
+import pandas as pd
+
+from seating_result import SeatingResult, blocks_of
+
+FORMAT_VERSION = 1
+
+# Bodies smaller than this are sent uncompressed
+MIN_COMPRESS_BYTES = 1024
+
+# Fast settings: the response is built per request, so speed beats the last few percent
+GZIP_LEVEL = 5
+BROTLI_QUALITY = 5
+
+MEDIA_TYPES = {'json': 'application/json', 'msgpack': 'application/msgpack'}
+
+
+def parse_block_range(text, total_blocks):
+    """(first, last) 1-based inclusive block numbers from '5', '5-20' or '5-' (None: every block)"""
+    if not text:
+        return 1, total_blocks
+    start, dash, stop = text.partition('-')
+    try:
+        first = int(start)
+        last = int(stop) if stop.strip() else (total_blocks if dash else first)
+    except ValueError:
+        raise ValueError(f"Invalid block range {text!r}; use e.g. 1-50") from None
+    if first < 1 or last < first:
+        raise ValueError(f"Invalid block range {text!r}; use e.g. 1-50")
+    return first, min(last, total_blocks)
+
+
+def _page_columns(data, page, first, last):
+    """Student columns for blocks first..last and each block's (start, stop) rows in them"""
+    if isinstance(data, SeatingResult):
+        b = data.builder
+        lo = int(b.starts[first - 1]) if page else 0
+        hi = int(b.stops[last - 1]) if page else 0
+        columns = {'deskNo': b.desk_no[lo:hi], 'prn': b.prn[lo:hi], 'name': b.name[lo:hi],
+                   'branch': b.branch[lo:hi], 'year': b.student_year[lo:hi]}
+        if b.paper is not None:
+            columns['paper'] = b.paper[lo:hi]
+        if b.rooms is not None:
+            columns['row'] = b.seat_row[lo:hi]
+            columns['col'] = b.seat_col[lo:hi]
+        bounds = zip((b.starts[first - 1:last] - lo).tolist(), (b.stops[first - 1:last] - lo).tolist())
+        return columns, list(bounds)
+
+    students = [s for block in page for s in block['students']]
+    frame = pd.DataFrame(students, columns=['deskNo', 'prn', 'name', 'branch', 'year'] + [
+        key for key in ('paper', 'row', 'col') if students and key in students[0]])
+    columns = {key: frame[key].to_numpy(dtype=object) for key in frame.columns}
+    stops = np.cumsum([len(block['students']) for block in page], dtype=np.int64)
+    return columns, list(zip((stops - np.diff(stops, prepend=0)).tolist(), stops.tolist()))
+
+
+def compact_payload(data, first=1, last=None):
+    """The compact dict for blocks ``first``..``last`` of a SeatingResult or its JSON dict"""
+    blocks = blocks_of(data)
+    total_blocks = len(blocks)
+    last = total_blocks if last is None else min(last, total_blocks)
+    page = list(blocks[first - 1:last]) if first <= last else []
+    columns, bounds = _page_columns(data, page, first, last)
+
+    # One lookup table per repeated string column; students hold indexes into it
+    names, name_table = pd.factorize(pd.Series(columns['name'], dtype=object).fillna(''))
+    branches, branch_table = pd.factorize(pd.Series(columns['branch'], dtype=object).fillna(''))
+    years = np.asarray(columns['year'], dtype=np.int64)
+    desks = np.asarray(columns['deskNo'], dtype=np.int64)
+    extra = {key: columns[key] for key in ('paper', 'row', 'col') if key in columns}
+
+    out_blocks = []
+    for block, (start, stop) in zip(page, bounds):
+        students = {'deskNo': desks[start:stop].tolist(),
+                    'prn': [str(prn) for prn in columns['prn'][start:stop]],
+                    'name': names[start:stop].tolist()}
+        codes = branches[start:stop]
+        if not (codes.size == 0 or ((codes == codes[0]).all() and branch_table[codes[0]] == block['branch'])):
+            students['branch'] = codes.tolist()
+        if not (years[start:stop] == block['year']).all():
+            students['year'] = years[start:stop].tolist()
+        for key, values in extra.items():
+            values = values[start:stop]
+            students[key] = values.tolist() if key == 'paper' else np.asarray(values, dtype=np.int64).tolist()
+        meta = {key: value for key, value in block.items() if key != 'students'}
+        meta['students'] = students
+        out_blocks.append(meta)
+
+    total = data.total_students if isinstance(data, SeatingResult) else data.get('totalStudents', 0)
+    payload = {
+        'format': 'compact',
+        'version': FORMAT_VERSION,
+        'totalStudents': total,
+        'totalBlocks': total_blocks,
+        'blockRange': [first, last] if page else [],
+        'timestamp': data.timestamp if isinstance(data, SeatingResult) else data.get('timestamp'),
+        'strings': {'name': name_table.tolist(), 'branch': branch_table.tolist()},
+        'blocks': out_blocks,
+    }
+    if first == 1:
+        payload['diagnostics'] = (data.diagnostics.to_dict() if isinstance(data, SeatingResult)
+                                  else data.get('diagnostics'))
+    return payload
+
+
+def msgpack_available():
+    try:
+        import msgpack  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def encode(payload, encoding='json'):
+    """``payload`` as bytes: 'json' (orjson when installed) or 'msgpack'"""
+    if encoding == 'msgpack':
+        import msgpack
+        return msgpack.packb(payload, use_bin_type=True, default=str)
+    try:
+        import orjson
+    except ImportError:
+        return json.dumps(payload, separators=(',', ':'), default=str).encode('utf-8')
+    return orjson.dumps(payload, default=str)
+
+
+def loads(text):
+    """Parse a JSON result (e.g. from the result cache), with orjson when installed"""
+    try:
+        import orjson
+    except ImportError:
+        return json.loads(text)
+    return orjson.loads(text)
+
+
+def compress(body, accepted=()):
+    """(body, Content-Encoding or None): brotli, else gzip, if the client accepts it"""
+    if len(body) < MIN_COMPRESS_BYTES:
+        return body, None
+    if 'br' in accepted:
+        try:
+            import brotli
+        except ImportError:
+            pass
+        else:
+            return brotli.compress(body, quality=BROTLI_QUALITY), 'br'
+    if 'gzip' in accepted:
+        return gzip.compress(body, compresslevel=GZIP_LEVEL), 'gzip'
+    return body, None
@@ -1,6 +1,10 @@
 """
 Configuration file for Seating Arrangement System
 Modify these settings to customize the application
+
+These are the defaults; a deployment can override any of them with a JSON/TOML
+file named by SEATING_CONFIG or SEATING_<NAME> environment variables, picked
+up at runtime without a restart (see settings.py).
 """
 
 # Institution Information
@@ -11,6 +15,19 @@ CENTER_CODE = "6321"
 STUDENTS_PER_BLOCK = 30  # Number of students in each examination block
 DESK_START_NUMBER = 1    # Starting desk number (1-based)
 
+# Exam halls (JSON or CSV with Room,Rows,Cols,Capacity,Blocked); None seats
+# students in plain blocks of STUDENTS_PER_BLOCK. See rooms.py for the format.
+ROOMS_FILE = None
+
+# Parquet copies of parsed .xls/.xlsx roll lists, reused until the workbook
+# changes (needs pyarrow); None re-reads workbooks every time
+SPREADSHEET_CACHE_DIR = "uploads/.cache/spreadsheets"
+
+# Diagnostics: stage timings are always recorded; these add a cProfile summary
+# and per-stage peak memory (tracemalloc) to each result - both slow a run down
+PROFILE_STAGES = False
+TRACE_MEMORY = False
+
 # Flask Configuration
 FLASK_HOST = "127.0.0.1"
 FLASK_PORT = 5000
@@ -18,32 +35,41 @@ FLASK_DEBUG = True
 
 # File Upload Settings
 UPLOAD_FOLDER = "uploads"
-ALLOWED_EXTENSIONS = {"csv"}
+ALLOWED_EXTENSIONS = {"csv", "xls", "xlsx"}
 MAX_FILE_SIZE = 16 * 1024 * 1024  # 16MB
 
 # Branch Code Mapping
 # Format: 'branch_code': 'branch_name'
 BRANCH_CODES = {
     '11995': 'AI & DS',
+    '11101': 'BCA',
     '11191': 'Civil',
     '11242': 'CSE',
     '11293': 'Elect',
     '11372': 'ENTC',
+    '22241': 'MCA',
     '11612': 'Mech'
 }
 
 # PRN Analysis Settings
-PRN_BRANCH_CODE_START = 10  # Position where branch code starts in PRN
+# A full PRN is year(2) 0 center(4) level(1) branch(5) roll(3), e.g. 25 0 6321 1 11242 018.
+# PRNs of that length are read positionally; any other PRN is searched for a known code.
+PRN_LENGTH = 16             # Digits in a full PRN
+PRN_BRANCH_CODE_START = 8   # Position where branch code starts in PRN (0-based)
 PRN_BRANCH_CODE_LENGTH = 5  # Length of branch code (5 digits)
 
+# Year of study from the PRN's admission year: the academic year starts in this month
+ACADEMIC_YEAR_START_MONTH = 8  # August
+MAX_STUDY_YEAR = 4             # Larger (or smaller than 1) means the PRN's year is not used
+
 # Export Settings
 EXPORT_FORMATS = ['pdf', 'excel']
 PDF_PAPER_SIZE = 'A4'
 EXCEL_SHEET_NAME = 'Seating_Block'
 
 # Exam Type Settings
-WINTER_MONTHS = [12, 1, 2]  # December, January, February
-SUMMER_MONTHS = [5, 6, 7, 8]  # May, June, July, August
+WINTER_MONTHS = [11, 12, 1]  # November, December, January
+SUMMER_MONTHS = [4, 5, 6, 7]  # April, May, June, July
 
 # Column Names in CSV
 CSV_COLUMNS = {
@@ -0,0 +1,171 @@
+import hashlib
+import io
+import json
+import pickle
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from export_manager import ExportManager
+from seating_result import blocks_of
+
+
+# Reports with at least this many uncached blocks are rendered on a process pool
+PARALLEL_PDF_MIN_BLOCKS = 200
+
+# Total size of the cached pages, sheet plans and workbooks
+MAX_BYTES = 256 * 1024 * 1024
+
+
+def _size_of(value):
+    """Bytes held by a cache value (sheet plans are measured pickled)"""
+    if isinstance(value, (bytes, bytearray)):
+        return len(value)
+    return len(pickle.dumps(value, pickle.HIGHEST_PROTOCOL))
+
+
+class ExportCache:
+    """Per-block export artifacts, rendered once and reused.
+
+    Each block's PDF page, Excel sheet plan and single-block workbook are
+    keyed by a hash of the block's content plus the export options (format,
+    title page, exam heading/date). Full reports are assembled from those
+    pieces on every request and never stored themselves, so after one block
+    changes only that block is rendered again. The cache holds at most
+    ``max_bytes`` of artifacts, least recently used first out.
+    """
+
+    def __init__(self, max_bytes=MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._entries = OrderedDict()
+        self._sizes = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def block_digest(block):
+        """Stable hash of everything printed for a block"""
+        content = {k: (list(v) if k == 'students' else v) for k, v in block.items()}
+        content['_institute'] = ExportManager.institute_name()
+        return hashlib.sha1(json.dumps(content, sort_keys=True, default=str).encode()).hexdigest()
+
+    def _get_or_render(self, key, render):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+        value = render()
+        self._store(key, value)
+        return value
+
+    def _store(self, key, value):
+        size = _size_of(value)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            self.size += size - self._sizes.get(key, 0)
+            self._entries[key] = value
+            self._sizes[key] = size
+            self._entries.move_to_end(key)
+            while self.size > self.max_bytes:
+                old, _ = self._entries.popitem(last=False)
+                self.size -= self._sizes.pop(old)
+
+    def block_pdf(self, block, include_title=False, heading=None, digest=None):
+        """PDF bytes for one block page"""
+        heading = heading or ExportManager.exam_heading(block=block)
+        key = ('pdf', digest or self.block_digest(block), include_title, heading)
+        return self._get_or_render(key, lambda: ExportManager.render_block_pdf(block, include_title, heading))
+
+    def block_sheet_plan(self, block, heading=None, digest=None):
+        """Excel sheet plan for one block"""
+        heading = heading or ExportManager.exam_heading(block=block)
+        key = ('sheet', digest or self.block_digest(block), heading)
+        return self._get_or_render(key, lambda: ExportManager.excel_sheet_plan(block, heading))
+
+    def block_excel(self, block, heading=None):
+        """Single-block workbook bytes"""
+        heading = heading or ExportManager.exam_heading(block=block)
+        digest = self.block_digest(block)
+        plan = self.block_sheet_plan(block, heading, digest)
+        return self._get_or_render(('xlsx', digest, heading),
+                                   lambda: ExportManager.workbook_from_plans([plan]).getvalue())
+
+    def _prefetch_block(self, block, heading):
+        self.block_pdf(block, include_title=True, heading=heading)
+        self.block_excel(block, heading)
+
+    def prefetch(self, blocks, heading=None, max_workers=2):
+        """Render each block's PDF page and workbook in background threads.
+
+        Returns one future per block, in order; once a block's future is
+        done, block_pdf(block, include_title=True) and block_excel(block)
+        are cache hits (its sheet plan also speeds up the full workbook).
+        Each block gets its own heading unless ``heading`` is given.
+        """
+        pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='export-prefetch')
+        futures = [pool.submit(self._prefetch_block, block, heading) for block in blocks]
+        # Let the queued renders finish on their own; nothing waits for the pool
+        pool.shutdown(wait=False)
+        return futures
+
+    def _merge_pdf(self, blocks, digests, headings):
+        from pypdf import PdfReader, PdfWriter
+
+        writer = PdfWriter()
+        for block_idx, (block, digest, heading) in enumerate(zip(blocks, digests, headings)):
+            page = self.block_pdf(block, include_title=block_idx == 0, heading=heading, digest=digest)
+            writer.append(PdfReader(io.BytesIO(page)))
+        buffer = io.BytesIO()
+        writer.write(buffer)
+        return buffer.getvalue()
+
+    def generate_pdf(self, data):
+        """Full PDF report merged from cached block pages"""
+        try:
+            import pypdf  # noqa: F401
+        except ImportError:
+            return ExportManager.generate_pdf(data)
+
+        blocks = blocks_of(data)
+        if len(blocks) == 0:
+            return ExportManager.generate_pdf(data)
+        blocks = list(blocks)
+        # Every page is keyed on its own block's heading; the first one titles the report
+        headings = [ExportManager.exam_heading(block=block) for block in blocks]
+        digests = [self.block_digest(block) for block in blocks]
+        keys = [('pdf', digest, block_idx == 0, heading)
+                for block_idx, (digest, heading) in enumerate(zip(digests, headings))]
+        with self._lock:
+            missing = [i for i, key in enumerate(keys) if key not in self._entries]
+        if len(missing) >= PARALLEL_PDF_MIN_BLOCKS:
+            # Render only the missing pages on the pool and keep them, so the
+            # next report after a small edit re-renders just the changed blocks
+            pages = ExportManager.render_block_pdfs_parallel(
+                [blocks[i] for i in missing], [keys[i][2] for i in missing], [headings[i] for i in missing])
+            for i, page in zip(missing, pages):
+                self._store(keys[i], page)
+        return io.BytesIO(self._merge_pdf(blocks, digests, headings))
+
+    def generate_excel(self, data):
+        """Full workbook written from cached sheet plans (large ones are streamed uncached)"""
+        if len(blocks_of(data)) >= ExportManager.STREAM_EXCEL_MIN_BLOCKS:
+            return ExportManager.generate_excel(data)
+        return ExportManager.workbook_from_plans(self.block_sheet_plan(block) for block in blocks_of(data))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._sizes.clear()
+            self.size = 0
+
+    def stats(self):
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'entries': len(self._entries), 'bytes': self.size}
+
+
+# Process-wide cache shared by the Flask and Streamlit front ends
+export_cache = ExportCache()
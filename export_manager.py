@@ -1,31 +1,155 @@
-from reportlab.lib.pagesizes import letter, A4
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.units import inch
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, PageBreak
-from reportlab.lib import colors
-from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_RIGHT
+import importlib
+import json
 import re
 import io
-import pandas as pd
-from openpyxl import Workbook
-from openpyxl.styles import Font, Alignment, Border, Side, PatternFill
+import tempfile
 from datetime import datetime
+from instrumentation import Diagnostics
+from seating_result import blocks_of, materialize_block
+from settings import get_settings
+
+
+def _strip_tags(s):
+    """Helper to strip any HTML tags from user-supplied values"""
+    if s is None:
+        return ''
+    return re.sub(r'<[^>]+>', '', str(s))
+
+
+def _column_letter(index):
+    """Spreadsheet column letter for a 1-based index (1 -> 'A', 27 -> 'AA')"""
+    letters = ''
+    while index:
+        index, rem = divmod(index - 1, 26)
+        letters = chr(ord('A') + rem) + letters
+    return letters
+
+
+def _export_diagnostics(diagnostics):
+    """The caller's Diagnostics, or a throwaway one that still feeds /metrics"""
+    return diagnostics if diagnostics is not None else Diagnostics('export')
+
+
+def _student_count(data):
+    total = data.get('totalStudents')
+    return total if total is not None else sum(len(b['students']) for b in blocks_of(data))
+
 
 class ExportManager:
-    """Generate PDF and Excel exports for seating arrangements"""
-    
-    INSTITUTE_NAME = "V. V. P. Institute of Engineering & Technology, Solapur"
-    CENTER_CODE = "6321"
-    
+    """Generate PDF and Excel exports for seating arrangements
+
+    The generate_* methods time their layout and rendering stages into
+    ``diagnostics`` (an instrumentation.Diagnostics) when one is passed.
+
+    reportlab and openpyxl are imported inside the methods that use them,
+    so importing this module (and the web apps, batch workers and sheet
+    plans that only need it) stays cheap until a report is rendered.
+    """
+
+    # Parallel PDF rendering: blocks per worker task and worker count (None = all cores)
+    PDF_SHARD_SIZE = 50
+    PDF_WORKERS = None
+
+    # Font size to use in Excel
+    EXCEL_HEADER_SIZE = 12
+    EXCEL_BODY_SIZE = 10
+
+    # Workbooks with at least this many blocks use the write-only streaming writer
+    STREAM_EXCEL_MIN_BLOCKS = 200
+
+    # Streaming Excel exports spill to disk above this many bytes
+    EXCEL_SPOOL_BYTES = 8 * 1024 * 1024
+
+    # Desks per row for blocks without a room layout, and the mark for blocked seats
+    DEFAULT_GRID_COLS = 3
+    BLOCKED_DESK = 'X'
+
     @staticmethod
-    def generate_pdf(data):
-        """Generate PDF with seating arrangements"""
-        buffer = io.BytesIO()
-        doc = SimpleDocTemplate(buffer, pagesize=A4, rightMargin=0.5*inch, 
-                               leftMargin=0.5*inch, topMargin=0.5*inch, bottomMargin=0.5*inch)
-        elements = []
+    def institute_name():
+        return get_settings().INSTITUTION_NAME
+
+    @staticmethod
+    def center_code(block):
+        """The block's exam center, else the configured CENTER_CODE"""
+        return block.get('centerCode') or get_settings().CENTER_CODE
+
+    @staticmethod
+    def exam_heading(now=None, block=None):
+        """Exam title and printed date, e.g. ('Winter Examination 2025', 'Monday, ...')
+
+        Taken from the block's own ``examType`` and ``date`` when it has
+        them; ``now`` (default: today) is used only for what the block lacks.
+        """
+        block = block or {}
+        # Determine exam type and date (weekday + date): the block's exam date, else today
+        now = datetime.fromisoformat(str(block['date'])) if block.get('date') else (now or datetime.now())
+        month = now.month
+        year = now.year
+        # Institution mapping (settings WINTER_MONTHS/SUMMER_MONTHS): Nov-Jan -> Winter, Apr-Jul -> Summer
+        settings = get_settings()
+        if month in settings.WINTER_MONTHS:
+            exam_label = "Winter"
+        elif month in settings.SUMMER_MONTHS:
+            exam_label = "Summer"
+        else:
+            exam_label = ""
+        exam_full = block.get('examType') or f"{exam_label + ' ' if exam_label else ''}Examination {year}"
+        date_str = now.strftime('%A, %d %B %Y')
+        return exam_full, date_str
+
+    @staticmethod
+    def desk_grid(block):
+        """(cols, rows) of desk cells for a block's seating table.
+
+        A block with a ``layout`` is drawn as its room's real rows x cols
+        grid: each student at its (row, col), blocked seats as
+        BLOCKED_DESK and unused desks as None. Other blocks fill
+        DEFAULT_GRID_COLS desks per row in desk order.
+        """
+        students = block.get('students', [])
+        layout = block.get('layout')
+        if not layout:
+            cols = ExportManager.DEFAULT_GRID_COLS
+            return cols, [[students[i + j] if i + j < len(students) else None for j in range(cols)]
+                          for i in range(0, len(students), cols)]
+        cols = layout['cols']
+        grid = [[None] * cols for _ in range(layout['rows'])]
+        for r, c in layout.get('blocked', []):
+            grid[r - 1][c - 1] = ExportManager.BLOCKED_DESK
+        for student in students:
+            grid[student['row'] - 1][student['col'] - 1] = student
+        return cols, grid
+
+    @staticmethod
+    def block_date(block, default):
+        """Printed date: the block's scheduled date (and slot) if it has one"""
+        date = block.get('date')
+        if not date:
+            return default
+        text = datetime.fromisoformat(str(date)).strftime('%A, %d %B %Y')
+        slot = block.get('slot')
+        return f"{text} ({slot})" if slot else text
+
+    @staticmethod
+    def block_title(block):
+        """'Block Name: Block-A', plus the room when the block has one"""
+        layout = block.get('layout')
+        room = f" ({layout['room']})" if layout else ''
+        return f"Block Name: {block.get('blockName', '')}{room}"
+
+    # ------------------------------------------------------------------
+    # PDF
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def pdf_styles():
+        """Paragraph styles shared by every PDF page"""
+        from reportlab.lib import colors
+        from reportlab.lib.enums import TA_CENTER
+        from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+
         styles = getSampleStyleSheet()
-        
+
         # Custom styles - balanced sizes for readability and fit
         title_style = ParagraphStyle(
             'CustomTitle',
@@ -54,277 +178,548 @@ class ExportManager:
             textColor=colors.black,
             spaceAfter=4
         )
-        
+        return {'title': title_style, 'subtitle': subtitle_style, 'normal': normal_style}
+
+    @staticmethod
+    def pdf_title_elements(styles, exam_full):
+        """Institute name, exam title and 'Seating Arrangement' heading (first page only)"""
+        from reportlab.lib.units import inch
+        from reportlab.platypus import Paragraph, Spacer
+
+        elements = []
         # Add title
-        elements.append(Paragraph(ExportManager.INSTITUTE_NAME, title_style))
+        elements.append(Paragraph(ExportManager.institute_name(), styles['title']))
         elements.append(Spacer(1, 0.1*inch))
-        
-        # Determine exam type and current date (weekday + date)
-        now = datetime.now()
-        month = now.month
-        year = now.year
-        # Institution mapping: Nov-Jan -> Winter, Apr-Jul -> Summer
-        if month in [11, 12, 1]:
-            exam_label = "Winter"
-        elif month in [4, 5, 6, 7]:
-            exam_label = "Summer"
-        else:
-            exam_label = ""
-        exam_full = f"{exam_label + ' ' if exam_label else ''}Examination {year}"
-        date_str = now.strftime('%A, %d %B %Y')
 
         # Use styled paragraph (avoid raw HTML tags inside table cells)
-        elements.append(Paragraph(exam_full, subtitle_style))
+        elements.append(Paragraph(exam_full, styles['subtitle']))
         elements.append(Spacer(1, 0.05*inch))
         # Add seating arrangement title in bold
-        elements.append(Paragraph("Seating Arrangement", title_style))
+        elements.append(Paragraph("Seating Arrangement", styles['title']))
         elements.append(Spacer(1, 0.15*inch))
-        
-        # Process each block
-        for block in data['blocks']:
-            # Helper to strip any HTML tags from user-supplied values
-            def _strip_tags(s):
-                if s is None:
-                    return ''
-                return re.sub(r'<[^>]+>', '', str(s))
-
-            # Block header info
-            header_data = [
-                [Paragraph(_strip_tags(f"Center Code: {ExportManager.CENTER_CODE}"), normal_style),
-                 Paragraph(_strip_tags(f"Date: {date_str}"), normal_style),
-                 Paragraph(_strip_tags(f"Block Name: {block.get('blockName', '')}"), normal_style)],
-            ]
-            header_table = Table(header_data, colWidths=[2.2*inch, 2.2*inch, 2.2*inch])
-            header_table.setStyle(TableStyle([
-                ('FONTNAME', (0, 0), (-1, -1), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, -1), 12),
-                ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-                ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
-            ]))
-            elements.append(header_table)
-            elements.append(Spacer(1, 0.05*inch))
-            
-            # Block info
-            # Use full PRN numbers and sanitize any user data
-            info_data = [
-                [Paragraph(_strip_tags(f"Total Students in Block: {block.get('totalStudents', '')}"), normal_style), 
-                 Paragraph(_strip_tags(f"PRN No.: From {block.get('prnFrom', '')} to {block.get('prnTo', '')}"), normal_style)],
-            ]
-            info_table = Table(info_data, colWidths=[3.3*inch, 3.3*inch])
-            info_table.setStyle(TableStyle([
-                ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
-                ('FONTSIZE', (0, 0), (-1, -1), 12),
-                ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-                ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
-            ]))
-            elements.append(info_table)
-            elements.append(Spacer(1, 0.05*inch))
-            
-            # Class and Branch info
-            class_data = [
-                [Paragraph(_strip_tags(f"Class: {block.get('year', '')} Year"), normal_style), 
-                 Paragraph(_strip_tags(f"Branch: {block.get('branch', '')}"), normal_style)],
-            ]
-            class_table = Table(class_data, colWidths=[3.3*inch, 3.3*inch])
-            class_table.setStyle(TableStyle([
-                ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
-                ('FONTSIZE', (0, 0), (-1, -1), 12),
-                ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-                ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
-            ]))
-            elements.append(class_table)
-            elements.append(Spacer(1, 0.1*inch))
-            
-            # Create seating table (vertical single-column layout for Desk No and PRN pairs)
-            desk_data = [['Desk No.', 'PRN No.', 'Desk No.', 'PRN No.', 'Desk No.', 'PRN No.']]
-            
-            # Fill in student data in 3-column layout (2 pairs per row, 3 pairs across)
-            students = block['students']
-            for i in range(0, len(students), 3):
-                row = []
-                for j in range(3):
-                    if i + j < len(students):
-                        student = students[i + j]
-                        row.append(str(student['deskNo']))
-                        row.append(_strip_tags(student.get('prn', '')))
-                    else:
-                        row.append('')
-                        row.append('')
-                desk_data.append(row)
-            
-            desk_table = Table(desk_data, colWidths=[0.6*inch, 1.9*inch, 0.6*inch, 1.9*inch, 0.6*inch, 1.9*inch])
-            desk_table.setStyle(TableStyle([
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, -1), 11),
-                ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-                ('GRID', (0, 0), (-1, -1), 1, colors.black),
-                ('BACKGROUND', (0, 0), (-1, 0), colors.lightgrey),
-                ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
-                ('TOPPADDING', (0, 0), (-1, -1), 6),
-            ]))
-            elements.append(desk_table)
-            elements.append(Spacer(1, 0.3*inch))
-            
-            # Add page break between blocks if there are more
-            if block != data['blocks'][-1]:
-                elements.append(PageBreak())
-        
-        # Build PDF
+        return elements
+
+    @staticmethod
+    def pdf_block_elements(block, styles, date_str):
+        """Flowables for one block: header tables and the desk grid"""
+        from reportlab.lib import colors
+        from reportlab.lib.units import inch
+        from reportlab.platypus import Paragraph, Spacer, Table, TableStyle
+
+        normal_style = styles['normal']
+        elements = []
+
+        # Block header info
+        header_data = [
+            [Paragraph(_strip_tags(f"Center Code: {ExportManager.center_code(block)}"), normal_style),
+             Paragraph(_strip_tags(f"Date: {ExportManager.block_date(block, date_str)}"), normal_style),
+             Paragraph(_strip_tags(ExportManager.block_title(block)), normal_style)],
+        ]
+        header_table = Table(header_data, colWidths=[2.2*inch, 2.2*inch, 2.2*inch])
+        header_table.setStyle(TableStyle([
+            ('FONTNAME', (0, 0), (-1, -1), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, -1), 12),
+            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
+        ]))
+        elements.append(header_table)
+        elements.append(Spacer(1, 0.05*inch))
+
+        # Block info
+        # Use full PRN numbers and sanitize any user data
+        info_data = [
+            [Paragraph(_strip_tags(f"Total Students in Block: {block.get('totalStudents', '')}"), normal_style),
+             Paragraph(_strip_tags(f"PRN No.: From {block.get('prnFrom', '')} to {block.get('prnTo', '')}"), normal_style)],
+        ]
+        info_table = Table(info_data, colWidths=[3.3*inch, 3.3*inch])
+        info_table.setStyle(TableStyle([
+            ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
+            ('FONTSIZE', (0, 0), (-1, -1), 12),
+            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
+        ]))
+        elements.append(info_table)
+        elements.append(Spacer(1, 0.05*inch))
+
+        # Class and Branch info
+        class_data = [
+            [Paragraph(_strip_tags(f"Class: {block.get('year', '')} Year"), normal_style),
+             Paragraph(_strip_tags(f"Branch: {block.get('branch', '')}"), normal_style)],
+        ]
+        class_table = Table(class_data, colWidths=[3.3*inch, 3.3*inch])
+        class_table.setStyle(TableStyle([
+            ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
+            ('FONTSIZE', (0, 0), (-1, -1), 12),
+            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
+        ]))
+        elements.append(class_table)
+        elements.append(Spacer(1, 0.1*inch))
+
+        # Seating table: one Desk No./PRN No. pair per desk in the grid
+        cols, grid = ExportManager.desk_grid(block)
+        desk_data = [['Desk No.', 'PRN No.'] * cols]
+        for grid_row in grid:
+            row = []
+            for cell in grid_row:
+                if cell is None:
+                    row.extend(['', ''])
+                elif cell is ExportManager.BLOCKED_DESK:
+                    row.extend([cell, ''])
+                else:
+                    row.append(str(cell['deskNo']))
+                    row.append(_strip_tags(cell.get('prn', '')))
+            desk_data.append(row)
+
+        # Rooms wider than 3 desks are scaled down to the same page width
+        scale = min(1.0, 3 / cols)
+        desk_table = Table(desk_data, colWidths=[0.6*inch*scale, 1.9*inch*scale] * cols)
+        desk_table.setStyle(TableStyle([
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, -1), max(5, int(11 * scale))),
+            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+            ('GRID', (0, 0), (-1, -1), 1, colors.black),
+            ('BACKGROUND', (0, 0), (-1, 0), colors.lightgrey),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
+            ('TOPPADDING', (0, 0), (-1, -1), 6),
+        ]))
+        elements.append(desk_table)
+        elements.append(Spacer(1, 0.3*inch))
+        return elements
+
+    @staticmethod
+    def build_pdf(elements):
+        """Lay out flowables on A4 pages and return the PDF buffer"""
+        from reportlab.lib.pagesizes import A4
+        from reportlab.lib.units import inch
+        from reportlab.platypus import SimpleDocTemplate
+
+        buffer = io.BytesIO()
+        doc = SimpleDocTemplate(buffer, pagesize=A4, rightMargin=0.5*inch,
+                               leftMargin=0.5*inch, topMargin=0.5*inch, bottomMargin=0.5*inch)
         doc.build(elements)
         buffer.seek(0)
         return buffer
-    
+
     @staticmethod
-    def generate_excel(data):
-        """Generate Excel with seating arrangements"""
-        wb = Workbook()
-        # Remove default sheet created by openpyxl
-        if wb.active is not None:
-            wb.remove(wb.active)
-
-        # Font size to use in Excel
-        excel_header_size = 12
-        excel_body_size = 10
-
-        for block_idx, block in enumerate(data.get('blocks', [])):
-            ws = wb.create_sheet(title=f"Block-{block_idx + 1}")
-
-            # Set column widths (wider to accommodate larger font)
-            ws.column_dimensions['A'].width = 20
-            ws.column_dimensions['B'].width = 40
-            ws.column_dimensions['C'].width = 20
-            ws.column_dimensions['D'].width = 40
-            ws.column_dimensions['E'].width = 20
-            ws.column_dimensions['F'].width = 40
-
-            row_num = 1
-
-            # Institute title
-            ws.merge_cells(f'A{row_num}:F{row_num}')
-            title_cell = ws[f'A{row_num}']
-            title_cell.value = ExportManager.INSTITUTE_NAME
-            # Institute title uses a slightly smaller size (20) per user request
-            title_cell.font = Font(bold=True, size=20)
-            title_cell.alignment = Alignment(horizontal='center', vertical='center')
-            row_num += 2
-
-            # Exam title and date
-            now = datetime.now()
-            month = now.month
-            year = now.year
-            # Use same mapping as PDF
-            if month in [11, 12, 1]:
-                exam_label = "Winter"
-            elif month in [4, 5, 6, 7]:
-                exam_label = "Summer"
-            else:
-                exam_label = ""
-            exam_full = f"{exam_label + ' ' if exam_label else ''}Examination {year}"
-            date_str = now.strftime('%A, %d %B %Y')
-
-            ws.merge_cells(f'A{row_num}:F{row_num}')
-            exam_cell = ws[f'A{row_num}']
-            exam_cell.value = exam_full
-            exam_cell.font = Font(bold=True, size=16)
-            exam_cell.alignment = Alignment(horizontal='center', vertical='center')
-            row_num += 2
-
-            # Header info
-            ws.merge_cells(f'A{row_num}:B{row_num}')
-            ws[f'A{row_num}'].value = f"Center Code: {ExportManager.CENTER_CODE}"
-            ws[f'A{row_num}'].font = Font(bold=True, size=excel_header_size)
-
-            ws.merge_cells(f'C{row_num}:D{row_num}')
-            ws[f'C{row_num}'].value = f"Date: {date_str}"
-            ws[f'C{row_num}'].font = Font(bold=True, size=excel_header_size)
-
-            ws.merge_cells(f'E{row_num}:F{row_num}')
-            ws[f'E{row_num}'].value = f"Block Name: {block.get('blockName', '')}"
-            ws[f'E{row_num}'].font = Font(bold=True, size=excel_header_size)
-            row_num += 1
+    def generate_pdf(data, diagnostics=None):
+        """Generate PDF with seating arrangements (dict or SeatingResult)"""
+        from reportlab.platypus import PageBreak
+
+        diagnostics = _export_diagnostics(diagnostics)
+        rows = _student_count(data)
+        with diagnostics.stage('pdf_layout', rows=rows):
+            styles = ExportManager.pdf_styles()
+            blocks = blocks_of(data)
+            exam_full, date_str = ExportManager.exam_heading(block=blocks[0] if len(blocks) else None)
+            elements = ExportManager.pdf_title_elements(styles, exam_full)
 
-            # Student count and PRN range
-            ws.merge_cells(f'A{row_num}:B{row_num}')
-            ws[f'A{row_num}'].value = f"Total Students in Block: {block.get('totalStudents', '')}"
-            ws[f'A{row_num}'].font = Font(bold=True, size=excel_body_size)
+            # Process each block
+            for block_idx, block in enumerate(blocks):
+                elements.extend(ExportManager.pdf_block_elements(block, styles, date_str))
+
+                # Add page break between blocks if there are more
+                if block_idx < len(blocks) - 1:
+                    elements.append(PageBreak())
+
+        # Build PDF
+        with diagnostics.stage('pdf_render', rows=rows):
+            return ExportManager.build_pdf(elements)
+
+    @staticmethod
+    def render_pdf_shard(blocks, include_title, heading):
+        """PDF bytes for a run of consecutive blocks, one page each (process pool worker)"""
+        from reportlab.platypus import PageBreak
 
-            ws.merge_cells(f'C{row_num}:F{row_num}')
-            ws[f'C{row_num}'].value = f"PRN No.: From {block.get('prnFrom', '')} to {block.get('prnTo', '')}"
-            ws[f'C{row_num}'].font = Font(bold=True, size=excel_body_size)
+        styles = ExportManager.pdf_styles()
+        exam_full, date_str = heading
+        elements = ExportManager.pdf_title_elements(styles, exam_full) if include_title else []
+        for block_idx, block in enumerate(blocks):
+            elements.extend(ExportManager.pdf_block_elements(block, styles, date_str))
+            if block_idx < len(blocks) - 1:
+                elements.append(PageBreak())
+        return ExportManager.build_pdf(elements).getvalue()
+
+    @staticmethod
+    def generate_pdf_parallel(data, workers=None, shard_size=None, diagnostics=None):
+        """Same document as generate_pdf, rendered in shards on a process pool.
+
+        Blocks are split into shards of ``shard_size`` blocks, each rendered
+        by a process pool worker; the shard PDFs are merged in block
+        order with pypdf. Small inputs fall back to generate_pdf.
+        """
+        from pypdf import PdfReader, PdfWriter
+        from pools import process_pool
+
+        shard_size = shard_size or ExportManager.PDF_SHARD_SIZE
+        workers = workers or ExportManager.PDF_WORKERS
+        blocks = blocks_of(data)
+        if len(blocks) <= shard_size or workers == 1:
+            return ExportManager.generate_pdf(data, diagnostics)
+
+        diagnostics = _export_diagnostics(diagnostics)
+        heading = ExportManager.exam_heading(block=blocks[0])
+        # Rendering and merging overlap, so the pool is timed as one stage
+        with diagnostics.stage('pdf_shards', rows=_student_count(data)):
+            shards = [[materialize_block(b) for b in blocks[start:start + shard_size]]
+                      for start in range(0, len(blocks), shard_size)]
+            titles = [shard_idx == 0 for shard_idx in range(len(shards))]
+
+            writer = PdfWriter()
+            with process_pool(workers) as pool:
+                # map() yields results in submission order, so pages stay in block order
+                for pdf_bytes in pool.map(ExportManager.render_pdf_shard, shards, titles,
+                                          [heading] * len(shards)):
+                    writer.append(PdfReader(io.BytesIO(pdf_bytes)))
+        with diagnostics.stage('pdf_write'):
+            buffer = io.BytesIO()
+            writer.write(buffer)
+            buffer.seek(0)
+        return buffer
+
+    @staticmethod
+    def render_block_pdf(block, include_title=False, heading=None):
+        """One block as a standalone PDF page (bytes); the title goes on the first page only"""
+        styles = ExportManager.pdf_styles()
+        exam_full, date_str = heading or ExportManager.exam_heading(block=block)
+        elements = ExportManager.pdf_title_elements(styles, exam_full) if include_title else []
+        elements.extend(ExportManager.pdf_block_elements(block, styles, date_str))
+        return ExportManager.build_pdf(elements).getvalue()
+
+    @staticmethod
+    def render_block_pdfs(blocks, titles, headings):
+        """render_block_pdf for each block (process pool worker)"""
+        return [ExportManager.render_block_pdf(block, include_title, heading)
+                for block, include_title, heading in zip(blocks, titles, headings)]
+
+    @staticmethod
+    def render_block_pdfs_parallel(blocks, titles, headings, workers=None, shard_size=None):
+        """Standalone page bytes for each block, rendered in shards on a process pool.
+
+        Unlike generate_pdf_parallel the pages come back one per block, so a
+        caller can keep them (see ExportCache) before merging.
+        """
+        from pools import process_pool
+
+        shard_size = shard_size or ExportManager.PDF_SHARD_SIZE
+        blocks = [materialize_block(b) for b in blocks]
+        titles = list(titles)
+        headings = list(headings)
+        starts = range(0, len(blocks), shard_size)
+        pages = []
+        with process_pool(workers or ExportManager.PDF_WORKERS) as pool:
+            for shard in pool.map(ExportManager.render_block_pdfs,
+                                  [blocks[s:s + shard_size] for s in starts],
+                                  [titles[s:s + shard_size] for s in starts],
+                                  [headings[s:s + shard_size] for s in starts]):
+                pages.extend(shard)
+        return pages
+
+    # ------------------------------------------------------------------
+    # Excel
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def excel_sheet_plan(block, heading=None):
+        """Describe one block's sheet as plain data, independent of any workbook.
+
+        Returns ``{'widths': {col: width}, 'merges': [range], 'cells':
+        [(row, col, value, style_key)]}`` with cells in row order;
+        ``excel_styles`` maps style keys to openpyxl style objects.
+        """
+        exam_full, date_str = heading or ExportManager.exam_heading(block=block)
+        cols, grid = ExportManager.desk_grid(block)
+        # Set column widths (wider to accommodate larger font)
+        widths = {}
+        for col_idx in range(max(cols, 3)):
+            widths[_column_letter(2 * col_idx + 1)] = 20
+            widths[_column_letter(2 * col_idx + 2)] = 40
+        merges = []
+        cells = []
+
+        row_num = 1
+
+        # Institute title
+        merges.append(f'A{row_num}:F{row_num}')
+        # Institute title uses a slightly smaller size (20) per user request
+        cells.append((row_num, 1, ExportManager.institute_name(), 'institute'))
+        row_num += 2
+
+        # Exam title and date
+        merges.append(f'A{row_num}:F{row_num}')
+        cells.append((row_num, 1, exam_full, 'exam'))
+        row_num += 2
+
+        # Header info
+        merges.append(f'A{row_num}:B{row_num}')
+        cells.append((row_num, 1, f"Center Code: {ExportManager.center_code(block)}", 'header'))
+
+        merges.append(f'C{row_num}:D{row_num}')
+        cells.append((row_num, 3, f"Date: {ExportManager.block_date(block, date_str)}", 'header'))
+
+        merges.append(f'E{row_num}:F{row_num}')
+        cells.append((row_num, 5, ExportManager.block_title(block), 'header'))
+        row_num += 1
+
+        # Student count and PRN range
+        merges.append(f'A{row_num}:B{row_num}')
+        cells.append((row_num, 1, f"Total Students in Block: {block.get('totalStudents', '')}", 'info'))
+
+        merges.append(f'C{row_num}:F{row_num}')
+        cells.append((row_num, 3, f"PRN No.: From {block.get('prnFrom', '')} to {block.get('prnTo', '')}", 'info'))
+        row_num += 1
+
+        # Class and Branch
+        merges.append(f'A{row_num}:B{row_num}')
+        cells.append((row_num, 1, f"Class: {block.get('year', '')} Year", 'info'))
+
+        merges.append(f'C{row_num}:D{row_num}')
+        cells.append((row_num, 3, f"Branch: {block.get('branch', '')}", 'info'))
+        row_num += 2
+
+        # Seating table header: a Desk No./PRN No. pair per desk across
+        headers = ['Desk No.', 'PRN No.'] * cols
+        for col_idx, header in enumerate(headers, 1):
+            cells.append((row_num, col_idx, header, 'table_header'))
+        row_num += 1
+
+        # Add student data (the desk grid: pairs of Desk/PRN)
+        students = block.get('students', [])
+        for grid_row in grid:
+            for j, cell in enumerate(grid_row):
+                col = 2 * j + 1
+                if cell is ExportManager.BLOCKED_DESK:
+                    cells.append((row_num, col, cell, 'body'))
+                elif cell is not None:
+                    cells.append((row_num, col, cell.get('deskNo', ''), 'body'))
+                    cells.append((row_num, col + 1, str(cell.get('prn', '')), 'body'))
             row_num += 1
 
-            # Class and Branch
-            ws.merge_cells(f'A{row_num}:B{row_num}')
-            ws[f'A{row_num}'].value = f"Class: {block.get('year', '')} Year"
-            ws[f'A{row_num}'].font = Font(bold=True, size=excel_body_size)
-
-            ws.merge_cells(f'C{row_num}:D{row_num}')
-            ws[f'C{row_num}'].value = f"Branch: {block.get('branch', '')}"
-            ws[f'C{row_num}'].font = Font(bold=True, size=excel_body_size)
-            row_num += 2
-
-            # Seating table header (vertical single-column layout)
-            headers = ['Desk No.', 'PRN No.', 'Desk No.', 'PRN No.', 'Desk No.', 'PRN No.']
-            for col_idx, header in enumerate(headers, 1):
-                cell = ws.cell(row=row_num, column=col_idx)
-                cell.value = header
-                cell.font = Font(bold=True, color="FFFFFF", size=excel_header_size)
-                cell.fill = PatternFill(start_color="808080", end_color="808080", fill_type="solid")
-                cell.alignment = Alignment(horizontal='center', vertical='center')
+        # Add student data (vertical single-column layout)
+        for student in students:
+            # Desk No (Column A), PRN No (Column B)
+            cells.append((row_num, 1, student.get('deskNo', ''), 'body'))
+            cells.append((row_num, 2, str(student.get('prn', '')), 'body'))
             row_num += 1
-            
-            # Add student data (3-column layout: pairs of Desk/PRN)
-            border = Border(left=Side(style='thin'), right=Side(style='thin'),
-                           top=Side(style='thin'), bottom=Side(style='thin'))
-            
-            students = block.get('students', [])
-            for i in range(0, len(students), 3):
-                col = 1
-                for j in range(3):
-                    if i + j < len(students):
-                        student = students[i + j]
-                        # Desk No
-                        desk_cell = ws.cell(row=row_num, column=col)
-                        desk_cell.value = student.get('deskNo', '')
-                        desk_cell.font = Font(size=excel_body_size)
-                        desk_cell.alignment = Alignment(horizontal='center', vertical='center')
-                        desk_cell.border = border
-                        
-                        # PRN No
-                        prn_cell = ws.cell(row=row_num, column=col + 1)
-                        prn_cell.value = str(student.get('prn', ''))
-                        prn_cell.font = Font(size=excel_body_size)
-                        prn_cell.alignment = Alignment(horizontal='center', vertical='center')
-                        prn_cell.border = border
-                        
-                        col += 2
-                row_num += 1
-
-            # Add student data (vertical single-column layout)
-            border = Border(left=Side(style='thin'), right=Side(style='thin'),
-                          top=Side(style='thin'), bottom=Side(style='thin'))
-
-            students = block.get('students', [])
-            for student in students:
-                # Desk No (Column A)
-                desk_cell = ws.cell(row=row_num, column=1)
-                desk_cell.value = student.get('deskNo', '')
-                desk_cell.font = Font(size=excel_body_size)
-                desk_cell.alignment = Alignment(horizontal='center', vertical='center')
-                desk_cell.border = border
-
-                # PRN No (Column B)
-                prn_cell = ws.cell(row=row_num, column=2)
-                prn_cell.value = str(student.get('prn', ''))
-                prn_cell.font = Font(size=excel_body_size)
-                prn_cell.alignment = Alignment(horizontal='center', vertical='center')
-                prn_cell.border = border
-                
-                row_num += 1
+
+        return {'widths': widths, 'merges': merges, 'cells': cells}
+
+    @staticmethod
+    def excel_styles():
+        """Shared (font, alignment, border, fill) per style key used in sheet plans"""
+        from openpyxl.styles import Alignment, Border, Font, PatternFill, Side
+
+        center = Alignment(horizontal='center', vertical='center')
+        border = Border(left=Side(style='thin'), right=Side(style='thin'),
+                        top=Side(style='thin'), bottom=Side(style='thin'))
+        return {
+            'institute': (Font(bold=True, size=20), center, None, None),
+            'exam': (Font(bold=True, size=16), center, None, None),
+            'header': (Font(bold=True, size=ExportManager.EXCEL_HEADER_SIZE), None, None, None),
+            'info': (Font(bold=True, size=ExportManager.EXCEL_BODY_SIZE), None, None, None),
+            'table_header': (Font(bold=True, color="FFFFFF", size=ExportManager.EXCEL_HEADER_SIZE), center, None,
+                             PatternFill(start_color="808080", end_color="808080", fill_type="solid")),
+            'body': (Font(size=ExportManager.EXCEL_BODY_SIZE), center, border, None),
+        }
+
+    @staticmethod
+    def write_sheet_plan(ws, plan, styles):
+        """Replay a sheet plan onto a normal worksheet"""
+        for col, width in plan['widths'].items():
+            ws.column_dimensions[col].width = width
+        for cell_range in plan['merges']:
+            ws.merge_cells(cell_range)
+        for row, col, value, style_key in plan['cells']:
+            cell = ws.cell(row=row, column=col)
+            cell.value = value
+            font, alignment, border, fill = styles[style_key]
+            cell.font = font
+            if alignment is not None:
+                cell.alignment = alignment
+            if border is not None:
+                cell.border = border
+            if fill is not None:
+                cell.fill = fill
+
+    @staticmethod
+    def workbook_from_plans(plans, diagnostics=None, rows=None):
+        """Workbook with one 'Block-N' sheet per plan, saved to a buffer"""
+        from openpyxl import Workbook
+
+        diagnostics = _export_diagnostics(diagnostics)
+        with diagnostics.stage('excel_sheets', rows=rows):
+            wb = Workbook()
+            # Remove default sheet created by openpyxl
+            if wb.active is not None:
+                wb.remove(wb.active)
+
+            styles = ExportManager.excel_styles()
+            for block_idx, plan in enumerate(plans):
+                ws = wb.create_sheet(title=f"Block-{block_idx + 1}")
+                ExportManager.write_sheet_plan(ws, plan, styles)
 
         # Save to buffer
-        buffer = io.BytesIO()
-        wb.save(buffer)
-        buffer.seek(0)
+        with diagnostics.stage('excel_save', rows=rows):
+            buffer = io.BytesIO()
+            wb.save(buffer)
+            buffer.seek(0)
         return buffer
+
+    @staticmethod
+    def excel_named_styles():
+        """One NamedStyle per sheet-plan style key, shared by every cell in a workbook"""
+        from openpyxl.styles import NamedStyle
+
+        named = []
+        for key, (font, alignment, border, fill) in ExportManager.excel_styles().items():
+            style = NamedStyle(name=f'seating_{key}')
+            style.font = font
+            if alignment is not None:
+                style.alignment = alignment
+            if border is not None:
+                style.border = border
+            if fill is not None:
+                style.fill = fill
+            named.append(style)
+        return named
+
+    @staticmethod
+    def write_sheet_plan_streaming(ws, plan):
+        """Write a sheet plan to a write-only worksheet, row by row"""
+        from openpyxl.cell import WriteOnlyCell
+
+        for col, width in plan['widths'].items():
+            ws.column_dimensions[col].width = width
+        for cell_range in plan['merges']:
+            ws.merged_cells.add(cell_range)
+
+        current_row = 1
+        row = []
+        for row_num, col, value, style_key in plan['cells']:
+            while current_row < row_num:
+                ws.append(row)
+                row = []
+                current_row += 1
+            cell = WriteOnlyCell(ws, value=value)
+            cell.style = f'seating_{style_key}'
+            row.extend([None] * (col - 1 - len(row)))
+            row.append(cell)
+        if row:
+            ws.append(row)
+
+    @staticmethod
+    def generate_excel_streaming(data, target=None, diagnostics=None):
+        """Generate Excel with write-only worksheets and shared named styles.
+
+        Same sheets as generate_excel, but every sheet is streamed to disk
+        as it is written, so memory stays flat as the number of blocks grows. Writes to ``target`` (path or file
+        object) or, by default, to a SpooledTemporaryFile that is returned
+        rewound and ready to stream.
+        """
+        from openpyxl import Workbook
+
+        diagnostics = _export_diagnostics(diagnostics)
+        rows = _student_count(data)
+        with diagnostics.stage('excel_sheets', rows=rows):
+            wb = Workbook(write_only=True)
+            for style in ExportManager.excel_named_styles():
+                wb.add_named_style(style)
+
+            for block_idx, block in enumerate(blocks_of(data)):
+                ws = wb.create_sheet(title=f"Block-{block_idx + 1}")
+                plan = ExportManager.excel_sheet_plan(block)
+                ExportManager.write_sheet_plan_streaming(ws, plan)
+                # Finish the sheet now so its XML writer is released before the next one
+                ws.close()
+
+        with diagnostics.stage('excel_save', rows=rows):
+            if target is None:
+                target = tempfile.SpooledTemporaryFile(max_size=ExportManager.EXCEL_SPOOL_BYTES)
+            wb.save(target)
+            if hasattr(target, 'seek'):
+                target.seek(0)
+        return target
+
+    @staticmethod
+    def generate_excel(data, diagnostics=None):
+        """Generate Excel with seating arrangements (dict or SeatingResult)
+
+        Large arrangements (STREAM_EXCEL_MIN_BLOCKS blocks or more) go to
+        generate_excel_streaming and come back as a spooled temporary file.
+        """
+        if len(blocks_of(data)) >= ExportManager.STREAM_EXCEL_MIN_BLOCKS:
+            return ExportManager.generate_excel_streaming(data, diagnostics=diagnostics)
+        return ExportManager.workbook_from_plans(
+            (ExportManager.excel_sheet_plan(block) for block in blocks_of(data)),
+            diagnostics, rows=_student_count(data)
+        )
+
+
+def _render_json(data, diagnostics=None):
+    """The arrangement as JSON (SeatingResult or plain dict)"""
+    diagnostics = _export_diagnostics(diagnostics)
+    with diagnostics.stage('json', rows=_student_count(data)):
+        if hasattr(data, 'iter_json'):
+            text = ''.join(data.iter_json())
+        else:
+            text = json.dumps(data, default=str)
+    return io.BytesIO(text.encode('utf-8'))
+
+
+class ExportBackend:
+    """One report format: file extension, mimetype and its render function.
+
+    ``render`` is called as ``render(data, diagnostics=None)`` and returns
+    a rewound binary file object. It may be given as a
+    ``'module:attribute.path'`` string, in which case the module is only
+    imported the first time the backend renders something.
+    """
+
+    __slots__ = ('name', 'extension', 'mimetype', '_render')
+
+    def __init__(self, name, render, extension, mimetype):
+        self.name = name
+        self.extension = extension
+        self.mimetype = mimetype
+        self._render = render
+
+    @property
+    def render(self):
+        if isinstance(self._render, str):
+            module, _, path = self._render.partition(':')
+            target = importlib.import_module(module)
+            for attr in path.split('.'):
+                target = getattr(target, attr)
+            self._render = target
+        return self._render
+
+    def __call__(self, data, diagnostics=None):
+        return self.render(data, diagnostics=diagnostics)
+
+
+_BACKENDS = {}
+
+
+def register_backend(name, render, extension, mimetype):
+    """Add (or replace) the export format ``name``; returns its ExportBackend"""
+    backend = _BACKENDS[name] = ExportBackend(name, render, extension, mimetype)
+    return backend
+
+
+def get_backend(name):
+    """The ExportBackend registered as ``name``, or None"""
+    return _BACKENDS.get(name)
+
+
+def backend_names():
+    return list(_BACKENDS)
+
+
+register_backend('pdf', ExportManager.generate_pdf, '.pdf', 'application/pdf')
+register_backend('excel', ExportManager.generate_excel, '.xlsx',
+                 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
+register_backend('json', _render_json, '.json', 'application/json')
+# Columnar tables for downstream systems (pyarrow loads on first use)
+register_backend('arrow', 'seating_table:render_arrow', '.arrow', 'application/vnd.apache.arrow.file')
+register_backend('parquet', 'seating_table:render_parquet', '.parquet', 'application/vnd.apache.parquet')
@@ -0,0 +1,276 @@
+import io
+import os
+import pandas as pd
+
+# Order students are seated in: branch name, branch code, PRN
+SORT_KEYS = ['Branch', 'BranchCode', 'PRN']
+
+# Columns kept from workbooks: (find_columns role, output name); College Code
+# is what multi-center runs fall back to when a PRN has no center
+ROLL_COLUMNS = (('prn', 'PRN'), ('name', 'Name'), ('year', 'Year'), ('center', 'College Code'))
+
+
+def _rewind(source):
+    """Reset file-like sources after a partial read; paths need nothing"""
+    if hasattr(source, 'seek'):
+        source.seek(0)
+
+
+def find_columns(header):
+    """Map the PRN/name/year/center roles to headers (case and whitespace-insensitive)"""
+    prn_col = next((c for c in header if str(c).strip().lower() == 'prn'), None)
+    if prn_col is None:
+        raise ValueError('Could not find a `PRN` column in the uploaded CSV.')
+    name_col = next((c for c in header if str(c).strip().lower() in ('name', 'student name')), None)
+    year_col = next((c for c in header if 'year' in str(c).lower()), None)
+    center_col = next((c for c in header if str(c).strip().lower() == 'college code'), None)
+    return {'prn': prn_col, 'name': name_col, 'year': year_col, 'center': center_col}
+
+
+def sniff_columns(source):
+    """Read only the CSV header row and locate the PRN, name and year columns"""
+    header = pd.read_csv(source, nrows=0).columns
+    _rewind(source)
+    return find_columns(header)
+
+
+def iter_chunks(source, columns, chunksize):
+    """Yield chunks holding only PRN/Name/Year, with PRN and Name kept as strings"""
+    usecols = [c for c in (columns['prn'], columns['name'], columns['year']) if c is not None]
+    dtype = {columns['prn']: str}
+    if columns['name'] is not None:
+        dtype[columns['name']] = str
+    rename = {columns['prn']: 'PRN'}
+    if columns['name'] is not None:
+        rename[columns['name']] = 'Name'
+    if columns['year'] is not None:
+        rename[columns['year']] = 'Year'
+
+    for chunk in pd.read_csv(source, usecols=usecols, dtype=dtype, chunksize=chunksize):
+        yield chunk.rename(columns=rename)
+
+
+def prepare_chunk(chunk, matcher):
+    """Clean PRNs, attach BranchCode/Branch and drop rows without any code"""
+    chunk = chunk.copy()
+    chunk['PRN'] = chunk['PRN'].astype(str).str.strip()
+    chunk['BranchCode'] = matcher.extract(chunk['PRN'])
+    chunk = chunk[chunk['BranchCode'].notna()].copy()
+    chunk['Branch'] = matcher.names(chunk['BranchCode']).fillna('')
+    if 'Name' in chunk.columns:
+        chunk['Name'] = chunk['Name'].fillna('')
+    return chunk
+
+
+# ---------------------------------------------------------------------------
+# Spreadsheet (.xls/.xlsx) roll lists
+# ---------------------------------------------------------------------------
+
+SPREADSHEET_EXTENSIONS = {'xls', 'xlsx', 'xlsm'}
+
+# Rows scanned from the top of each sheet when looking for the header row
+HEADER_SCAN_ROWS = 30
+
+# Above this size multi-sheet workbooks are read with one process per sheet
+PARALLEL_SHEETS_MIN_BYTES = 2 * 1024 * 1024
+
+SPREADSHEET_ML_NS = '{urn:schemas-microsoft-com:office:spreadsheet}'
+
+
+def read_roll_list(source, filename=None, cache_dir=None):
+    """Roll list frame from a path or an in-memory upload (bytes or file object), by file name.
+
+    Workbooks go through read_spreadsheet; CSVs keep every column with the
+    PRN column read as text and renamed to 'PRN', ready to pass to
+    SeatingProcessor as ``frame``. ``filename`` defaults to the path;
+    ``cache_dir`` is passed on to read_spreadsheet.
+    """
+    if is_spreadsheet(filename or source):
+        return read_spreadsheet(source, cache_dir=cache_dir)
+    if isinstance(source, (bytes, bytearray)):
+        source = io.BytesIO(source)
+    columns = sniff_columns(source)
+    df = pd.read_csv(source, dtype={columns['prn']: str})
+    return df.rename(columns={columns['prn']: 'PRN'})
+
+
+def is_spreadsheet(filename):
+    """True for .xls/.xlsx/.xlsm roll lists"""
+    return '.' in str(filename) and str(filename).rsplit('.', 1)[1].lower() in SPREADSHEET_EXTENSIONS
+
+
+def _head(source, size=512):
+    """First bytes of a path or binary file object"""
+    if hasattr(source, 'read'):
+        head = source.read(size)
+        _rewind(source)
+        return head
+    with open(source, 'rb') as f:
+        return f.read(size)
+
+
+def _is_spreadsheet_ml(path):
+    """Excel 2003 XML workbooks are often saved with an .xls extension"""
+    head = _head(path).lstrip()
+    return head.startswith(b'<?xml') and b'urn:schemas-microsoft-com:office:spreadsheet' in head
+
+
+def excel_engine(path):
+    """Fastest available read-only engine: calamine, else openpyxl/xlrd"""
+    try:
+        import python_calamine  # noqa: F401
+        return 'calamine'
+    except ImportError:
+        if hasattr(path, 'read'):
+            # No file name to go by: legacy .xls files are OLE2 compound documents
+            return 'xlrd' if _head(path, 8) == b'\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1' else 'openpyxl'
+        return 'xlrd' if str(path).lower().endswith('.xls') else 'openpyxl'
+
+
+def find_header_row(rows):
+    """Index of the first row with a PRN cell, or None"""
+    for idx, row in enumerate(rows):
+        if any(str(v).strip().lower() == 'prn' for v in row if v is not None):
+            return idx
+    return None
+
+
+def _roll_frame(header, rows):
+    """Canonical PRN/Name/Year (+ College Code) frame from a header row and data rows"""
+    columns = find_columns(header)
+    frame = {}
+    for role, out in ROLL_COLUMNS:
+        if columns[role] is not None:
+            idx = header.index(columns[role])
+            frame[out] = [row[idx] if idx < len(row) else None for row in rows]
+    return _drop_implausible_year(pd.DataFrame(frame))
+
+
+def _drop_implausible_year(df):
+    """Drop a 'year' column that holds calendar years (e.g. 'Passing Year'), not class years"""
+    if 'Year' in df.columns:
+        years = pd.to_numeric(df['Year'], errors='coerce')
+        if years.notna().any() and (years.dropna() > 10).mean() > 0.5:
+            df = df.drop(columns=['Year'])
+    return df
+
+
+def _iter_spreadsheet_ml(path):
+    """Yield (sheet_name, rows) from an Excel 2003 XML workbook"""
+    import xml.etree.ElementTree as ET
+
+    sheet = None
+    rows = []
+    row = None
+    for event, elem in ET.iterparse(path, events=('start', 'end')):
+        tag = elem.tag
+        if event == 'start':
+            if tag == SPREADSHEET_ML_NS + 'Worksheet':
+                sheet = elem.get(SPREADSHEET_ML_NS + 'Name')
+                rows = []
+            elif tag == SPREADSHEET_ML_NS + 'Row':
+                row = []
+            continue
+        if tag == SPREADSHEET_ML_NS + 'Cell':
+            index = elem.get(SPREADSHEET_ML_NS + 'Index')
+            if index is not None:
+                row.extend([None] * (int(index) - 1 - len(row)))
+            data = elem.find(SPREADSHEET_ML_NS + 'Data')
+            row.append(data.text if data is not None else None)
+            elem.clear()
+        elif tag == SPREADSHEET_ML_NS + 'Row':
+            rows.append(row)
+            elem.clear()
+        elif tag == SPREADSHEET_ML_NS + 'Worksheet':
+            yield sheet, rows
+            elem.clear()
+
+
+def _read_excel_sheet(path, sheet, engine):
+    """Read one sheet: find the header row, then load only the needed columns"""
+    _rewind(path)
+    probe = pd.read_excel(path, sheet_name=sheet, header=None, nrows=HEADER_SCAN_ROWS,
+                          dtype=str, engine=engine)
+    rows = probe.where(probe.notna(), None).values.tolist()
+    header_idx = find_header_row(rows)
+    if header_idx is None:
+        return None
+
+    header = [str(v).strip() if v is not None else '' for v in rows[header_idx]]
+    columns = find_columns(header)
+    wanted = [(out, header.index(columns[role])) for role, out in ROLL_COLUMNS if columns[role] is not None]
+    _rewind(path)
+    df = pd.read_excel(path, sheet_name=sheet, header=None, skiprows=header_idx + 1,
+                       usecols=[idx for _, idx in wanted], dtype=str, engine=engine)
+    df = df.rename(columns={idx: out for out, idx in wanted})[[out for out, _ in wanted]]
+    df = df[df['PRN'].notna()]
+    return _drop_implausible_year(df.reset_index(drop=True))
+
+
+def _parquet_cache_path(path, cache_dir):
+    """Cache file name keyed by the workbook's path, size and mtime"""
+    import hashlib
+    stat = os.stat(path)
+    # The column list is part of the key, so caches made before a column was added are not reused
+    columns = ','.join(out for _, out in ROLL_COLUMNS)
+    key = f"{os.path.abspath(path)}|{stat.st_size}|{stat.st_mtime_ns}|{columns}"
+    return os.path.join(cache_dir, hashlib.sha1(key.encode()).hexdigest() + '.parquet')
+
+
+def _parquet_available():
+    try:
+        import pyarrow  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def read_spreadsheet(path, cache_dir=None, max_workers=None):
+    """Read every sheet of a roll-list workbook into one PRN/Name/Year (+ College Code) frame.
+
+    Sheets without a PRN header row are skipped. Multi-sheet workbooks above
+    PARALLEL_SHEETS_MIN_BYTES are read in parallel, one process per sheet.
+    With ``cache_dir`` (and pyarrow installed) the result is written once to
+    a Parquet file and reused until the workbook changes.
+
+    ``path`` may also be the workbook's bytes or a binary file object; it is
+    then read in memory, sheet by sheet, without the Parquet cache.
+    """
+    if not isinstance(path, (str, os.PathLike)):
+        if hasattr(path, 'read'):
+            path = path.read()
+        path = io.BytesIO(path)
+        cache_dir = None
+    cache_path = None
+    if cache_dir and _parquet_available():
+        os.makedirs(cache_dir, exist_ok=True)
+        cache_path = _parquet_cache_path(path, cache_dir)
+        if os.path.exists(cache_path):
+            return pd.read_parquet(cache_path)
+
+    if _is_spreadsheet_ml(path):
+        frames = []
+        for _, rows in _iter_spreadsheet_ml(path):
+            header_idx = find_header_row(rows)
+            if header_idx is not None:
+                header = [str(v).strip() if v is not None else '' for v in rows[header_idx]]
+                frames.append(_roll_frame(header, rows[header_idx + 1:]))
+    else:
+        engine = excel_engine(path)
+        sheets = pd.ExcelFile(path, engine=engine).sheet_names
+        if len(sheets) > 1 and not hasattr(path, 'read') and os.path.getsize(path) >= PARALLEL_SHEETS_MIN_BYTES:
+            from pools import process_pool
+            with process_pool(max_workers or min(len(sheets), os.cpu_count() or 1)) as pool:
+                frames = list(pool.map(_read_excel_sheet, [path] * len(sheets), sheets, [engine] * len(sheets)))
+        else:
+            frames = [_read_excel_sheet(path, sheet, engine) for sheet in sheets]
+
+    frames = [f for f in frames if f is not None]
+    if not frames:
+        raise ValueError('Could not find a `PRN` column in any sheet of the uploaded workbook.')
+    df = pd.concat(frames, ignore_index=True)
+    df = df[df['PRN'].notna()].reset_index(drop=True)
+
+    if cache_path:
+        df.to_parquet(cache_path, index=False)
+    return df
@@ -0,0 +1,181 @@
+import threading
+import time
+from contextlib import contextmanager
+
+
+class MetricsRegistry:
+    """Process-wide stage timings and counters in Prometheus text format.
+
+    Every ``Diagnostics.stage`` reports here, so ``/metrics`` shows totals
+    per (component, stage) across all uploads and exports since start-up.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stages = {}
+        self._counters = {}
+
+    def observe(self, component, stage, seconds, rows=None):
+        with self._lock:
+            entry = self._stages.setdefault((component, stage), [0, 0.0, 0])
+            entry[0] += 1
+            entry[1] += seconds
+            entry[2] += rows or 0
+
+    def inc(self, name, value=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def render(self, gauges=None):
+        """Exposition text; ``gauges`` adds ``{name: value}`` point-in-time values"""
+        with self._lock:
+            stages = sorted(self._stages.items())
+            counters = sorted(self._counters.items())
+        lines = [
+            '# HELP seating_stage_seconds Time spent per pipeline stage',
+            '# TYPE seating_stage_seconds summary',
+        ]
+        for (component, stage), (count, seconds, _) in stages:
+            labels = f'component="{component}",stage="{stage}"'
+            lines.append(f'seating_stage_seconds_sum{{{labels}}} {seconds:.6f}')
+            lines.append(f'seating_stage_seconds_count{{{labels}}} {count}')
+        lines += ['# HELP seating_stage_rows_total Rows handled per pipeline stage',
+                  '# TYPE seating_stage_rows_total counter']
+        for (component, stage), (_, _, rows) in stages:
+            lines.append(f'seating_stage_rows_total{{component="{component}",stage="{stage}"}} {rows}')
+        seen = set()
+        for (name, labels), value in counters:
+            if name not in seen:
+                lines.append(f'# TYPE {name} counter')
+                seen.add(name)
+            label_text = ','.join(f'{k}="{v}"' for k, v in labels)
+            lines.append(f'{name}{{{label_text}}} {value}' if label_text else f'{name} {value}')
+        for name, value in sorted((gauges or {}).items()):
+            lines.append(f'# TYPE {name} gauge')
+            lines.append(f'{name} {value}')
+        return '\n'.join(lines) + '\n'
+
+
+# Shared by SeatingProcessor, ExportManager and the front ends
+metrics = MetricsRegistry()
+
+# tracemalloc is process-wide: runs that trace memory share it, and the last
+# one to finish stops it (only if one of them started it)
+_tracing_lock = threading.Lock()
+_tracing_runs = 0
+_started_tracing = False
+
+
+def _acquire_tracing():
+    global _tracing_runs, _started_tracing
+    import tracemalloc
+    with _tracing_lock:
+        if _tracing_runs == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            _started_tracing = True
+        _tracing_runs += 1
+
+
+def _release_tracing():
+    global _tracing_runs, _started_tracing
+    import tracemalloc
+    with _tracing_lock:
+        _tracing_runs -= 1
+        if _tracing_runs == 0 and _started_tracing:
+            tracemalloc.stop()
+            _started_tracing = False
+
+
+class Diagnostics:
+    """Structured timings and counts for one processing or export run.
+
+    ``stage(name, rows)`` times a block of work (and records its peak
+    traced memory when ``trace_memory`` is on; with runs overlapping in
+    other threads the peak is the whole process's); ``counts`` holds row
+    counts such as rows before/after filtering and ``details`` anything
+    else worth showing (recognized branch codes, changed blocks, ...).
+    With ``profile`` on, ``profiling()`` captures a cProfile summary of
+    the whole run.
+    """
+
+    # Functions listed in the cProfile summary
+    PROFILE_LIMIT = 25
+
+    def __init__(self, component='processor', profile=False, trace_memory=False):
+        self.component = component
+        self.profile = profile
+        self.trace_memory = trace_memory
+        self.stages = []
+        self._open = []
+        self.counts = {}
+        self.details = {}
+        self.profile_text = None
+
+    @contextmanager
+    def stage(self, name, rows=None):
+        """Time the enclosed work; the yielded record's 'rows' may be set inside
+
+        A stage opened inside another one records it as its 'parent' and
+        is left out of total_seconds, which the enclosing stage already covers.
+        """
+        record = {'stage': name, 'seconds': 0.0, 'rows': rows}
+        if self._open:
+            record['parent'] = self._open[-1]
+        self._open.append(name)
+        # Profiling modules are only imported when asked for (they slow cold starts)
+        tracemalloc = self.trace_memory and __import__('tracemalloc')
+        if tracemalloc and tracemalloc.is_tracing():
+            tracemalloc.reset_peak()
+        start = time.perf_counter()
+        try:
+            yield record
+        finally:
+            self._open.pop()
+            record['seconds'] = round(time.perf_counter() - start, 6)
+            if tracemalloc and tracemalloc.is_tracing():
+                record['peakMB'] = round(tracemalloc.get_traced_memory()[1] / (1024 * 1024), 2)
+            self.stages.append(record)
+            metrics.observe(self.component, name, record['seconds'], record['rows'])
+
+    @contextmanager
+    def profiling(self):
+        """cProfile and/or tracemalloc around a whole run, when enabled"""
+        if not (self.profile or self.trace_memory):
+            yield self
+            return
+        import cProfile
+        import io
+        import pstats
+
+        if self.trace_memory:
+            _acquire_tracing()
+        profiler = cProfile.Profile() if self.profile else None
+        if profiler:
+            profiler.enable()
+        try:
+            yield self
+        finally:
+            if profiler:
+                profiler.disable()
+                out = io.StringIO()
+                pstats.Stats(profiler, stream=out).sort_stats('cumulative').print_stats(self.PROFILE_LIMIT)
+                self.profile_text = out.getvalue()
+            if self.trace_memory:
+                _release_tracing()
+
+    @property
+    def total_seconds(self):
+        return round(sum(s['seconds'] for s in self.stages if 'parent' not in s), 6)
+
+    def to_dict(self):
+        out = {
+            'component': self.component,
+            'stages': list(self.stages),
+            'totalSeconds': self.total_seconds,
+            'counts': dict(self.counts),
+            'details': dict(self.details),
+        }
+        if self.profile_text:
+            out['profile'] = self.profile_text
+        return out
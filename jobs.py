@@ -0,0 +1,153 @@
+import os
+import shutil
+import threading
+import time
+import traceback
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+
+class QueueFull(Exception):
+    """Raised when a JobQueue already holds its maximum of unfinished jobs"""
+
+
+class Job:
+    """One background task: status, progress and the artifacts it produced.
+
+    ``status`` moves queued -> running -> done/failed. Work functions call
+    ``update(progress, message)`` (progress 0..1) and ``add_artifact`` for
+    files they write under ``directory``; every change bumps ``version``
+    and wakes anyone in ``wait``.
+    """
+
+    def __init__(self, kind, directory):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.directory = os.path.join(directory, self.id)
+        self.status = 'queued'
+        self.progress = 0.0
+        self.message = 'Queued'
+        self.error = None
+        self.result = {}
+        self.artifacts = {}
+        self.created = time.time()
+        self.finished = None
+        self.version = 0
+        self._changed = threading.Condition()
+
+    def _touch(self):
+        with self._changed:
+            self.version += 1
+            self._changed.notify_all()
+
+    def update(self, progress=None, message=None):
+        if progress is not None:
+            self.progress = max(0.0, min(1.0, progress))
+        if message is not None:
+            self.message = message
+        self._touch()
+
+    def add_artifact(self, name, mimetype, download_name=None):
+        """Register ``directory/name`` (already written) for download"""
+        self.artifacts[name] = {'mimetype': mimetype, 'downloadName': download_name or name}
+        self._touch()
+
+    def artifact_path(self, name):
+        if not os.path.exists(self.directory):
+            os.makedirs(self.directory)
+        return os.path.join(self.directory, name)
+
+    @property
+    def done(self):
+        return self.status in ('done', 'failed')
+
+    def wait(self, version, timeout=None):
+        """Block until ``version`` is out of date (or timeout); returns the current version"""
+        with self._changed:
+            self._changed.wait_for(lambda: self.version != version, timeout)
+            return self.version
+
+    def to_dict(self):
+        return {
+            'jobId': self.id,
+            'kind': self.kind,
+            'status': self.status,
+            'progress': round(self.progress, 3),
+            'message': self.message,
+            'error': self.error,
+            'result': self.result,
+            'artifacts': sorted(self.artifacts)
+        }
+
+
+class JobQueue:
+    """Bounded background job runner.
+
+    Jobs run on a pool of ``max_workers`` threads (seating and export
+    release the GIL in pandas/zlib and large PDFs already fan out to a
+    process pool), so many coordinators can submit at once without tying
+    up request workers. At most ``max_pending`` unfinished jobs are
+    accepted; finished jobs and their artifact files are dropped after
+    ``ttl`` seconds.
+    """
+
+    def __init__(self, directory, max_workers=4, max_pending=64, ttl=3600):
+        self.directory = directory
+        self.max_pending = max_pending
+        self.ttl = ttl
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='job')
+        self._jobs = {}
+        self._lock = threading.Lock()
+        if not os.path.exists(directory):
+            os.makedirs(directory)
+
+    def submit(self, kind, fn, *args, **kwargs):
+        """Queue ``fn(job, *args, **kwargs)``; its return value (a dict) becomes ``job.result``"""
+        self._expire()
+        with self._lock:
+            pending = sum(1 for job in self._jobs.values() if not job.done)
+            if pending >= self.max_pending:
+                raise QueueFull(f'{pending} jobs are already waiting; try again shortly')
+            job = Job(kind, self.directory)
+            self._jobs[job.id] = job
+        self._pool.submit(self._run, job, fn, args, kwargs)
+        return job
+
+    def _run(self, job, fn, args, kwargs):
+        job.status = 'running'
+        job.update(message='Running')
+        try:
+            job.result = fn(job, *args, **kwargs) or {}
+            job.status = 'done'
+            progress, message = 1.0, 'Done'
+        except Exception as e:
+            job.error = str(e)
+            job.status = 'failed'
+            progress, message = None, 'Failed'
+            traceback.print_exc()
+        job.finished = time.time()
+        job.update(progress, message)
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def _expire(self):
+        now = time.time()
+        with self._lock:
+            expired = [job for job in self._jobs.values()
+                       if job.finished is not None and now - job.finished > self.ttl]
+            for job in expired:
+                del self._jobs[job.id]
+        for job in expired:
+            shutil.rmtree(job.directory, ignore_errors=True)
+
+    def stats(self):
+        with self._lock:
+            counts = {}
+            for job in self._jobs.values():
+                counts[job.status] = counts.get(job.status, 0) + 1
+            return counts
+
+    def shutdown(self, wait=True):
+        self._pool.shutdown(wait=wait)
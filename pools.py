@@ -0,0 +1,17 @@
+"""
+Process pools that are safe to start from the web servers
+
+Flask, Streamlit and the job queue run many threads. Forking such a process
+copies locks that other threads may be holding, and a worker can hang on
+one forever. Pools made here start their workers with 'forkserver' where
+the platform has it (else 'spawn'), from a clean single-threaded process.
+"""
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+START_METHOD = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+
+
+def process_pool(max_workers=None):
+    """A ProcessPoolExecutor whose workers are not forked from the calling process"""
+    return ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context(START_METHOD))
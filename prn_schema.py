@@ -0,0 +1,167 @@
+"""
+PRN layout: the fields a PRN encodes, decoded by fixed-width slicing
+
+    16 digits   25 0 6321 1 11242 018    year(2) 0 center(4) level(1) branch(5) roll(3)
+    T-prefixed  T 21 6321 1612 501       T year(2) center(4) branch(last 4) roll(3)
+
+The 16-digit field offsets follow PRN_LENGTH / PRN_BRANCH_CODE_START /
+PRN_BRANCH_CODE_LENGTH. Anything matching neither layout is malformed: it
+is still seated (its branch comes from the branch registry's search) but
+has no decoded fields, and ``malformed_report`` summarizes such PRNs.
+"""
+import threading
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+FIELDS = ['AdmissionYear', 'Center', 'Level', 'BranchDigits', 'Roll', 'Problem']
+
+# Decoded PRNs remembered across uploads (per process)
+MEMO_SIZE = 200000
+
+# Malformed PRNs listed by malformed_report
+REPORT_EXAMPLES = 20
+
+
+class PRNDecoder:
+    """Vectorized PRN decoding with an LRU memo of already decoded PRNs.
+
+    ``decode(prns)`` returns a frame aligned with ``prns`` holding FIELDS:
+    the four-digit admission year, center code, level digit (16-digit PRNs
+    only), branch digits, roll number and, for malformed PRNs, the reason
+    (with every other field missing). Each distinct PRN is decoded once;
+    later calls (the next upload, a re-seat) take it from the memo.
+    """
+
+    def __init__(self, prn_length=16, branch_start=8, branch_length=5, memo_size=MEMO_SIZE):
+        self.prn_length = prn_length
+        self.branch_start = branch_start
+        self.branch_length = branch_length
+        self.memo_size = memo_size
+        # (decoded rows indexed by normalized PRN, the call number each row was last used in)
+        self._memo = (self._frame(pd.Index([], dtype=object)), np.zeros(0, dtype=np.int64))
+        self._calls = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    @lru_cache(maxsize=8)
+    def shared(prn_length=16, branch_start=8, branch_length=5):
+        """The process-wide decoder (and memo) for this layout"""
+        return PRNDecoder(prn_length, branch_start, branch_length)
+
+    def decode(self, prns):
+        keys = prns.astype(str).fillna('').str.strip().str.upper()
+        codes, unique = pd.factorize(keys)
+        unique = pd.Index(unique, dtype=object)
+        with self._lock:
+            self._calls += 1
+            call = self._calls
+            memo, used = self._memo
+            pos = memo.index.get_indexer(unique)
+            hit = pos >= 0
+            used[pos[hit]] = call
+            self.hits += int(hit.sum())
+            self.misses += int((~hit).sum())
+
+        table = memo.iloc[pos[hit]]
+        if not hit.all():
+            fresh = self._decode_unique(unique[~hit])
+            table = pd.concat([table, fresh]).reindex(unique) if hit.any() else fresh
+            with self._lock:
+                memo, used = self._memo
+                new = unique[~hit][memo.index.get_indexer(unique[~hit]) < 0]
+                memo = pd.concat([memo, fresh.loc[new]])
+                memo.index = memo.index.astype(object)
+                used = np.concatenate([used, np.full(len(new), call, dtype=np.int64)])
+                if len(memo) > self.memo_size:
+                    # Evict the least recently used rows
+                    keep = np.sort(np.argsort(used, kind='stable')[-self.memo_size:])
+                    memo, used = memo.iloc[keep], used[keep]
+                self._memo = (memo, used)
+        return table.take(codes).set_index(prns.index)
+
+    @staticmethod
+    def _frame(index, columns=None):
+        columns = columns or {}
+        n = len(index)
+        # Text fields stay object dtype, so memo rows and fresh rows concatenate without casting
+        frame = pd.DataFrame({field: pd.Series(columns.get(field, np.full(n, None, dtype=object)), index=index,
+                                               dtype=object if field not in ('AdmissionYear', 'Roll') else None)
+                              for field in FIELDS}, index=index)
+        return frame.astype({'AdmissionYear': 'Int64', 'Roll': 'Int64'})
+
+    def _decode_unique(self, keys):
+        """Decode distinct, normalized PRNs (an Index) with whole-column string slicing"""
+        n = len(keys)
+        text = pd.Series(keys, dtype=str)
+        digits = text.str.replace(r'\D', '', regex=True)
+        lengths = digits.str.len().to_numpy()
+        t_prefixed = text.str.startswith('T').to_numpy(dtype=bool)
+
+        full = ~t_prefixed & (lengths == self.prn_length) & (digits.str[2] == '0').to_numpy(dtype=bool)
+        # T + year(2) center(4) branch(4) roll(3)
+        short = t_prefixed & (lengths == 13)
+
+        columns = {
+            'AdmissionYear': np.full(n, np.nan),
+            'Center': np.full(n, None, dtype=object),
+            'Level': np.full(n, None, dtype=object),
+            'BranchDigits': np.full(n, None, dtype=object),
+            'Roll': np.full(n, np.nan),
+            'Problem': np.full(n, None, dtype=object),
+        }
+        branch_stop = self.branch_start + self.branch_length
+        for mask, fields in ((full, {'AdmissionYear': (0, 2), 'Center': (3, 7), 'Level': (7, self.branch_start),
+                                     'BranchDigits': (self.branch_start, branch_stop),
+                                     'Roll': (branch_stop, self.prn_length)}),
+                             (short, {'AdmissionYear': (0, 2), 'Center': (2, 6), 'BranchDigits': (6, 10),
+                                      'Roll': (10, 13)})):
+            if not mask.any():
+                continue
+            part = digits[mask]
+            for field, (start, stop) in fields.items():
+                values = part.str[start:stop]
+                columns[field][mask] = (values.astype(int).to_numpy() if field in ('AdmissionYear', 'Roll')
+                                        else values.to_numpy(dtype=object))
+        columns['AdmissionYear'] += 2000
+
+        bad = ~(full | short)
+        if bad.any():
+            columns['Problem'][bad] = np.where(
+                lengths[bad] == 0, 'no digits',
+                np.where((lengths[bad] == self.prn_length) & ~t_prefixed[bad], 'unexpected digit after year',
+                         'unexpected length (' + lengths[bad].astype(str) + ' digits)'))
+        return self._frame(keys, columns)
+
+    def clear(self):
+        with self._lock:
+            self._memo = (self._frame(pd.Index([], dtype=object)), np.zeros(0, dtype=np.int64))
+
+
+def academic_session(exam_date, start_month=8):
+    """Calendar year the academic year of ``exam_date`` began in
+
+    The academic year starts in ``start_month``: an exam before then belongs
+    to the academic year that began the previous calendar year.
+    """
+    return exam_date.year if exam_date.month >= start_month else exam_date.year - 1
+
+
+def class_year(admission_years, exam_date, start_month=8, max_year=4):
+    """Year of study (1..max_year) from four-digit admission years, NaN when implausible"""
+    session = academic_session(exam_date, start_month)
+    years = session - pd.to_numeric(admission_years, errors='coerce').astype(float) + 1
+    return years.where((years >= 1) & (years <= max_year))
+
+
+def malformed_report(prns, problems, examples=REPORT_EXAMPLES):
+    """{'count', 'reasons': {reason: count}, 'examples': [PRN, ...]} for PRNs with a problem"""
+    bad = problems.notna()
+    return {
+        'count': int(bad.sum()),
+        'reasons': {reason: int(n) for reason, n in problems[bad].value_counts().items()},
+        'examples': prns[bad].astype(str).head(examples).tolist(),
+    }
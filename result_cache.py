@@ -0,0 +1,146 @@
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+
+class ResultCache:
+    """Two-level cache of processed seating results, keyed by content hash.
+
+    Values are the serialized JSON of a result, so a hit needs no pandas
+    work. The memory layer is an LRU of ``max_entries`` items; the optional
+    disk layer stores gzip'd JSON under ``cache_dir`` and evicts entries
+    older than ``ttl`` seconds, then the oldest ones, to stay under
+    ``max_disk_bytes``.
+    """
+
+    def __init__(self, cache_dir=None, max_entries=32, max_disk_bytes=256 * 1024 * 1024,
+                 ttl=7 * 24 * 3600):
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        self.max_disk_bytes = max_disk_bytes
+        self.ttl = ttl
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.memory_hits = 0
+        self.disk_hits = 0
+        if cache_dir and not os.path.exists(cache_dir):
+            os.makedirs(cache_dir)
+
+    @staticmethod
+    def make_key(content, branch_codes, students_per_block, extension='', fingerprint='', as_of=''):
+        """Hash of the file bytes plus everything that changes the result
+
+        ``fingerprint`` identifies the rest of the settings (Settings.fingerprint),
+        so a reloaded center code or season mapping is not served from the cache.
+        ``as_of`` holds the date-dependent inputs (seating_processor.date_key):
+        the exam type and the academic session the class years are counted in.
+        """
+        h = hashlib.sha256(content)
+        h.update(json.dumps(dict(branch_codes), sort_keys=True).encode())
+        h.update(f"|{students_per_block}|{extension.lower()}|{fingerprint}|{as_of}".encode())
+        return h.hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key + '.json.gz')
+
+    def get(self, key):
+        """Cached JSON string for ``key``, or None"""
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                self.memory_hits += 1
+                return self._memory[key]
+
+        if self.cache_dir:
+            path = self._path(key)
+            try:
+                if time.time() - os.path.getmtime(path) <= self.ttl:
+                    with gzip.open(path, 'rt', encoding='utf-8') as f:
+                        value = f.read()
+                    with self._lock:
+                        self.hits += 1
+                        self.disk_hits += 1
+                        self._remember(key, value)
+                    return value
+                os.remove(path)
+            except OSError:
+                pass
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, key, value):
+        """Store a JSON string in memory and (if configured) on disk"""
+        with self._lock:
+            self._remember(key, value)
+        if self.cache_dir:
+            tmp = self._path(key) + f'.{os.getpid()}.{threading.get_ident()}.tmp'
+            with gzip.open(tmp, 'wt', encoding='utf-8') as f:
+                f.write(value)
+            os.replace(tmp, self._path(key))
+            self._evict_disk()
+
+    def _remember(self, key, value):
+        self._memory[key] = value
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def _evict_disk(self):
+        """Drop expired entries, then oldest ones until under max_disk_bytes"""
+        now = time.time()
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith('.json.gz'):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            if now - stat.st_mtime > self.ttl:
+                self._remove(path)
+            else:
+                entries.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_disk_bytes:
+                break
+            self._remove(path)
+            total -= size
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def clear(self):
+        """Empty both layers (counters are kept)"""
+        with self._lock:
+            self._memory.clear()
+        if self.cache_dir:
+            for name in os.listdir(self.cache_dir):
+                if name.endswith('.json.gz'):
+                    self._remove(os.path.join(self.cache_dir, name))
+
+    def stats(self):
+        """Hit/miss counters and current sizes"""
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'memoryHits': self.memory_hits,
+                'diskHits': self.disk_hits,
+                'memoryEntries': len(self._memory)
+            }
@@ -0,0 +1,132 @@
+import bisect
+import csv
+import json
+import os
+import numpy as np
+
+
+class Room:
+    """An exam hall: a ``rows`` x ``cols`` desk grid with some seats blocked.
+
+    Usable seats are numbered row by row (desk 1 is row 1, col 1) skipping
+    ``blocked`` (1-based (row, col) pairs). ``capacity`` caps how many of
+    them are used and defaults to all of them; a capacity the grid cannot
+    seat is rejected. ``seat_rows``/``seat_cols``
+    map desk index (0-based) to its 1-based grid position.
+    """
+
+    __slots__ = ('name', 'rows', 'cols', 'blocked', 'capacity', 'seat_rows', 'seat_cols')
+
+    def __init__(self, name, rows, cols, capacity=None, blocked=()):
+        self.name = str(name)
+        self.rows = int(rows)
+        self.cols = int(cols)
+        if self.rows <= 0 or self.cols <= 0:
+            raise ValueError(f"Room {self.name}: rows and cols must be positive")
+        self.blocked = sorted({(int(r), int(c)) for r, c in blocked})
+
+        open_seats = np.ones((self.rows, self.cols), dtype=bool)
+        for r, c in self.blocked:
+            if not (1 <= r <= self.rows and 1 <= c <= self.cols):
+                raise ValueError(f"Room {self.name}: blocked seat ({r}, {c}) is outside the grid")
+            open_seats[r - 1, c - 1] = False
+        rows_idx, cols_idx = np.nonzero(open_seats)
+
+        usable = len(rows_idx)
+        self.capacity = usable if capacity in (None, '') else int(capacity)
+        if not 1 <= self.capacity <= usable:
+            raise ValueError(f"Room {self.name}: capacity {self.capacity} does not fit its "
+                             f"{self.rows}x{self.cols} grid ({usable} usable seats)")
+        self.seat_rows = rows_idx[:self.capacity] + 1
+        self.seat_cols = cols_idx[:self.capacity] + 1
+
+    def __repr__(self):
+        return f"Room({self.name!r}, {self.rows}x{self.cols}, capacity={self.capacity})"
+
+    def layout(self):
+        """JSON-ready grid description for exports"""
+        return {'room': self.name, 'rows': self.rows, 'cols': self.cols,
+                'capacity': self.capacity, 'blocked': [list(seat) for seat in self.blocked]}
+
+    @classmethod
+    def from_layout(cls, layout):
+        """Rebuild a room from a block's ``layout`` dict"""
+        return cls(layout['room'], layout['rows'], layout['cols'], capacity=layout.get('capacity'),
+                   blocked=layout.get('blocked', ()))
+
+
+def _parse_blocked(value):
+    """'1-1; 6-5' (row-col pairs) or a list of pairs -> [(row, col), ...]"""
+    if not value:
+        return []
+    if isinstance(value, str):
+        pairs = [p.strip() for p in value.replace(',', ';').split(';') if p.strip()]
+        return [tuple(int(x) for x in p.split('-', 1)) for p in pairs]
+    return [tuple(p) for p in value]
+
+
+class RoomInventory:
+    """The halls available for an exam, in their listed order.
+
+    ``pack(total)`` chooses which rooms to open for ``total`` students.
+    """
+
+    def __init__(self, rooms):
+        self.rooms = list(rooms)
+        names = [room.name for room in self.rooms]
+        if len(set(names)) != len(names):
+            raise ValueError("Room names must be unique")
+
+    def __len__(self):
+        return len(self.rooms)
+
+    def __iter__(self):
+        return iter(self.rooms)
+
+    @property
+    def capacity(self):
+        return sum(room.capacity for room in self.rooms)
+
+    @classmethod
+    def from_records(cls, records):
+        """Build from dicts with name/rows/cols and optional capacity/blocked"""
+        rooms = []
+        for rec in records:
+            rec = {k.strip().lower(): v for k, v in rec.items()}
+            rooms.append(Room(rec.get('name') or rec.get('room'), rec['rows'], rec['cols'],
+                              capacity=rec.get('capacity'), blocked=_parse_blocked(rec.get('blocked'))))
+        return cls(rooms)
+
+    @classmethod
+    def load(cls, path):
+        """Read a room list from JSON (list of objects) or CSV (Room,Rows,Cols,Capacity,Blocked)"""
+        if os.path.splitext(path)[1].lower() == '.json':
+            with open(path, encoding='utf-8') as f:
+                return cls.from_records(json.load(f))
+        with open(path, newline='', encoding='utf-8-sig') as f:
+            return cls.from_records(list(csv.DictReader(f)))
+
+    def pack(self, total):
+        """Rooms to open for ``total`` students, with how many sit in each.
+
+        First-fit decreasing: the largest rooms are filled while the rest
+        still needs more than one room, then the remainder goes to the
+        smallest room that can hold it, which keeps the number of rooms and
+        empty seats low. Returns ``[(room, count)]`` in inventory order.
+        """
+        if total > self.capacity:
+            raise ValueError(f"Rooms seat {self.capacity} students but {total} need seats")
+        by_size = sorted(range(len(self.rooms)), key=lambda i: -self.rooms[i].capacity)
+        capacities = [self.rooms[i].capacity for i in by_size]
+        counts = {}
+        remaining = total
+        pos = 0
+        while remaining > 0 and remaining > capacities[pos]:
+            counts[by_size[pos]] = capacities[pos]
+            remaining -= capacities[pos]
+            pos += 1
+        if remaining > 0:
+            # Smallest unused room that holds everyone left (capacities are descending)
+            last = pos + bisect.bisect_right([-c for c in capacities[pos:]], -remaining) - 1
+            counts[by_size[last]] = remaining
+        return [(self.rooms[i], counts[i]) for i in sorted(counts)]
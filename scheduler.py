@@ -0,0 +1,148 @@
+import hashlib
+import json
+import os
+import pandas as pd
+from allocation import InterleavedAllocator
+from ingest import excel_engine, is_spreadsheet
+from pools import process_pool
+from seating_processor import SeatingProcessor
+
+
+# Columns every timetable needs (one row per enrolled student per paper)
+TIMETABLE_COLUMNS = ['Paper', 'Date', 'Slot', 'PRN']
+
+
+def timetable_from_papers(papers):
+    """Timetable frame from ``{paper: {'date': ..., 'slot': ..., 'prns': [...]}}``"""
+    rows = [(paper, info['date'], info.get('slot', ''), prn)
+            for paper, info in papers.items() for prn in info['prns']]
+    return normalize_timetable(pd.DataFrame(rows, columns=TIMETABLE_COLUMNS))
+
+
+def normalize_timetable(df):
+    """Canonical column names, stripped strings and parsed dates; raises on missing data"""
+    df = df.rename(columns={c: c.strip().title() for c in df.columns})
+    df = df.rename(columns={'Prn': 'PRN'})
+    missing = [c for c in TIMETABLE_COLUMNS if c not in df.columns]
+    if missing:
+        raise ValueError(f"Timetable is missing column(s): {', '.join(missing)}")
+
+    df = df.dropna(subset=['PRN']).copy()
+    for col in ('Paper', 'Slot', 'PRN'):
+        df[col] = df[col].fillna('').astype(str).str.strip()
+    dates = pd.to_datetime(df['Date'], errors='coerce')
+    bad = df.loc[dates.isna(), 'Paper'].unique().tolist()
+    if bad:
+        raise ValueError(f"Timetable has missing or invalid dates for paper(s): {', '.join(bad)}")
+    df['Date'] = dates.dt.date
+    return df[df['PRN'] != ''].reset_index(drop=True)
+
+
+def load_timetable(path):
+    """Read a timetable CSV/Excel sheet (Paper, Date, Slot, PRN; Name/Year optional)
+    or a JSON ``{paper: {date, slot, prns}}`` file"""
+    if os.path.splitext(path)[1].lower() == '.json':
+        with open(path, encoding='utf-8') as f:
+            return timetable_from_papers(json.load(f))
+    if is_spreadsheet(path):
+        df = pd.read_excel(path, dtype=str, engine=excel_engine(path))
+    else:
+        df = pd.read_csv(path, dtype=str)
+    return normalize_timetable(df)
+
+
+def _seat_session(frame, branch_codes, allocator, group_by, rooms, exam_date, slot):
+    """Seat one session's students (runs in a worker process)"""
+    processor = SeatingProcessor(None, branch_codes, allocator=allocator, group_by=group_by,
+                                 rooms=rooms, frame=frame, exam_date=exam_date, slot=slot)
+    return processor.process()
+
+
+class ExamScheduler:
+    """Seat every session of a timetable in one batch run.
+
+    A session is one (date, slot): all papers written in it share the same
+    rooms, which are free again for the next session. By default students
+    of the same paper are kept off adjacent desks (InterleavedAllocator
+    grouped by 'Paper').
+
+    Each session's result is kept under a hash of its rows, so running
+    ``schedule`` again after one paper's roster changes only re-seats the
+    sessions that paper is in. Sessions that do need seating run on a
+    process pool of ``workers`` processes (None = all cores, 1 = inline).
+    """
+
+    def __init__(self, branch_codes, rooms=None, allocator=None, group_by='Paper', workers=None):
+        self.branch_codes = branch_codes
+        self.rooms = rooms
+        self.allocator = allocator or InterleavedAllocator()
+        self.group_by = group_by
+        self.workers = workers
+        self._results = {}
+        self.last_run = {}
+
+    @staticmethod
+    def session_key(exam_date, slot, frame):
+        """Hash of a session's date, slot and (order-independent) enrolment rows"""
+        rows = frame.sort_values(['Paper', 'PRN']).to_csv(index=False)
+        return hashlib.sha1(f"{exam_date}|{slot}|{rows}".encode()).hexdigest()
+
+    @staticmethod
+    def sessions(timetable):
+        """(date, slot, frame) per session, by date; slots keep timetable order"""
+        out = []
+        for (exam_date, slot), frame in timetable.groupby(['Date', 'Slot'], sort=False):
+            out.append((exam_date, slot, frame.reset_index(drop=True)))
+        out.sort(key=lambda s: s[0])
+        return out
+
+    def schedule(self, timetable):
+        """Seat all sessions; returns ``{(date, slot): SeatingResult}`` in session order.
+
+        A student enrolled in two papers of the same session is seated once
+        (for the first listed paper) and reported in that session's
+        ``diagnostics.details['enrolment_clashes']``.
+        """
+        if not isinstance(timetable, pd.DataFrame):
+            timetable = load_timetable(timetable)
+
+        planned = []
+        pending = []
+        for exam_date, slot, frame in self.sessions(timetable):
+            clashes = sorted(frame.loc[frame.duplicated('PRN'), 'PRN'].unique().tolist())
+            frame = frame.drop_duplicates('PRN').reset_index(drop=True)
+            key = self.session_key(exam_date, slot, frame)
+            planned.append((exam_date, slot, key, frame, clashes))
+            if key not in self._results:
+                pending.append((exam_date, slot, key, frame))
+
+        n = len(pending)
+        args = ([p[3] for p in pending], [self.branch_codes] * n, [self.allocator] * n,
+                [self.group_by] * n, [self.rooms] * n, [p[0] for p in pending], [p[1] for p in pending])
+        if self.workers == 1 or n < 2:
+            seated = list(map(_seat_session, *args))
+        else:
+            with process_pool(self.workers) as pool:
+                seated = list(pool.map(_seat_session, *args))
+        fresh = {item[2]: result for item, result in zip(pending, seated)}
+
+        results = {}
+        reused = 0
+        for exam_date, slot, key, frame, clashes in planned:
+            if key in fresh:
+                result = fresh[key]
+            else:
+                result = self._results[key]
+                reused += 1
+            result.diagnostics.details['papers'] = frame['Paper'].value_counts(sort=False).to_dict()
+            result.diagnostics.details['enrolment_clashes'] = clashes
+            results[(exam_date, slot)] = result
+
+        # Keep only this run's sessions so the cache tracks the current timetable
+        self._results = {key: results[(d, s)] for d, s, key, _, _ in planned}
+        self.last_run = {
+            'sessions': len(planned),
+            'recomputed': [(d.isoformat(), s) for d, s, _, _ in pending],
+            'reused': reused
+        }
+        return results
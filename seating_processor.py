@@ -1,187 +1,480 @@
+import numpy as np
 import pandas as pd
-import re
 from datetime import datetime
+from allocation import SequentialAllocator
+from block_builder import BlockBuilder
+from branch_registry import BranchRegistry
+from ingest import (SORT_KEYS, is_spreadsheet, iter_chunks, prepare_chunk, read_spreadsheet,
+                    sniff_columns)
+from instrumentation import Diagnostics
+from prn_schema import academic_session, class_year, malformed_report
+from rooms import Room, RoomInventory
+from seating_result import SeatingBlocks, SeatingResult, blocks_of
+from settings import get_settings
+
 
 class SeatingProcessor:
-    """Process CSV files and create seating arrangements"""
+    """Process CSV/Excel roll lists and create seating arrangements
+
+    With ``streaming=True`` the CSV is read ``chunksize`` rows at a time and
+    only the PRN/name/year columns of each chunk are kept, so other columns
+    of a very large roll list never reach memory. The kept rows are still
+    gathered into one frame and sorted in memory.
+
+    .xls/.xlsx workbooks are read with ``ingest.read_spreadsheet``, which
+    keeps a Parquet copy in ``cache_dir`` (default: SPREADSHEET_CACHE_DIR)
+    for fast reprocessing.
+
+    Seats are assigned by ``allocator`` (see allocation.py); the default
+    SequentialAllocator cuts the sorted list into consecutive blocks, while
+    e.g. InterleavedAllocator keeps students of the same ``group_by``
+    column off adjacent desks. Pass ``rooms`` (a RoomInventory, or set
+    ROOMS_FILE) to seat students into real halls and desk grids.
+
+    ``branch_codes`` is a branch map or a BranchRegistry; None uses the
+    configured BRANCH_CODES. Either way the compiled registry is shared
+    with every other processor using the same map. Settings (block size,
+    rooms, center code, ...) come from ``settings.get_settings()`` when the
+    processor is created; setting STUDENTS_PER_BLOCK/MAX_STUDENTS_IN_BLOCK
+    on the class overrides them.
+
+    ``frame`` seats an already-loaded DataFrame (with a PRN column) instead
+    of reading ``filepath``; ``exam_date`` (a date) and ``slot`` label the
+    session, fill each block's date and pick the exam season.
+
+    PRNs are decoded by their layout (prn_schema): the admission year gives
+    each student's year of study as of the exam date, and the center code
+    each block's centerCode (``center_code``, default CENTER_CODE, is used
+    for PRNs without one). PRNs matching no layout are reported in bulk
+    in ``diagnostics.details['malformed_prns']``.
+
+    Each stage (read, branch extraction, sort, allocation, ...) is timed
+    into ``self.diagnostics``, which travels with the result; ``profile``
+    and ``trace_memory`` (default: PROFILE_STAGES/TRACE_MEMORY) add a
+    cProfile summary and per-stage peak memory.
+    """
+
+    # None: use the current settings
+    STUDENTS_PER_BLOCK = None
+    MAX_STUDENTS_IN_BLOCK = None
     
-    def __init__(self, filepath, branch_codes):
+    def __init__(self, filepath, branch_codes=None, streaming=False, chunksize=100000,
+                 cache_dir=None, allocator=None, group_by='Branch', rooms=None, frame=None,
+                 exam_date=None, slot='', profile=None, trace_memory=None, center_code=None):
+        settings = get_settings()
         self.filepath = filepath
-        self.branch_codes = branch_codes
+        self.frame = frame
+        self.exam_date = exam_date
+        self.slot = slot
+        self.STUDENTS_PER_BLOCK = self.STUDENTS_PER_BLOCK or settings.STUDENTS_PER_BLOCK
+        self.MAX_STUDENTS_IN_BLOCK = self.MAX_STUDENTS_IN_BLOCK or settings.MAX_STUDENTS_IN_BLOCK
+        self.center_code = center_code or settings.CENTER_CODE
+        self.winter_months = settings.WINTER_MONTHS
+        self.summer_months = settings.SUMMER_MONTHS
+        self.decoder = settings.prn_decoder
+        self.academic_year_start = settings.ACADEMIC_YEAR_START_MONTH
+        self.max_study_year = settings.MAX_STUDY_YEAR
+        if branch_codes is None:
+            self.matcher = settings.branches
+        else:
+            self.matcher = BranchRegistry.shared(branch_codes, settings.PRN_BRANCH_CODE_START,
+                                                 settings.PRN_BRANCH_CODE_LENGTH, settings.PRN_LENGTH)
+        self.branch_codes = self.matcher.branch_codes
+        self.streaming = streaming
+        self.chunksize = chunksize
+        self.cache_dir = settings.SPREADSHEET_CACHE_DIR if cache_dir is None else cache_dir
+        if rooms is None and settings.ROOMS_FILE:
+            rooms = RoomInventory.load(settings.ROOMS_FILE)
+        if allocator is None:
+            allocator = SequentialAllocator(rooms=rooms)
+        elif rooms is not None:
+            allocator.rooms = rooms
+        self.allocator = allocator
+        self.group_by = group_by
+        self.allocation = None
+        self.profile = settings.PROFILE_STAGES if profile is None else profile
+        self.trace_memory = settings.TRACE_MEMORY if trace_memory is None else trace_memory
+        self.diagnostics = self._new_diagnostics()
         self.df = None
         self.blocks = []
+        self.block_builder = None
     
     def extract_branch_code(self, prn):
         """Robustly extract a branch code (one of the keys in self.branch_codes) from PRN.
 
-        Strategy:
+        Strategy (see BranchRegistry):
         - Normalize to string and keep only digits
-        - Search for any configured branch code substring inside the digits
+        - A full-length PRN whose branch-code position holds a known code uses it
+        - Otherwise search for any configured branch code substring inside the digits
+          (longest codes first)
         - If no exact match, use last 5 digits as fallback (don't filter out)
         - Always return something to keep the row
         """
         try:
-            if prn is None:
-                return None
-            s = str(prn)
-            digits = re.sub(r"\D", "", s)
-            if not digits:
-                return None
-
-            # Search for any known branch code inside the digits string
-            for code in self.branch_codes.keys():
-                if code in digits:
-                    return code
-
-            # Fallback: if digits length >= 5, return last 5 digits as is
-            # This keeps the row instead of filtering it out
-            if len(digits) >= 5:
-                return digits[-5:]
-
-            # If very short, return as is (still keeps row)
-            return digits if len(digits) > 0 else None
+            return self.matcher.code_of(prn)
         except Exception:
             return None
     
+    def _new_diagnostics(self):
+        return Diagnostics('processor', profile=self.profile, trace_memory=self.trace_memory)
+
     def process(self):
         """Main processing function"""
-        # Read CSV
-        self.df = pd.read_csv(self.filepath)
-
-        # Normalize column names (strip whitespace)
-        self.df.columns = [c.strip() for c in self.df.columns]
-
-        # Find PRN column (case-insensitive)
-        prn_col = None
-        for c in self.df.columns:
-            if c.strip().lower() == 'prn':
-                prn_col = c
-                break
-        if prn_col is None:
-            raise ValueError('Could not find a `PRN` column in the uploaded CSV.')
-
-        # Clean PRN values
-        self.df['PRN'] = self.df[prn_col].astype(str).str.strip()
-
-        # Extract branch code and branch name
-        self.df['BranchCode'] = self.df['PRN'].apply(self.extract_branch_code)
-        self.df['Branch'] = self.df['BranchCode'].map(self.branch_codes)
-
-        # Remove rows with completely empty branch codes (but keep fallback codes)
-        before_count = len(self.df)
-        self.df = self.df[self.df['BranchCode'].notna()].copy()
-        after_count = len(self.df)
-        
-        # For rows without recognized branch codes, assign a generic "Other" label
-        self.df['Branch'] = self.df.apply(
-            lambda row: self.branch_codes.get(row['BranchCode'], 'Other'),
-            axis=1
+        self.diagnostics = diagnostics = self._new_diagnostics()
+        with diagnostics.profiling():
+            if self.streaming:
+                before_count, after_count = self._load_streaming()
+            else:
+                before_count, after_count = self._load()
+            self._decode_prns(self.df.index)
+
+            # Create blocks of 30 students (if any remain after filtering)
+            self.create_blocks()
+
+        diagnostics.counts.update({
+            'rows_before_filter': before_count,
+            'rows_after_filter': after_count,
+            'blocks': len(self.blocks),
+            'constraint_violations': self.allocation.violations
+        })
+        diagnostics.details['recognized_branch_codes'] = list(self.branch_codes.keys())
+
+        # Prepare output data (columnar; blocks/students are built on access)
+        output_data = SeatingResult(
+            self.block_builder,
+            exam_type=self.blocks.exam_type,
+            timestamp=datetime.now().isoformat(),
+            diagnostics=diagnostics
         )
         
-        # Sort by branch name, branch code and then by PRN so output groups by branch (alphabetical)
-        # Ensure Branch column has no NA for sorting
-        self.df['Branch'] = self.df['Branch'].fillna('')
-        self.df = self.df.sort_values(['Branch', 'BranchCode', 'PRN']).reset_index(drop=True)
-        
-        # Create blocks of 30 students (if any remain after filtering)
-        self.create_blocks()
-        
-        # Prepare output data
-        output_data = {
-            'totalStudents': len(self.df),
-            'blocks': self.blocks,
-            'timestamp': datetime.now().isoformat(),
-            'debug': {
-                'rows_before_filter': before_count,
-                'rows_after_filter': after_count,
-                'recognized_branch_codes': list(self.branch_codes.keys())
-            }
-        }
-        
         return output_data
     
+    def _load(self):
+        """Read the whole roll list into self.df, sorted for seating"""
+        diagnostics = self.diagnostics
+        with diagnostics.stage('read') as stage:
+            if self.frame is not None:
+                self.df = self.frame.copy()
+                prn_col = 'PRN'
+            elif is_spreadsheet(self.filepath):
+                self.df = read_spreadsheet(self.filepath, cache_dir=self.cache_dir)
+                prn_col = 'PRN'
+            else:
+                # Read CSV (PRN forced to string so long PRNs are never parsed as numbers)
+                columns = sniff_columns(self.filepath)
+                self.df = pd.read_csv(self.filepath, dtype={columns['prn']: str})
+                prn_col = columns['prn'].strip()
+
+            # Normalize column names (strip whitespace)
+            self.df.columns = [c.strip() for c in self.df.columns]
+            stage['rows'] = len(self.df)
+
+        with diagnostics.stage('branch_extraction', rows=len(self.df)):
+            # Clean PRN values
+            self.df['PRN'] = self.df[prn_col].astype(str).str.strip()
+
+            # Extract branch code in one vectorized pass over the PRN column
+            self.df['BranchCode'] = self.matcher.extract(self.df['PRN'])
+
+            # Remove rows with completely empty branch codes (but keep fallback codes)
+            before_count = len(self.df)
+            self.df = self.df[self.df['BranchCode'].notna()].copy()
+            after_count = len(self.df)
+
+            # For rows without recognized branch codes, assign a generic "Other" label
+            self.df['Branch'] = self.matcher.names(self.df['BranchCode'])
+
+        with diagnostics.stage('sort', rows=after_count):
+            # Sort by branch name, branch code and then by PRN so output groups by branch (alphabetical)
+            # Ensure Branch column has no NA for sorting
+            self.df['Branch'] = self.df['Branch'].fillna('')
+            self.df = self.df.sort_values(['Branch', 'BranchCode', 'PRN']).reset_index(drop=True)
+        return before_count, after_count
+
+    def _decode_prns(self, rows):
+        """PRNCenter for every student and PRNClass for ``rows``, from the PRN layout"""
+        with self.diagnostics.stage('prn_decode', rows=len(self.df)):
+            decoded = self.decoder.decode(self.df['PRN'])
+            classes = class_year(decoded['AdmissionYear'], self.exam_date or datetime.now(),
+                                 self.academic_year_start, self.max_study_year)
+            self.df['PRNClass'] = classes.where(self.df.index.isin(rows))
+            self.df['PRNCenter'] = decoded['Center']
+            report = malformed_report(self.df['PRN'], decoded['Problem'])
+        self.diagnostics.counts['malformed_prns'] = report['count']
+        self.diagnostics.details['malformed_prns'] = report
+
+    def _load_streaming(self):
+        """Chunked read keeping only the seating columns, then one in-memory sort"""
+        diagnostics = self.diagnostics
+        before_count = 0
+        after_count = 0
+        parts = []
+        # Reading and branch extraction interleave per chunk
+        with diagnostics.stage('read_extract') as stage:
+            for chunk in self._iter_chunks():
+                before_count += len(chunk)
+                chunk = prepare_chunk(chunk, self.matcher)
+                after_count += len(chunk)
+                if len(chunk):
+                    parts.append(chunk)
+            stage['rows'] = before_count
+        with diagnostics.stage('sort', rows=after_count):
+            if parts:
+                self.df = (pd.concat(parts, ignore_index=True)
+                           .sort_values(SORT_KEYS, kind='stable').reset_index(drop=True))
+            else:
+                self.df = pd.DataFrame(columns=['PRN', 'Branch', 'BranchCode'])
+        return before_count, after_count
+
+    def _iter_chunks(self):
+        """PRN/Name/Year chunks from a CSV, or slices of a workbook's (or the given) frame"""
+        if self.frame is not None or is_spreadsheet(self.filepath):
+            frame = self.frame if self.frame is not None else read_spreadsheet(self.filepath, cache_dir=self.cache_dir)
+            for start in range(0, len(frame), self.chunksize):
+                yield frame.iloc[start:start + self.chunksize]
+        else:
+            yield from iter_chunks(self.filepath, sniff_columns(self.filepath), self.chunksize)
+
     def create_blocks(self):
-        """Create blocks of 30 students each"""
-        students_per_block = 30
-        total_students = len(self.df)
-        num_blocks = (total_students + students_per_block - 1) // students_per_block
-        
-        def _num_to_letters(n):
-            """Convert 1-based integer n to letters: 1->A, 26->Z, 27->AA"""
-            letters = ''
-            while n > 0:
-                n, rem = divmod(n - 1, 26)
-                letters = chr(65 + rem) + letters
-            return letters
-        
-        for block_num in range(num_blocks):
-            start_idx = block_num * students_per_block
-            end_idx = min(start_idx + students_per_block, total_students)
-            
-            block_students = self.df.iloc[start_idx:end_idx].copy()
-            
-            # Assign desk numbers
-            block_students['DeskNo'] = range(1, len(block_students) + 1)
-            
-            # Determine year and name columns (handle different CSV column names)
-            year_col = next((c for c in block_students.columns if 'year' in c.lower()), None)
-            name_col = next((c for c in block_students.columns if c.strip().lower() in ('name', 'student name')), 'Name')
-
-            # Get block details
-            try:
-                block_year = int(block_students.iloc[0][year_col]) if year_col and not pd.isna(block_students.iloc[0][year_col]) else 2
-            except Exception:
-                block_year = 2
-
-            # Compute branches present in this block (sorted, unique)
-            unique_branches = [b for b in sorted(block_students['Branch'].dropna().unique())]
-            branch_label = unique_branches[0] if len(unique_branches) == 1 else ', '.join(unique_branches)
-            branch_code_label = block_students.iloc[0]['BranchCode'] if 'BranchCode' in block_students.columns else ''
-
-            block_letter = _num_to_letters(block_num + 1)
-            block_data = {
-                'blockNumber': block_num + 1,
-                'blockName': f'Block-{block_letter}',
-                'totalStudents': len(block_students),
-                'prnFrom': block_students.iloc[0]['PRN'],
-                'prnTo': block_students.iloc[-1]['PRN'],
-                'year': block_year,
-                'branch': branch_label,
-                'branches': unique_branches,
-                'branchCode': branch_code_label,
-                'centerCode': '6321',
-                'examType': self.get_exam_type(),
-                'date': '',
-                'students': []
-            }
-            
-            # Add student details
-            for idx, row in block_students.iterrows():
-                try:
-                    student_year = int(row[year_col]) if year_col and not pd.isna(row[year_col]) else block_year
-                except Exception:
-                    student_year = block_year
-
-                block_data['students'].append({
-                    'deskNo': int(row['DeskNo']),
-                    'prn': str(row['PRN']),
-                    'name': row.get(name_col, '') if name_col in row.index else row.get('Name', ''),
-                    'branch': row.get('Branch', ''),
-                    'year': student_year
-                })
-            
-            self.blocks.append(block_data)
+        """Seat students with the allocator and create blocks (STUDENTS_PER_BLOCK each by default)"""
+        students_per_block = min(self.STUDENTS_PER_BLOCK, self.MAX_STUDENTS_IN_BLOCK)
+        groups = self.df[self.group_by].to_numpy(dtype=object) if len(self.df) else []
+        with self.diagnostics.stage('allocate', rows=len(groups)):
+            self.allocation = self.allocator.allocate(groups, students_per_block)
+        # Rooms are bounded by their own desk grids (checked when they load);
+        # the cap is for plain STUDENTS_PER_BLOCK blocks
+        largest = max(self.allocation.sizes, default=0)
+        if self.allocation.rooms is None and largest > self.MAX_STUDENTS_IN_BLOCK:
+            raise ValueError(f"A block of {largest} students exceeds MAX_STUDENTS_IN_BLOCK "
+                             f"({self.MAX_STUDENTS_IN_BLOCK})")
+        with self.diagnostics.stage('build_blocks', rows=len(self.df)):
+            if self.allocation.order is not None:
+                self.df = self.df.iloc[self.allocation.order].reset_index(drop=True)
+            self.block_builder = BlockBuilder(self.df, students_per_block=students_per_block,
+                                              block_sizes=self.allocation.sizes,
+                                              rooms=self.allocation.rooms,
+                                              date=self.exam_date.isoformat() if self.exam_date else '',
+                                              slot=self.slot, center_code=self.center_code)
+        self.blocks = SeatingBlocks(self.block_builder, self.get_exam_type())
     
+    def update(self, prior, added=None, removed=(), modified=None):
+        """Re-seat a prior result after late changes, touching as few blocks as possible.
+
+        ``prior`` is a SeatingResult or its JSON dict. ``removed`` lists PRNs
+        to drop, ``modified`` maps a seated PRN to its corrected record (a
+        new PRN, or a dict with prn/name/year) and ``added`` lists new
+        students (PRNs or such dicts). Everyone else keeps their block and
+        desk: a removed student leaves a free desk, a corrected one stays
+        put, and a new student takes the lowest free desk in a block that
+        already seats their branch, else in any block, else in a new block
+        at the end. The 1-based numbers of the blocks that changed are in
+        ``diagnostics.details['changed_blocks']`` (and ``self.changed_blocks``).
+        """
+        self.diagnostics = diagnostics = self._new_diagnostics()
+        with diagnostics.profiling(), diagnostics.stage('reseat') as stage:
+            result = self._reseat(prior, added, removed, modified)
+            stage['rows'] = result.total_students
+        return result
+
+    def _reseat(self, prior, added, removed, modified):
+        seats, rooms, meta = self._prior_seats(prior)
+        block_count = meta['blocks']
+        changed = set()
+        unknown = []
+
+        position = {prn: i for i, prn in enumerate(seats['PRN'].tolist())}
+        drop = []
+        corrected = 0
+        for prn in removed:
+            i = position.get(str(prn).strip())
+            if i is None:
+                unknown.append(prn)
+            else:
+                drop.append(i)
+                changed.add(int(seats.at[i, 'Block']))
+        for prn, record in (modified or {}).items():
+            i = position.get(str(prn).strip())
+            if i is None:
+                unknown.append(prn)
+                continue
+            for col, value in _student_fields(record).items():
+                seats.at[i, col] = value
+            corrected += 1
+            changed.add(int(seats.at[i, 'Block']))
+        seats = seats.drop(index=drop).reset_index(drop=True)
+
+        new = pd.DataFrame([_student_fields(s) for s in (added or [])], columns=['PRN', 'Name', 'Year'])
+        new = new[new['PRN'].notna()]
+        new['Name'] = new['Name'].fillna('')
+        skipped = new.loc[new['PRN'].isin(set(seats['PRN'])) | new['PRN'].duplicated(), 'PRN'].tolist()
+        new = new[~new['PRN'].isin(skipped)]
+        seats = pd.concat([seats, new.assign(Block=-1, Desk=0)], ignore_index=True)
+
+        # Branches for everyone (corrected PRNs may have moved branch)
+        seats['BranchCode'] = self.matcher.extract(seats['PRN'])
+        invalid = seats.loc[seats['BranchCode'].isna() & (seats['Block'] < 0), 'PRN'].tolist()
+        seats = seats[seats['BranchCode'].notna() | (seats['Block'] >= 0)].copy()
+        seats['BranchCode'] = seats['BranchCode'].fillna('')
+        seats['Branch'] = self.matcher.names(seats['BranchCode'])
+
+        # Centers for everyone; a year of study from the PRN only for newcomers
+        self.df = seats
+        self._decode_prns(seats.index[seats['Block'] < 0])
+        seats = self.df
+
+        seated = seats[seats['Block'] >= 0]
+        occupied = [set() for _ in range(block_count)]
+        branch_blocks = {}
+        for block, desk, branch in zip(seated['Block'].tolist(), seated['Desk'].tolist(), seated['Branch'].tolist()):
+            occupied[block].add(desk)
+            blocks = branch_blocks.setdefault(branch, [])
+            if not blocks or blocks[-1] != block:
+                blocks.append(block)
+        for blocks in branch_blocks.values():
+            blocks.sort()
+        capacity = [room.capacity for room in rooms] if rooms is not None else [
+            max([self.STUDENTS_PER_BLOCK] + list(desks)) for desks in occupied]
+        spare_rooms = ([room for room in self.allocator.rooms if room.name not in {r.name for r in rooms}]
+                       if rooms is not None and self.allocator.rooms is not None else [])
+
+        def free_desk(block):
+            desk = 1
+            while desk in occupied[block]:
+                desk += 1
+            return desk if desk <= capacity[block] else None
+
+        newcomers = seats.index[seats['Block'] < 0]
+        order = seats.loc[newcomers].sort_values(['Branch', 'BranchCode', 'PRN']).index
+        any_block = 0
+        for i in order:
+            branch = seats.at[i, 'Branch']
+            target = next((b for b in branch_blocks.get(branch, []) if free_desk(b)), None)
+            while target is None and any_block < block_count:
+                if free_desk(any_block):
+                    target = any_block
+                else:
+                    any_block += 1
+            if target is None:
+                if rooms is not None:
+                    if not spare_rooms:
+                        raise ValueError("No free room left for the added students")
+                    rooms.append(spare_rooms.pop(0))
+                    capacity.append(rooms[-1].capacity)
+                else:
+                    capacity.append(self.STUDENTS_PER_BLOCK)
+                occupied.append(set())
+                target = block_count
+                block_count += 1
+            desk = free_desk(target)
+            seats.at[i, 'Block'] = target
+            seats.at[i, 'Desk'] = desk
+            occupied[target].add(desk)
+            branch_blocks.setdefault(branch, []).append(target)
+            branch_blocks[branch].sort()
+            changed.add(target)
+
+        self.df = seats.sort_values(['Block', 'Desk']).reset_index(drop=True)
+        sizes = np.bincount(self.df['Block'].to_numpy(dtype=np.int64), minlength=block_count)
+        self.block_builder = BlockBuilder(self.df, students_per_block=self.STUDENTS_PER_BLOCK,
+                                          block_sizes=sizes, rooms=rooms, date=meta['date'],
+                                          slot=meta['slot'], desk_numbers=self.df['Desk'].to_numpy(),
+                                          center_code=meta['center_code'] or self.center_code)
+        self.blocks = SeatingBlocks(self.block_builder, meta['exam_type'])
+        self.changed_blocks = sorted(b + 1 for b in changed)
+        self.diagnostics.counts.update({
+            'added': len(newcomers),
+            'removed': len(drop),
+            'modified': corrected,
+            'blocks': block_count
+        })
+        self.diagnostics.details.update({
+            'changed_blocks': self.changed_blocks,
+            'unknown_prns': unknown,
+            'skipped_prns': skipped + invalid,
+            'recognized_branch_codes': list(self.branch_codes.keys())
+        })
+        return SeatingResult(
+            self.block_builder,
+            exam_type=meta['exam_type'],
+            timestamp=datetime.now().isoformat(),
+            diagnostics=self.diagnostics
+        )
+
+    @staticmethod
+    def _prior_seats(prior):
+        """(seats frame with PRN/Name/Year/Block/Desk, rooms per block or None, metadata)"""
+        if isinstance(prior, SeatingResult):
+            b = prior.builder
+            seats = pd.DataFrame({'PRN': b.prn, 'Name': b.name,
+                                  'Year': np.where(b.year >= 0, b.year, np.nan),
+                                  'Block': b.block_of, 'Desk': b.desk_no})
+            if b.paper is not None:
+                seats['Paper'] = b.paper
+            rooms = list(b.rooms) if b.rooms is not None else None
+            meta = {'blocks': len(b), 'exam_type': prior.blocks.exam_type, 'date': b.date, 'slot': b.slot,
+                    'center_code': b.center_code}
+            return seats, rooms, meta
+
+        blocks = list(blocks_of(prior))
+        rows = []
+        for block_idx, block in enumerate(blocks):
+            for student in block['students']:
+                row = {'PRN': str(student['prn']), 'Name': student.get('name', ''),
+                       'Year': student.get('year'), 'Block': block_idx, 'Desk': int(student['deskNo'])}
+                if 'paper' in student:
+                    row['Paper'] = student['paper']
+                rows.append(row)
+        seats = pd.DataFrame(rows, columns=['PRN', 'Name', 'Year', 'Block', 'Desk'] + (
+            ['Paper'] if rows and 'Paper' in rows[0] else []))
+        rooms = ([Room.from_layout(block['layout']) for block in blocks]
+                 if blocks and all(block.get('layout') for block in blocks) else None)
+        first = blocks[0] if blocks else {}
+        meta = {'blocks': len(blocks), 'exam_type': first.get('examType', ''),
+                'date': first.get('date', ''), 'slot': first.get('slot', ''),
+                'center_code': first.get('centerCode', '')}
+        return seats, rooms, meta
+
+    @staticmethod
+    def load(source):
+        """A saved .arrow/.parquet arrangement as a SeatingResult, without re-seating (see seating_table)"""
+        from seating_table import read_result
+        return read_result(source)
+
     def get_exam_type(self):
-        """Determine if it's Winter or Summer based on current date"""
-        month = datetime.now().month
-        year = datetime.now().year
-        # Use institution's season mapping:
-        # - Winter: November, December, January (11,12,1)
-        # - Summer: April, May, June, July (4,5,6,7)
-        if month in [11, 12, 1]:
-            return f"Winter Examination {year}"
-        if month in [4, 5, 6, 7]:
-            return f"Summer Examination {year}"
-        # For other months, return a generic label with year
-        return f"Examination {year}"
+        """Determine if it's Winter or Summer based on the exam date (default: today)"""
+        return exam_type_for(self.exam_date or datetime.now(), self.winter_months, self.summer_months)
+
+
+def exam_type_for(when, winter_months, summer_months):
+    """Exam type label for a date under the institution's season mapping"""
+    month = when.month
+    year = when.year
+    # Use institution's season mapping (WINTER_MONTHS/SUMMER_MONTHS):
+    # - Winter: November, December, January (11,12,1)
+    # - Summer: April, May, June, July (4,5,6,7)
+    if month in winter_months:
+        return f"Winter Examination {year}"
+    if month in summer_months:
+        return f"Summer Examination {year}"
+    # For other months, return a generic label with year
+    return f"Examination {year}"
+
+
+def date_key(exam_date=None):
+    """The date-dependent inputs of a result (exam type, academic session), for cache keys"""
+    settings = get_settings()
+    when = exam_date or datetime.now()
+    return '%s|%s' % (exam_type_for(when, settings.WINTER_MONTHS, settings.SUMMER_MONTHS),
+                      academic_session(when, settings.ACADEMIC_YEAR_START_MONTH))
+
+
+def _student_fields(record):
+    """PRN/Name/Year fields from a PRN string or a student dict (only keys given)"""
+    if not isinstance(record, dict):
+        return {'PRN': str(record).strip()}
+    fields = {}
+    for key, col in (('prn', 'PRN'), ('name', 'Name'), ('year', 'Year')):
+        for k, v in record.items():
+            if k.strip().lower() == key:
+                fields[col] = str(v).strip() if col == 'PRN' else v
+    return fields
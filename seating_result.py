@@ -0,0 +1,123 @@
+import json
+from collections.abc import Sequence
+
+from instrumentation import Diagnostics
+
+
+class SeatingBlocks(Sequence):
+    """Lazy sequence of block dicts backed by a BlockBuilder"""
+
+    __slots__ = ('_builder', 'exam_type')
+
+    def __init__(self, builder, exam_type=''):
+        self._builder = builder
+        self.exam_type = exam_type
+
+    def __len__(self):
+        return len(self._builder)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._builder.block(i, self.exam_type) for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError('block index out of range')
+        return self._builder.block(index, self.exam_type)
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self._builder.block(i, self.exam_type)
+
+
+def materialize_block(block):
+    """Plain-dict copy of a block with its students as a list (picklable, JSON-ready)"""
+    block = dict(block)
+    block['students'] = list(block['students'])
+    return block
+
+
+class SeatingResult:
+    """Columnar seating arrangement returned by SeatingProcessor.process().
+
+    Holds the sorted student arrays and block offsets (via BlockBuilder);
+    block dicts and student records are produced only when accessed.
+    ``result['blocks']``/``result.get(...)`` keep working for code written
+    against the old nested dict. ``diagnostics`` carries the stage timings
+    and row counts of the run that produced it (see instrumentation.py).
+    """
+
+    __slots__ = ('builder', 'total_students', 'timestamp', 'diagnostics', 'blocks')
+
+    KEYS = ('totalStudents', 'blocks', 'timestamp', 'diagnostics')
+
+    def __init__(self, builder, exam_type='', timestamp='', diagnostics=None):
+        self.builder = builder
+        self.total_students = builder.total
+        self.timestamp = timestamp
+        self.diagnostics = diagnostics if diagnostics is not None else Diagnostics()
+        self.blocks = SeatingBlocks(builder, exam_type)
+
+    def __len__(self):
+        return len(self.blocks)
+
+    def __iter__(self):
+        return iter(self.blocks)
+
+    def __getitem__(self, key):
+        if key == 'totalStudents':
+            return self.total_students
+        if key == 'blocks':
+            return self.blocks
+        if key == 'timestamp':
+            return self.timestamp
+        if key == 'diagnostics':
+            return self.diagnostics.to_dict()
+        raise KeyError(key)
+
+    def __contains__(self, key):
+        return key in self.KEYS
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def keys(self):
+        return list(self.KEYS)
+
+    def to_dict(self):
+        """Fully materialized nested dict (the pre-SeatingResult format)"""
+        return {
+            'totalStudents': self.total_students,
+            'blocks': [materialize_block(b) for b in self.blocks],
+            'timestamp': self.timestamp,
+            'diagnostics': self.diagnostics.to_dict()
+        }
+
+    def iter_json(self):
+        """Yield the JSON encoding in pieces, one block at a time
+
+        Diagnostics come last, so they include the time spent serializing
+        the blocks.
+        """
+        yield '{"totalStudents": %s, "blocks": [' % json.dumps(self.total_students)
+        with self.diagnostics.stage('serialize', rows=self.total_students):
+            for i, block in enumerate(self.blocks):
+                if i:
+                    yield ', '
+                yield json.dumps(materialize_block(block), default=str)
+        yield '], "timestamp": %s, "diagnostics": %s}' % (
+            json.dumps(self.timestamp), json.dumps(self.diagnostics.to_dict(), default=str))
+
+    def to_json(self):
+        """JSON string of to_dict(), built block by block"""
+        return ''.join(self.iter_json())
+
+
+def blocks_of(data):
+    """Block sequence from a SeatingResult or a plain ``{'blocks': [...]}`` dict"""
+    if isinstance(data, SeatingResult):
+        return data.blocks
+    return data.get('blocks', [])
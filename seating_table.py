@@ -0,0 +1,207 @@
+"""
+Seating results as Arrow tables, for systems that read the arrangement as data
+
+    students   prn, name, branch, branchCode, year, block, desk
+               (+ paper, row, col when the arrangement has them), in seating order
+    blocks     blockNumber, blockName, totalStudents, prnFrom, prnTo, year, branch,
+               branches, branchCode, centerCode, examType, date, slot, layout (JSON text)
+
+An Arrow IPC (.arrow) or Parquet (.parquet) file holds the students table;
+the blocks side table travels inside it, as Arrow IPC bytes in the schema
+metadata, so one file is the whole arrangement. ``read_tables`` memory-maps
+.arrow files, so their columns are used in place without copying, and
+``read_result`` turns either file back into a SeatingResult (for exports or
+``SeatingProcessor.update``) without seating anything again.
+
+pyarrow is only imported when one of these functions runs.
+"""
+import base64
+import io
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from export_manager import _export_diagnostics
+from instrumentation import Diagnostics
+from seating_result import SeatingResult, blocks_of
+
+# Schema metadata keys
+BLOCKS_KEY = b'seating.blocks'
+TIMESTAMP_KEY = b'seating.timestamp'
+VERSION_KEY = b'seating.version'
+VERSION = b'1'
+
+BLOCK_FIELDS = ('blockNumber', 'blockName', 'totalStudents', 'prnFrom', 'prnTo', 'year', 'branch',
+                'branches', 'branchCode', 'centerCode', 'examType', 'date', 'slot', 'layout')
+
+
+def _block_schema():
+    import pyarrow as pa
+    return pa.schema([
+        ('blockNumber', pa.int32()), ('blockName', pa.string()), ('totalStudents', pa.int32()),
+        ('prnFrom', pa.string()), ('prnTo', pa.string()), ('year', pa.int16()), ('branch', pa.string()),
+        ('branches', pa.list_(pa.string())), ('branchCode', pa.string()), ('centerCode', pa.string()),
+        ('examType', pa.string()), ('date', pa.string()), ('slot', pa.string()), ('layout', pa.string()),
+    ])
+
+
+def student_columns(data):
+    """{column: array} of the flat students table, from a SeatingResult or its JSON dict"""
+    if isinstance(data, SeatingResult):
+        b = data.builder
+        columns = {'prn': b.prn.astype(str), 'name': b.name, 'branch': b.branch, 'branchCode': b.branch_code,
+                   'year': b.student_year.astype(np.int16), 'block': (b.block_of + 1).astype(np.int32),
+                   'desk': b.desk_no.astype(np.int32)}
+        if b.paper is not None:
+            columns['paper'] = b.paper
+        if b.rooms is not None:
+            columns['row'] = b.seat_row.astype(np.int16)
+            columns['col'] = b.seat_col.astype(np.int16)
+        return columns
+
+    rows = [dict(student, block=int(block['blockNumber'])) for block in blocks_of(data)
+            for student in block['students']]
+    frame = pd.DataFrame(rows)
+    if not len(frame):
+        frame = pd.DataFrame(columns=['prn', 'name', 'branch', 'year', 'block', 'deskNo'])
+    prns = frame['prn'].astype(str)
+    # Student records carry no branch code; extract it again as seating did
+    from settings import get_settings
+    columns = {'prn': prns.to_numpy(dtype=object),
+               'name': frame['name'].fillna('').to_numpy(dtype=object) if 'name' in frame else
+               np.full(len(frame), '', dtype=object),
+               'branch': frame['branch'].to_numpy(dtype=object),
+               'branchCode': get_settings().branches.extract(prns).fillna('').to_numpy(dtype=object),
+               'year': frame['year'].to_numpy(dtype=np.int16),
+               'block': frame['block'].to_numpy(dtype=np.int32),
+               'desk': frame['deskNo'].to_numpy(dtype=np.int32)}
+    for key in ('paper', 'row', 'col'):
+        if key in frame:
+            columns[key] = frame[key].to_numpy(dtype=object if key == 'paper' else np.int16)
+    return columns
+
+
+def block_rows(data):
+    """Block side-table rows (block metadata without the students)"""
+    rows = []
+    for block in blocks_of(data):
+        row = {field: block.get(field) for field in BLOCK_FIELDS}
+        row['branches'] = list(block.get('branches') or [])
+        row['layout'] = json.dumps(block['layout']) if block.get('layout') else None
+        rows.append(row)
+    return rows
+
+
+def to_tables(data):
+    """(students, blocks) pyarrow Tables for a SeatingResult or its JSON dict"""
+    import pyarrow as pa
+    students = pa.table({name: pa.array(values, from_pandas=True)
+                         for name, values in student_columns(data).items()})
+    blocks = pa.Table.from_pylist(block_rows(data), schema=_block_schema())
+    return students, blocks
+
+
+def to_table(data):
+    """The students table with the blocks table embedded in its schema metadata"""
+    import pyarrow as pa
+    students, blocks = to_tables(data)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, blocks.schema) as writer:
+        writer.write_table(blocks)
+    timestamp = (data.timestamp if isinstance(data, SeatingResult) else data.get('timestamp')) or ''
+    return students.replace_schema_metadata({
+        VERSION_KEY: VERSION,
+        TIMESTAMP_KEY: str(timestamp).encode('utf-8'),
+        # base64 keeps the metadata valid UTF-8 for readers in other languages
+        BLOCKS_KEY: base64.b64encode(sink.getvalue().to_pybytes()),
+    })
+
+
+def render_arrow(data, diagnostics=None):
+    """Export backend: the arrangement as an Arrow IPC file"""
+    import pyarrow as pa
+    diagnostics = _export_diagnostics(diagnostics)
+    with diagnostics.stage('arrow', rows=data.get('totalStudents')):
+        table = to_table(data)
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+    return io.BytesIO(sink.getvalue().to_pybytes())
+
+
+def render_parquet(data, diagnostics=None):
+    """Export backend: the arrangement as a Parquet file"""
+    import pyarrow.parquet as pq
+    diagnostics = _export_diagnostics(diagnostics)
+    with diagnostics.stage('parquet', rows=data.get('totalStudents')):
+        buffer = io.BytesIO()
+        pq.write_table(to_table(data), buffer)
+    buffer.seek(0)
+    return buffer
+
+
+def read_tables(source):
+    """(students, blocks) Tables from an .arrow/.parquet path, bytes or binary file object
+
+    Arrow files given as a path are memory-mapped: the returned columns
+    point into the file rather than being copied.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, 'rb') as f:
+            magic = f.read(4)
+        if magic == b'PAR1':
+            table = pq.read_table(source)
+        else:
+            table = pa.ipc.open_file(pa.memory_map(os.fspath(source), 'r')).read_all()
+    else:
+        if hasattr(source, 'read'):
+            source = source.read()
+        buffer = pa.py_buffer(source)
+        if bytes(source[:4]) == b'PAR1':
+            table = pq.read_table(pa.BufferReader(buffer))
+        else:
+            table = pa.ipc.open_file(buffer).read_all()
+
+    metadata = table.schema.metadata or {}
+    if BLOCKS_KEY not in metadata:
+        raise ValueError('Not a seating table: the blocks side table is missing')
+    blocks = pa.ipc.open_stream(pa.py_buffer(base64.b64decode(metadata[BLOCKS_KEY]))).read_all()
+    return table, blocks
+
+
+def read_result(source):
+    """A SeatingResult rebuilt from a saved table, without seating anything again"""
+    from block_builder import BlockBuilder
+    from rooms import Room
+
+    diagnostics = Diagnostics('table_import')
+    with diagnostics.stage('read') as stage:
+        students, blocks = read_tables(source)
+        stage['rows'] = students.num_rows
+    with diagnostics.stage('build_blocks', rows=students.num_rows):
+        meta = blocks.to_pylist()
+        sizes = np.array([block['totalStudents'] for block in meta], dtype=np.int64)
+        centers = np.repeat(np.array([block['centerCode'] or '' for block in meta], dtype=object), sizes)
+        df = pd.DataFrame({
+            'PRN': pd.Series(students['prn'].to_numpy(zero_copy_only=False), dtype=object),
+            'Name': pd.Series(students['name'].to_numpy(zero_copy_only=False), dtype=object),
+            'Branch': pd.Series(students['branch'].to_numpy(zero_copy_only=False), dtype=object),
+            'BranchCode': pd.Series(students['branchCode'].to_numpy(zero_copy_only=False), dtype=object),
+            'Year': students['year'].to_numpy(),
+            'PRNCenter': pd.Series(centers, dtype=object),
+        })
+        if 'paper' in students.column_names:
+            df['Paper'] = pd.Series(students['paper'].to_numpy(zero_copy_only=False), dtype=object)
+        rooms = ([Room.from_layout(json.loads(block['layout'])) for block in meta]
+                 if meta and all(block['layout'] for block in meta) else None)
+        first = meta[0] if meta else {}
+        builder = BlockBuilder(df, students_per_block=max(int(sizes.max(initial=0)), 1), block_sizes=sizes,
+                               rooms=rooms, date=first.get('date') or '', slot=first.get('slot') or '',
+                               desk_numbers=students['desk'].to_numpy(), center_code=first.get('centerCode') or '')
+    timestamp = (students.schema.metadata or {}).get(TIMESTAMP_KEY, b'').decode('utf-8')
+    return SeatingResult(builder, exam_type=first.get('examType') or '', timestamp=timestamp,
+                         diagnostics=diagnostics)
@@ -0,0 +1,157 @@
+"""
+Runtime settings: config.py defaults, overridden by a settings file and the environment
+
+    SEATING_CONFIG=/etc/seating.toml     JSON or TOML file of config.py names,
+                                         e.g. CENTER_CODE = "6321"
+    SEATING_<NAME>=<value>               one setting, e.g. SEATING_STUDENTS_PER_BLOCK=25
+                                         (values are read as JSON, else as text)
+
+Later sources win. ``get_settings()`` returns an immutable snapshot and
+reloads it when the settings file changes (checked at most every
+RELOAD_INTERVAL seconds), so a running server picks up a new branch map or
+center code without a restart. Each snapshot compiles its branch registry
+once, on first use, and every processor, request and job shares it (as
+they share the PRN decoder and its memo).
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from types import MappingProxyType
+
+import config
+
+ENV_FILE = 'SEATING_CONFIG'
+ENV_PREFIX = 'SEATING_'
+
+# Seconds between checks of the settings file's modification time
+RELOAD_INTERVAL = 1.0
+
+
+def defaults():
+    """Every upper-case setting defined in config.py"""
+    return {name: getattr(config, name) for name in dir(config) if name.isupper()}
+
+
+def read_settings_file(path):
+    """Settings from a JSON or TOML file (names are matched case-insensitively)"""
+    if path.lower().endswith('.toml'):
+        import tomllib
+        with open(path, 'rb') as f:
+            values = tomllib.load(f)
+    else:
+        with open(path, encoding='utf-8') as f:
+            values = json.load(f)
+    if not isinstance(values, dict):
+        raise ValueError(f"{path}: expected a table of settings")
+    return {name.upper(): value for name, value in values.items()}
+
+
+def parse_env_value(text):
+    try:
+        return json.loads(text)
+    except ValueError:
+        return text
+
+
+class Settings:
+    """One immutable snapshot of every setting; read them as attributes"""
+
+    def __init__(self, values, source=None, mtime=None):
+        object.__setattr__(self, '_values', MappingProxyType(dict(values)))
+        # Short hash of every value, for cache keys that must follow a reload
+        text = json.dumps(dict(values), sort_keys=True, default=sorted)
+        object.__setattr__(self, 'fingerprint', hashlib.sha256(text.encode('utf-8')).hexdigest()[:16])
+        object.__setattr__(self, 'source', source)
+        object.__setattr__(self, 'mtime', mtime)
+        object.__setattr__(self, '_branches', None)
+        object.__setattr__(self, '_lock', threading.Lock())
+
+    def __getattr__(self, name):
+        try:
+            return self._values[name]
+        except KeyError:
+            raise AttributeError(f"no setting named {name}") from None
+
+    def __setattr__(self, name, value):
+        raise AttributeError('Settings are read-only; change the settings file or environment')
+
+    def as_dict(self):
+        return dict(self._values)
+
+    @property
+    def branches(self):
+        """The BranchRegistry for BRANCH_CODES and the PRN layout, compiled once"""
+        if self._branches is None:
+            with self._lock:
+                if self._branches is None:
+                    from branch_registry import BranchRegistry
+                    object.__setattr__(self, '_branches', BranchRegistry.shared(
+                        self.BRANCH_CODES, self.PRN_BRANCH_CODE_START, self.PRN_BRANCH_CODE_LENGTH,
+                        self.PRN_LENGTH))
+        return self._branches
+
+    @property
+    def prn_decoder(self):
+        """The PRNDecoder for the PRN layout (shared, with its memo, by every snapshot)"""
+        from prn_schema import PRNDecoder
+        return PRNDecoder.shared(self.PRN_LENGTH, self.PRN_BRANCH_CODE_START, self.PRN_BRANCH_CODE_LENGTH)
+
+
+def load_settings(path=None, environ=None):
+    """Build a snapshot from config.py, the settings file and SEATING_* variables"""
+    environ = os.environ if environ is None else environ
+    path = path or environ.get(ENV_FILE)
+    values = defaults()
+    mtime = None
+    if path:
+        mtime = os.stat(path).st_mtime_ns
+        overrides = read_settings_file(path)
+        unknown = sorted(set(overrides) - set(values))
+        if unknown:
+            raise ValueError(f"{path}: unknown setting(s) {', '.join(unknown)}")
+        values.update(overrides)
+    for name in values:
+        if ENV_PREFIX + name in environ:
+            values[name] = parse_env_value(environ[ENV_PREFIX + name])
+    return Settings(values, source=path, mtime=mtime)
+
+
+_current = None
+_checked = 0.0
+_lock = threading.Lock()
+
+
+def get_settings():
+    """The current snapshot, reloaded when the settings file has changed"""
+    global _current, _checked
+    now = time.monotonic()
+    if _current is not None and now - _checked < RELOAD_INTERVAL:
+        return _current
+    with _lock:
+        if _current is None:
+            _current = load_settings()
+        elif _current.source and now - _checked >= RELOAD_INTERVAL:
+            try:
+                changed = os.stat(_current.source).st_mtime_ns != _current.mtime
+            except OSError:
+                # Deleted or being replaced: keep serving the last good snapshot
+                changed = False
+            if changed:
+                try:
+                    _current = load_settings(_current.source)
+                except (OSError, ValueError):
+                    # A half-written or invalid file keeps the last good snapshot
+                    pass
+        _checked = now
+        return _current
+
+
+def reload_settings(path=None):
+    """Rebuild the snapshot now (e.g. after changing the environment in tests)"""
+    global _current, _checked
+    with _lock:
+        _current = load_settings(path)
+        _checked = time.monotonic()
+        return _current
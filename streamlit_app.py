@@ -1,11 +1,15 @@
 import streamlit as st
 import pandas as pd
+import hashlib
 import os
 import sys
 import signal
 from datetime import datetime
-from seating_processor import SeatingProcessor
-from export_manager import ExportManager
+from seating_processor import SeatingProcessor, date_key
+from export_cache import export_cache
+from ingest import read_roll_list
+from seating_result import materialize_block
+from settings import get_settings
 
 # Prevent signal handler errors in non-main threads
 if sys.platform != 'win32':
@@ -14,12 +18,55 @@ if sys.platform != 'win32':
     except Exception:
         pass
 
+# Block tabs rendered per page (every tab's content is built on each rerun)
+BLOCKS_PER_PAGE = 10
+
+XLSX_MIME = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+
+@st.cache_resource(max_entries=8, show_spinner=False)
+def process_roll_list(file_hash, extension, profile, settings_fingerprint, as_of, _content):
+    """Seat an uploaded roll list in memory; one shared result per file content, settings and season"""
+    frame = read_roll_list(_content, 'upload' + extension)
+    processor = SeatingProcessor(None, frame=frame, profile=profile, trace_memory=profile)
+    return processor.process()
+
+
+@st.cache_data(max_entries=2048, show_spinner=False)
+def block_frame(file_hash, block_idx, _data):
+    """Student table for one block"""
+    students = list(_data.blocks[block_idx]['students'])
+    return pd.DataFrame({
+        'Desk No.': [s['deskNo'] for s in students],
+        'PRN': [s['prn'] for s in students],
+        'Name': [s['name'] for s in students],
+        'Branch': [s['branch'] for s in students],
+        'Year': [s['year'] for s in students]
+    })
+
+
+@st.cache_resource(max_entries=8, show_spinner=False)
+def block_export_prefetch(file_hash, _data):
+    """Per-block PDF/Excel renders running in the background, started once per file"""
+    return export_cache.prefetch([materialize_block(block) for block in _data.blocks])
+
+
+@st.cache_data(max_entries=8, ttl=3600, show_spinner=False)
+def full_report(file_hash, fmt, _data):
+    """Full PDF/Excel report bytes (assembled from the cached block renders)"""
+    buffer = export_cache.generate_pdf(_data) if fmt == 'pdf' else export_cache.generate_excel(_data)
+    return buffer.read()
+
+
 # Page configuration
 st.set_page_config(page_title="Seating Arrangement System", layout="wide")
 
+settings = get_settings()
+
 # Initialize session state
 if 'processed_data' not in st.session_state:
     st.session_state.processed_data = None
+    st.session_state.file_hash = None
 
 # Title
 st.title("Seating Arrangement System")
@@ -27,79 +74,74 @@ st.title("Seating Arrangement System")
 # Sidebar
 with st.sidebar:
     st.header("Supported Branches")
-    st.write("""
-    - AI & DS (11995)
-    - BCA (11101)
-    - Civil (11191)
-    - CSE (11242)
-    - Electrical (11293)
-    - ENTC (11372)
-    - MCA (22241)
-    - Mechanical (11612)
-    """)
+    st.write('\n'.join(f"- {name} ({code})" for code, name in settings.BRANCH_CODES.items()))
+    profile_run = st.checkbox("Profile processing (cProfile + memory)", value=False,
+                              help="Slower; adds a profile summary to the diagnostics panel")
 
 # File upload
-st.subheader("Upload CSV File")
-uploaded_file = st.file_uploader("Select CSV file", type=['csv'])
+st.subheader("Upload CSV or Excel File")
+uploaded_file = st.file_uploader("Select CSV or Excel file", type=['csv', 'xls', 'xlsx'])
 
 if uploaded_file is not None:
     if st.button("Process File"):
         try:
             with st.spinner("Processing..."):
-                # Save temporarily
-                temp_file = "temp_upload.csv"
-                with open(temp_file, "wb") as f:
-                    f.write(uploaded_file.getbuffer())
-                
-                # Process data
-                branch_codes = {
-                    '11995': 'AI & DS',
-                    '11101': 'BCA',
-                    '11191': 'Civil',
-                    '11242': 'CSE',
-                    '11293': 'Elect',
-                    '11372': 'ENTC',
-                    '22241': 'MCA',
-                    '11612': 'Mech'
-                }
-                
-                processor = SeatingProcessor(temp_file, branch_codes)
-                st.session_state.processed_data = processor.process()
-                
-                # Clean up temp file
-                if os.path.exists(temp_file):
-                    os.remove(temp_file)
-                
+                # Processed in memory; the same file content is only seated once
+                content = uploaded_file.getvalue()
+                file_hash = hashlib.sha256(content).hexdigest()
+                extension = os.path.splitext(uploaded_file.name)[1].lower()
+                # Exam type and class years depend on today's date, so the season is part of the key
+                as_of = date_key()
+                st.session_state.processed_data = process_roll_list(file_hash, extension, profile_run,
+                                                                    settings.fingerprint, as_of, content)
+                st.session_state.file_hash = f"{file_hash}{extension}{int(profile_run)}{settings.fingerprint}{as_of}"
+
                 st.success("File processed successfully!")
-        
+
         except Exception as e:
             st.error(f"Error: {str(e)}")
 
 # Display results
-if st.session_state.processed_data:
+if st.session_state.processed_data is not None:
     data = st.session_state.processed_data
-    
+    file_hash = st.session_state.file_hash
+
     st.subheader("Summary")
     col1, col2, col3 = st.columns(3)
     with col1:
-        st.metric("Total Students", data['totalStudents'])
+        st.metric("Total Students", data.total_students)
     with col2:
-        st.metric("Total Blocks", len(data['blocks']))
+        st.metric("Total Blocks", len(data.blocks))
     with col3:
-        st.metric("Students per Block", 30)
-    
+        st.metric("Students per Block", settings.STUDENTS_PER_BLOCK)
+
+    diagnostics = data.diagnostics
+    with st.expander(f"⏱️ Diagnostics ({diagnostics.total_seconds:.3f}s)"):
+        st.dataframe(pd.DataFrame(diagnostics.stages), use_container_width=True, hide_index=True)
+        st.write(diagnostics.counts)
+        if diagnostics.profile_text:
+            st.code(diagnostics.profile_text, language=None)
+
     st.divider()
-    
+
     # Display blocks
     st.subheader("Seating Blocks")
-    
-    if data.get('blocks') and len(data['blocks']) > 0:
-        tabs = st.tabs([f"Block {block['blockName']}" for block in data['blocks']])
-        
-        for tab_idx, tab in enumerate(tabs):
+
+    if len(data.blocks) > 0:
+        prefetch = block_export_prefetch(file_hash, data)
+        ready = sum(1 for future in prefetch if future.done())
+        if ready < len(prefetch):
+            st.caption(f"Preparing block downloads in the background: {ready}/{len(prefetch)} ready")
+
+        pages = (len(data.blocks) + BLOCKS_PER_PAGE - 1) // BLOCKS_PER_PAGE
+        page = st.number_input(f"Page (1-{pages})", min_value=1, max_value=pages, value=1) if pages > 1 else 1
+        shown = range((page - 1) * BLOCKS_PER_PAGE, min(page * BLOCKS_PER_PAGE, len(data.blocks)))
+        tabs = st.tabs([f"Block {data.blocks[block_idx]['blockName']}" for block_idx in shown])
+
+        for tab_idx, tab in zip(shown, tabs):
             with tab:
-                block = data['blocks'][tab_idx]
-                
+                block = data.blocks[tab_idx]
+
                 col1, col2 = st.columns(2)
                 with col1:
                     st.write(f"**Students:** {block['totalStudents']}")
@@ -107,25 +149,34 @@ if st.session_state.processed_data:
                 with col2:
                     st.write(f"**Year:** {block['year']}")
                     st.write(f"**PRN Range:** {block['prnFrom']} → {block['prnTo']}")
-                
+
                 # Student table
-                students_data = []
-                for student in block['students']:
-                    students_data.append({
-                        'Desk No.': student['deskNo'],
-                        'PRN': student['prn'],
-                        'Name': student['name'],
-                        'Branch': student['branch'],
-                        'Year': student['year']
-                    })
-                
-                st.dataframe(pd.DataFrame(students_data), use_container_width=True, hide_index=True)
-                
-                # Export options
+                st.dataframe(block_frame(file_hash, tab_idx, data), use_container_width=True, hide_index=True)
+
+                # Export options: direct downloads once the background render is done
                 col1, col2 = st.columns(2)
+                if prefetch[tab_idx].done():
+                    with col1:
+                        st.download_button(
+                            label=f"PDF - {block['blockName']}",
+                            data=export_cache.block_pdf(block, include_title=True),
+                            file_name=f"block_{block['blockName']}.pdf",
+                            mime="application/pdf",
+                            key=f"pdf_dl_{tab_idx}"
+                        )
+                    with col2:
+                        st.download_button(
+                            label=f"Excel - {block['blockName']}",
+                            data=export_cache.block_excel(block),
+                            file_name=f"block_{block['blockName']}.xlsx",
+                            mime=XLSX_MIME,
+                            key=f"excel_dl_{tab_idx}"
+                        )
+                    continue
+
                 with col1:
                     if st.button(f"PDF - {block['blockName']}", key=f"pdf_{tab_idx}"):
-                        pdf_buffer = ExportManager.generate_pdf({'blocks': [block]})
+                        pdf_buffer = export_cache.block_pdf(block, include_title=True)
                         st.download_button(
                             label=f"Download {block['blockName']}.pdf",
                             data=pdf_buffer,
@@ -133,53 +184,50 @@ if st.session_state.processed_data:
                             mime="application/pdf",
                             key=f"pdf_dl_{tab_idx}"
                         )
-                
+
                 with col2:
                     if st.button(f"Excel - {block['blockName']}", key=f"excel_{tab_idx}"):
-                        excel_buffer = ExportManager.generate_excel({'blocks': [block]})
+                        excel_buffer = export_cache.block_excel(block)
                         st.download_button(
                             label=f"Download {block['blockName']}.xlsx",
                             data=excel_buffer,
                             file_name=f"block_{block['blockName']}.xlsx",
-                            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+                            mime=XLSX_MIME,
                             key=f"excel_dl_{tab_idx}"
                         )
     else:
         st.warning("No seating blocks generated. Check CSV format and branch codes.")
-        if st.session_state.processed_data:
-            debug = st.session_state.processed_data.get('debug', {})
-            with st.expander("📋 Debug Information"):
-                st.write(f"**Rows before filtering:** {debug.get('rows_before_filter', 'N/A')}")
-                st.write(f"**Rows after filtering:** {debug.get('rows_after_filter', 'N/A')}")
-                st.write(f"**Recognized branch codes:** {', '.join(debug.get('recognized_branch_codes', []))}")
-                st.info("If 'Rows after filtering' is much lower than expected, your PRN values might not contain the branch codes listed above. Please verify the PRN format in your CSV file.")
-    
+        diagnostics = data.diagnostics
+        with st.expander("📋 Debug Information"):
+            st.write(f"**Rows before filtering:** {diagnostics.counts.get('rows_before_filter', 'N/A')}")
+            st.write(f"**Rows after filtering:** {diagnostics.counts.get('rows_after_filter', 'N/A')}")
+            st.write(f"**Recognized branch codes:** {', '.join(diagnostics.details.get('recognized_branch_codes', []))}")
+            st.info("If 'Rows after filtering' is much lower than expected, your PRN values might not contain the branch codes listed above. Please verify the PRN format in your CSV file.")
+
     st.divider()
-    
+
     # Full export
     st.subheader("Export All Blocks")
     col1, col2 = st.columns(2)
-    
+
     with col1:
         if st.button("Generate Full PDF"):
-            pdf_buffer = ExportManager.generate_pdf(data)
             st.download_button(
                 label="Download Full Report (PDF)",
-                data=pdf_buffer,
+                data=full_report(file_hash, 'pdf', data),
                 file_name=f"seating_arrangement_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf",
                 mime="application/pdf",
                 key="full_pdf_download"
             )
-    
+
     with col2:
         if st.button("Generate Full Excel"):
-            excel_buffer = ExportManager.generate_excel(data)
             st.download_button(
                 label="Download Full Report (Excel)",
-                data=excel_buffer,
+                data=full_report(file_hash, 'excel', data),
                 file_name=f"seating_arrangement_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx",
-                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+                mime=XLSX_MIME,
                 key="full_excel_download"
             )
 else:
-    st.info("Upload a CSV file to get started")
+    st.info("Upload a CSV or Excel file to get started")